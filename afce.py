@@ -1,14 +1,14 @@
 #!/usr/bin/env python
 
-from mpmath import mp, mpf, exp, log, lambertw, fmul, fdiv, fsub, fadd, plot
+from ehelper import backend, bjt, instrument, stream, temperature
 import logging
 import argparse
 
 def main():
   parser = argparse.ArgumentParser(description='Analyse Shunt Feedback Common Emitter (Source Amplifier)')
-  parser.add_argument('Vs', type=float, help='Source Voltage')
-  parser.add_argument('Rload', type=float, help='Load resistor value (Ohms)')
-  parser.add_argument('Rf', type=float, help='Feedback resistor value (Ohms)')
+  parser.add_argument('Vs', type=float, nargs='?', help='Source Voltage')
+  parser.add_argument('Rload', type=float, nargs='?', help='Load resistor value (Ohms)')
+  parser.add_argument('Rf', type=float, nargs='?', help='Feedback resistor value (Ohms)')
   parser.add_argument('Rs', type=float, nargs='?', default=-1, help='Source resistor value (Ohms) (default = -1; which means it is not present)')
   parser.add_argument('Beta', type=float, nargs='?', default=300,  help='Transistor Beta value (default = 300)')
   parser.add_argument('Is', type=float, nargs='?', default=1e-12, help='Base-Emitter Saturation current in Amps (default = 1e-12)')
@@ -16,7 +16,25 @@ def main():
   parser.add_argument('--Vt', type=float, default=0.026, help='Thermal Voltage in Volts (default = 0.026)')
   parser.add_argument('-g', '--graph', action='store_true', help='Draw a graph')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  parser.add_argument('-o', '--output', metavar='filename', help='Write the temperature sweep to a CSV or .npy file instead of stdout')
+  parser.add_argument('-t', '--tolerance', metavar='X=SPREAD', nargs='+', help="Monte Carlo spread of the operating point, with each parameter given a percentage or a range (as in Beta=100:600 Is=1e-13:1e-11 R=1; R is every resistor), giving percentiles of Ic, Vload, Av, Rbase and Rleq")
+  parser.add_argument('--samples', type=int, default=100000, help='Circuits sampled by the spread (default = 100000)')
+  parser.add_argument('--distribution', choices=['uniform', 'normal'], default='uniform', help='Distribution of each parameter in the spread: uniform over its range, or normal with the range as three standard deviations either side (default = uniform)')
+  parser.add_argument('--seed', type=int, help='Seed of the spread, to repeat a run')
+  temperature.add_arguments(parser)
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('afce', args)
+    return
+
+  if args.Vs is None or args.Rload is None or args.Rf is None:
+    parser.error('Vs, Rload and Rf are required unless --stream is given')
 
   Vs = args.Vs
   Rs = args.Rs
@@ -26,63 +44,45 @@ def main():
   Is = args.Is
   N = args.N
   Vt = args.Vt
-  nVt = N*Vt
 
   if args.verbose:
     logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+  if args.temperature is not None:
+    _, Vt, Is = temperature.junction(args.temperature, Is, N, args.eg, args.xti, args.tnom, m)
   logging.info(f'Vs: {Vs}, Rs: {Rs}, Rload: {Rload}, Rf: {Rf}, Beta: {Beta}, Is: {Is}, N: {N}, Vt: {Vt}')
 
-  Beta1 = fadd(Beta,1) # Beta plus 1
   if Rs == -1:
-    RsMod = 1
-  else:
-    RsMod = fadd(fdiv(fadd(Rload,Rf),Rs),1) # will be just 1 if Rs is open
+    Rs = None
 
-  Radd = fadd(fmul(Rload,Beta1),Rf)
-  x = fdiv(fmul(fmul(Is,Radd),exp(fdiv(Vs,fmul(nVt,RsMod)))),fmul(fmul(nVt,Beta),RsMod))
-  w = lambertw(x)
-  Ib = fdiv(fmul(fmul(w,nVt),RsMod),Radd)
-  Ic = fmul(Ib,Beta)
-  Ie = fadd(Ib,Ic)
-  Vbe = Vrs = fmul(log(fdiv(Ic,Is)),nVt)
-  if Rs == -1:
-    Irs = 0
-  else:
-    Irs = fdiv(Vrs,Rs)
-  Irf = fadd(Irs,Ib)
-  Iload = fadd(Irf,Ic)
-  Vload = fmul(Iload,Rload)
-  Vrf = fmul(Irf,Rf)
-  gm = fdiv(Ic,Vt)
-  Rpi = fdiv(Beta,gm) # or Vt/Ib
-  Av = fdiv(fmul(Rload,fsub(1,fmul(gm,Rf))),fadd(Rload,Rf))
-  Rmo = fdiv(fmul(Av,Rf),fsub(Av,1))
-  Rleq = fdiv(fmul(Rload,Rmo),fadd(Rload,Rmo))
-  Rmi = fdiv(Rf,fsub(1,Av))
-  Rbase = fdiv(fmul(Rmi,Rpi),fadd(Rmi,Rpi))
-  if Rs != -1:
-    gain = fdiv(fmul(Rbase,Av),fadd(Rs,Rbase))
-  print("Vload: {}, Iload: {}".format(Vload, Iload))
-  print("Vrf: {}, Irf: {}".format(Vrf, Irf))
-  if Rs != -1:
-    print("Vrs: {}, Irs: {}".format(Vrs, Irs))
-  print("Vbe: {}, Ib: {}".format(Vbe, Ib))
-  print("Rpi: {}, gpi: {}, gm: {}".format(Rpi, fdiv(1,Rpi), gm))
-  print("Av: {}, Rmo: {}, Rleq: {}".format(Av, Rmo, Rleq))
-  print("Rmi: {}, Rbase: {}".format(Rmi, Rbase))
-  if Rs != -1:
-    print("gain: {}".format(gain))
-  print("Ic: {}, Ie: {}".format(Ic, Ie))
-  if args.graph:
-    def Vbe(x):
-      return fmul(log(fdiv(fmul(x,Beta),Is)),nVt)
+  if args.temperature_sweep:
+    instrument.timed('temperature sweep', temperature.write_sweep, args.output, bjt.analyse_shunt_ce, dict(Vs=Vs, Rload=Rload, Rf=Rf, Rs=Rs, Beta=Beta, Is=args.Is, N=N), args.temperature_sweep, args.eg, args.xti, args.tnom)
+    return
 
-    if Rs == -1:
-      Irs = lambda x: 0
-    else:
-      Irs = lambda x: fdiv(Vbe(x),Rs)
-      
-    plot([lambda x: fsub(Vs,fmul(fadd(fmul(x,Beta1),Irs(x)),Rload)), lambda x: fadd(fmul(fadd(Irs(x),x),Rf),Vbe(x))], [0, fdiv(Vs,fmul(Beta1,Rload))], [0, Vs])
+  r = instrument.timed('analyse', bjt.analyse_shunt_ce, Vs, Rload, Rf, Rs, Beta, Is, N, Vt, m)
+  print("Vload: {}, Iload: {}".format(r.Vload, r.Iload))
+  print("Vrf: {}, Irf: {}".format(r.Vrf, r.Irf))
+  if Rs is not None:
+    print("Vrs: {}, Irs: {}".format(r.Vrs, r.Irs))
+  print("Vbe: {}, Ib: {}".format(r.Vbe, r.Ib))
+  print("Rpi: {}, gpi: {}, gm: {}".format(r.Rpi, r.gpi, r.gm))
+  print("Av: {}, Rmo: {}, Rleq: {}".format(r.Av, r.Rmo, r.Rleq))
+  print("Rmi: {}, Rbase: {}".format(r.Rmi, r.Rbase))
+  if Rs is not None:
+    print("gain: {}".format(r.gain))
+  print("Ic: {}, Ie: {}".format(r.Ic, r.Ie))
+  if args.tolerance:
+    from ehelper import spread
+    nominal = dict(Vs=Vs, Rload=Rload, Rf=Rf, Rs=Rs, Beta=Beta, Is=Is, N=N, Vt=Vt)
+    try:
+      s = instrument.timed('tolerance', spread.analyse, bjt.analyse_shunt_ce, nominal, spread.spreads(args.tolerance, nominal), args.samples, args.distribution, args.seed)
+    except ValueError as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    for line in spread.summary_strings(s):
+      print(line)
+  if args.graph:
+    instrument.timed('plot', bjt.plot_shunt_ce, Vs, Rload, Rf, Rs, Beta, Is, N, Vt)
 
 if __name__ == "__main__":
   main()
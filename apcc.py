@@ -1,22 +1,40 @@
 #!/usr/bin/env python
 
-from mpmath import mp, mpf, exp, log, lambertw, fmul, fdiv, fsub, fadd, plot
+from ehelper import backend, bjt, instrument, stream, temperature
 import logging
 import argparse
 
 def main():
   parser = argparse.ArgumentParser(description='Analyse Parallel Biased (voltage divider) Common Collector (Voltage/Emitter Follower)')
-  parser.add_argument('Vs', type=float, help='Source Voltage')
-  parser.add_argument('R1', type=float, help='Source resistor value for Resistor 1 (Ohms)')
-  parser.add_argument('R2', type=float, help='Source resistor value for Resistor 2 (Ohms)')
-  parser.add_argument('Rload', type=float, help='Load resistor value (Ohms)')
+  parser.add_argument('Vs', type=float, nargs='?', help='Source Voltage')
+  parser.add_argument('R1', type=float, nargs='?', help='Source resistor value for Resistor 1 (Ohms)')
+  parser.add_argument('R2', type=float, nargs='?', help='Source resistor value for Resistor 2 (Ohms)')
+  parser.add_argument('Rload', type=float, nargs='?', help='Load resistor value (Ohms)')
   parser.add_argument('Beta', type=float, nargs='?', default=300,  help='Transistor Beta value (default = 300)')
   parser.add_argument('Is', type=float, nargs='?', default=1e-12, help='Base-Emitter Saturation current in Amps (default = 1e-12)')
   parser.add_argument('N', type=float, nargs='?', default=1, help='Emission Coefficient (default = 1)')
   parser.add_argument('--Vt', type=float, default=0.026, help='Thermal Voltage in Volts (default = 0.026)')
   parser.add_argument('-g', '--graph', action='store_true', help='Draw a graph')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  parser.add_argument('-o', '--output', metavar='filename', help='Write the temperature sweep to a CSV or .npy file instead of stdout')
+  parser.add_argument('-t', '--tolerance', metavar='X=SPREAD', nargs='+', help="Monte Carlo spread of the operating point, with each parameter given a percentage or a range (as in Beta=100:600 Is=1e-13:1e-11 R=1; R is every resistor), giving percentiles of Ic, Vload, Av, Rin and Rout")
+  parser.add_argument('--samples', type=int, default=100000, help='Circuits sampled by the spread (default = 100000)')
+  parser.add_argument('--distribution', choices=['uniform', 'normal'], default='uniform', help='Distribution of each parameter in the spread: uniform over its range, or normal with the range as three standard deviations either side (default = uniform)')
+  parser.add_argument('--seed', type=int, help='Seed of the spread, to repeat a run')
+  temperature.add_arguments(parser)
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('apcc', args)
+    return
+
+  if args.Vs is None or args.R1 is None or args.R2 is None or args.Rload is None:
+    parser.error('Vs, R1, R2 and Rload are required unless --stream is given')
 
   Vs = args.Vs
   R1 = args.R1
@@ -26,44 +44,38 @@ def main():
   Is = args.Is
   N = args.N
   Vt = args.Vt
-  nVt = N*Vt
 
   if args.verbose:
     logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+  if args.temperature is not None:
+    _, Vt, Is = temperature.junction(args.temperature, Is, N, args.eg, args.xti, args.tnom, m)
   logging.info(f'Vs: {Vs}, R1: {R1}, R2: {R2}, Rload: {Rload}, Beta: {Beta}, Is: {Is}, N: {N}, Vt: {Vt}')
 
-  Beta1 = fadd(Beta,1) # Beta plus 1
-  rrp1 = fadd(fdiv(R1,R2),1) # R ratio plus 1
-  vt_rrp1 = fmul(Vt,rrp1) # vt * rrp1
-  y = fadd(R1,fmul(Beta1,fmul(Rload,rrp1)))
-  x = fdiv(fmul(Is,fmul(y,exp(fdiv(Vs,vt_rrp1)))),fmul(Beta,fmul(Vt,rrp1)))
-  w = lambertw(x)
-  Ib = fdiv(fmul(w,vt_rrp1),y)
-  Ic = fmul(Ib,Beta)
-  Iload = Ie = fadd(Ib,Ic)
-  Vbe = fmul(log(fdiv(fmul(Ib,Beta),Is)),nVt)
-  Vload = fmul(Iload,Rload)
-  Vr2 = Vb = fadd(Vbe,Vload)
-  Ir2 = fdiv(Vr2,R2)
-  Vr1 = fsub(Vs,Vr2)
-  Ir1 = fdiv(Vr1,R1)
-  Re = fdiv(Vt,Ie)
-  gm = fdiv(Ic,Vt)
-  Rpi = fdiv(Beta,gm) # or Re*(Beta+1) or Vt/Ib
-  Rin = fadd(Rpi,fmul(Beta,Rload))
-  Av = fdiv(fmul(Beta,Rload),Rin)
-  Rout = fdiv(fmul(Rload,Re),fadd(Rload,Re))
-  print("Vr1: {}, Ir1: {}".format(Vr1, Ir1))
-  print("Vr2: {}, Ir2: {}".format(Vr2, Ir2))
-  print("Vb: {}, Vbe: {}, Ib: {}".format(Vb, Vbe, Ib))
-  print("Vload: {}, Iload: {}".format(Vload, Iload))
-  print("Av: {}, Rin: {}, Rout: {}".format(Av, Rin, Rout))
-  print("Rpi: {}, gpi: {},  Re: {}, gm: {}".format(Rpi, fdiv(1,Rpi), Re, gm))
-  print("Ic: {}, Ie: {}".format(Ic, Ie))
+  if args.temperature_sweep:
+    instrument.timed('temperature sweep', temperature.write_sweep, args.output, bjt.analyse_parallel_cc, dict(Vs=Vs, R1=R1, R2=R2, Rload=Rload, Beta=Beta, Is=args.Is, N=N), args.temperature_sweep, args.eg, args.xti, args.tnom)
+    return
 
-  vb = lambda x: fadd(fmul(log(fdiv(fmul(x,Beta),Is)),nVt),fmul(fmul(x,Beta1),Rload)) # give x as Ib, what is Vb?
+  r = instrument.timed('analyse', bjt.analyse_parallel_cc, Vs, R1, R2, Rload, Beta, Is, N, Vt, m)
+  print("Vr1: {}, Ir1: {}".format(r.Vr1, r.Ir1))
+  print("Vr2: {}, Ir2: {}".format(r.Vr2, r.Ir2))
+  print("Vb: {}, Vbe: {}, Ib: {}".format(r.Vb, r.Vbe, r.Ib))
+  print("Vload: {}, Iload: {}".format(r.Vload, r.Iload))
+  print("Av: {}, Rin: {}, Rout: {}".format(r.Av, r.Rin, r.Rout))
+  print("Rpi: {}, gpi: {},  Re: {}, gm: {}".format(r.Rpi, r.gpi, r.Re, r.gm))
+  print("Ic: {}, Ie: {}".format(r.Ic, r.Ie))
+  if args.tolerance:
+    from ehelper import spread
+    nominal = dict(Vs=Vs, R1=R1, R2=R2, Rload=Rload, Beta=Beta, Is=Is, N=N, Vt=Vt)
+    try:
+      s = instrument.timed('tolerance', spread.analyse, bjt.analyse_parallel_cc, nominal, spread.spreads(args.tolerance, nominal), args.samples, args.distribution, args.seed)
+    except ValueError as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    for line in spread.summary_strings(s):
+      print(line)
   if args.graph:
-    plot([lambda x: fsub(Vs,fmul(fadd(x,fdiv(vb(x),R2)),R1)), lambda x: vb(x)], [0, fdiv(Vs,fadd(R1,R2))], [0, Vs])
+    instrument.timed('plot', bjt.plot_parallel_cc, Vs, R1, R2, Rload, Beta, Is, N, Vt)
 
 if __name__ == "__main__":
   main()
@@ -1,20 +1,59 @@
 #!/usr/bin/env python
 
-from mpmath import mp, mpf, exp, log, lambertw, fmul, fdiv, fsub, fadd, plot
+from ehelper import backend, diode, instrument, stream, temperature
 import argparse
 import logging
 
+def run_batch(args):
+  from ehelper.batch import read_table, write_table
+  import numpy as np
+
+  t = read_table(args.batch, ['Vs','R1','R2','Is','N','Vt'], {'Vs': args.Vs, 'R1': args.R1, 'R2': args.R2, 'Is': args.Is, 'N': args.N, 'Vt': args.Vt})
+  logging.info(f"rows: {len(t['Vs'])}")
+  if args.temperature is not None:
+    # every row at the junction temperature, with its Is as at TNOM
+    j = temperature.junction(args.temperature, t['Is'], t['N'], args.eg, args.xti, args.tnom, 'numpy')
+    t['Vt'], t['Is'] = np.broadcast_to(j.Vt, t['Vs'].shape), j.Is
+
+  r = instrument.timed('analyse', diode.analyse_parallel, t['Vs'], t['R1'], t['R2'], t['Is'], t['N'], t['Vt'], 'numpy')
+  t.update(r._asdict())
+  write_table(args.output, ['Vs','R1','R2','Is','N','Vt','VR1','IR1','VR2','IR2','Vd','Id'], t)
+
 def main():
   parser = argparse.ArgumentParser(description='Analyse Parallel Diode')
-  parser.add_argument('Vs', type=float, help='Voltage supply')
-  parser.add_argument('R1', type=float, help='Resistor 1 value in Ohms')
-  parser.add_argument('R2', type=float, help='Resistor 2 value in Ohms')
+  parser.add_argument('Vs', type=float, nargs='?', help='Voltage supply')
+  parser.add_argument('R1', type=float, nargs='?', help='Resistor 1 value in Ohms')
+  parser.add_argument('R2', type=float, nargs='?', help='Resistor 2 value in Ohms')
   parser.add_argument('Is', type=float, nargs='?', default=1e-12, help='Diode Saturation current in Amps (default = 1e-12)')
   parser.add_argument('N', type=float, nargs='?', default=1, help='Emission Coefficient (default = 1)')
   parser.add_argument('--Vt', type=float, default=0.026, help='Thermal Voltage in Volts (default = 0.026)')
   parser.add_argument('-g', '--graph', action='store_true', help='Draw a graph')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  parser.add_argument('-b', '--batch', metavar='filename', help="Solve every row of a CSV or .npy file (columns Vs,R1,R2[,Is,N,Vt]; '-' for stdin)")
+  parser.add_argument('-o', '--output', metavar='filename', help='Write batch or temperature sweep results to a CSV or .npy file instead of stdout')
+  temperature.add_arguments(parser)
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('apd', args)
+    return
+
+  if args.verbose:
+    logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+
+  if args.batch:
+    if args.temperature_sweep:
+      parser.error('--temperature-sweep solves one circuit, so it can\'t be given with --batch')
+    instrument.timed('batch', run_batch, args)
+    return
+
+  if args.Vs is None or args.R1 is None or args.R2 is None:
+    parser.error('Vs, R1 and R2 are required unless --batch or --stream is given')
 
   Vs = args.Vs
   R1 = args.R1
@@ -22,27 +61,21 @@ def main():
   Is = args.Is
   N = args.N
   Vt = args.Vt
-  nVt = N*Vt
 
-  if args.verbose:
-    logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+  if args.temperature is not None:
+    _, Vt, Is = temperature.junction(args.temperature, Is, N, args.eg, args.xti, args.tnom, m)
   logging.info(f'Vs: {Vs}, R1: {R1}, R2: {R2}, Is: {Is}, N: {N}, Vt: {Vt}')
 
-  x = fdiv(fmul(fmul(fmul(R1,R2),Is),exp(fdiv(fmul(R2,fadd(Vs,fmul(Is,R1))),(fmul(nVt,fadd(R1,R2)))))),fmul(nVt,fadd(R1,R2)))
-  w = lambertw(x)
-  Id = fsub(fdiv(fmul(fmul(nVt,w),fadd(R1,R2)),fmul(R1,R2)),Is)
-  Vd = fmul(log(fadd(fdiv(Id,Is),mpf(1))),nVt)
-  Rd = fdiv(Vd,Id)
-  Rd2 = fdiv(fmul(Rd,R2),fadd(Rd,R2))
-  VR2 = Vd
-  IR2 = fdiv(VR2,R2)
-  VR1 = fsub(Vs,Vd)
-  IR1 = fdiv(VR1,R1)
-  print("VR1: {}, IR1: {}".format(VR1, IR1))
-  print("VR2: {}, IR2: {}".format(VR2, IR2))
-  print("Vd: {}, Id: {}".format(Vd, Id))
+  if args.temperature_sweep:
+    instrument.timed('temperature sweep', temperature.write_sweep, args.output, diode.analyse_parallel, dict(Vs=Vs, R1=R1, R2=R2, Is=args.Is, N=N), args.temperature_sweep, args.eg, args.xti, args.tnom)
+    return
+
+  r = instrument.timed('analyse', diode.analyse_parallel, Vs, R1, R2, Is, N, Vt, m)
+  print("VR1: {}, IR1: {}".format(r.VR1, r.IR1))
+  print("VR2: {}, IR2: {}".format(r.VR2, r.IR2))
+  print("Vd: {}, Id: {}".format(r.Vd, r.Id))
   if args.graph:
-    plot([lambda x: fsub(Vs,fmul(fadd(x,fdiv(fmul(nVt,log(fadd(fdiv(x,Is),mpf(1)))),R2)),R1)), lambda x: fmul(nVt,log(fadd(fdiv(x,Is),mpf(1))))], [0, fdiv(Vs,fadd(R1,Rd2))], [0, Vs])
+    instrument.timed('plot', diode.plot_parallel, Vs, R1, R2, r.Vd, r.Id, Is, N, Vt)
 
 if __name__ == "__main__":
   main()
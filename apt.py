@@ -1,16 +1,28 @@
 #!/usr/bin/env python
 
-from mpmath import exp, log, fsub, plot
+from ehelper import backend, instrument, rc, stream
 import argparse
 import logging
 
 def main():
   parser = argparse.ArgumentParser(description='Analyse charge % vs cycles of tau')
-  parser.add_argument('value', type=float, help='Value of cycles or Vratio (the value for which we are not solving)')
+  parser.add_argument('value', type=float, nargs='?', help='Value of cycles or Vratio (the value for which we are not solving)')
   parser.add_argument('-c', '--cycles', action='store_true', help='Solve for cycles (if the flag is not set, solve for Vratio)')
   parser.add_argument('-g', '--graph', action='store_true', help='Draw a graph')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('apt', args)
+    return
+
+  if args.value is None:
+    parser.error('value is required unless --stream is given')
 
   value = args.value
   cycles = args.cycles
@@ -20,16 +32,14 @@ def main():
   logging.info(f'value: {value}, cycles: {cycles}')
 
   if cycles:
-    Vratio = value
-    cycles = fsub(0,log(fsub(1,Vratio)))
+    cycles = instrument.timed('analyse', rc.charge_cycles, value, m)
     print("cycles: {}".format(cycles))
   else:
     cycles = value
-    Vratio = fsub(1,exp(fsub(0,cycles)))
-    print("Vratio: {}".format(Vratio))
-  
+    print("Vratio: {}".format(instrument.timed('analyse', rc.charge_ratio, cycles, m)))
+
   if args.graph:
-    plot([lambda x: fsub(1,exp(fsub(0,x)))], [0, cycles], [0, 1])
+    instrument.timed('plot', rc.plot_charge, cycles)
 
 if __name__ == "__main__":
   main()
@@ -1,41 +1,78 @@
 #!/usr/bin/env python
 
-from mpmath import mp, mpf, exp, log, lambertw, fmul, fdiv, fsub, fadd, plot
+from ehelper import backend, diode, instrument, stream, temperature
 import logging
 import argparse
 
+def run_batch(args):
+  from ehelper.batch import read_table, write_table
+  import numpy as np
+
+  t = read_table(args.batch, ['Vs','R','Is','N','Vt'], {'Vs': args.Vs, 'R': args.R, 'Is': args.Is, 'N': args.N, 'Vt': args.Vt})
+  logging.info(f"rows: {len(t['Vs'])}")
+  if args.temperature is not None:
+    # every row at the junction temperature, with its Is as at TNOM
+    j = temperature.junction(args.temperature, t['Is'], t['N'], args.eg, args.xti, args.tnom, 'numpy')
+    t['Vt'], t['Is'] = np.broadcast_to(j.Vt, t['Vs'].shape), j.Is
+
+  r = instrument.timed('analyse', diode.analyse_serial, t['Vs'], t['R'], t['Is'], t['N'], t['Vt'], 'numpy')
+  t.update(r._asdict())
+  write_table(args.output, ['Vs','R','Is','N','Vt','VR','IR','Vd','Id'], t)
+
 def main():
   parser = argparse.ArgumentParser(description='Analyse Serial Diode')
-  parser.add_argument('Vs', type=float, help='Voltage supply')
-  parser.add_argument('R', type=float, help='Resistor value in Ohms')
+  parser.add_argument('Vs', type=float, nargs='?', help='Voltage supply')
+  parser.add_argument('R', type=float, nargs='?', help='Resistor value in Ohms')
   parser.add_argument('Is', type=float, nargs='?', default=1e-12, help='Diode Saturation current in Amps (default = 1e-12)')
   parser.add_argument('N', type=float, nargs='?', default=1, help='Emission Coefficient (default = 1)')
   parser.add_argument('--Vt', type=float, default=0.026, help='Thermal Voltage in Volts (default = 0.026)')
   parser.add_argument('-g', '--graph', action='store_true', help='Draw a graph')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  parser.add_argument('-b', '--batch', metavar='filename', help="Solve every row of a CSV or .npy file (columns Vs,R[,Is,N,Vt]; '-' for stdin)")
+  parser.add_argument('-o', '--output', metavar='filename', help='Write batch or temperature sweep results to a CSV or .npy file instead of stdout')
+  temperature.add_arguments(parser)
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('asd', args)
+    return
+
+  if args.verbose:
+    logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+
+  if args.batch:
+    if args.temperature_sweep:
+      parser.error('--temperature-sweep solves one circuit, so it can\'t be given with --batch')
+    instrument.timed('batch', run_batch, args)
+    return
+
+  if args.Vs is None or args.R is None:
+    parser.error('Vs and R are required unless --batch or --stream is given')
 
   Vs = args.Vs
   R = args.R
   Is = args.Is
   N = args.N
   Vt = args.Vt
-  nVt = N*Vt
 
-  if args.verbose:
-    logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+  if args.temperature is not None:
+    _, Vt, Is = temperature.junction(args.temperature, Is, N, args.eg, args.xti, args.tnom, m)
   logging.info(f'Vs: {Vs}, R: {R}, Is: {Is}, N: {N}, Vt: {Vt}')
 
-  x = fdiv(fmul(fmul(Is,R),exp(fdiv(fadd(Vs,fmul(Is,R)),nVt))),nVt)
-  w = lambertw(x)
-  Id = fsub(fdiv(fmul(w,nVt),R),Is)
-  Vd = fmul(log(fadd(fdiv(Id,Is),mpf(1))),nVt)
-  VR = fsub(Vs, Vd)
-  IR = fdiv(VR, R)
-  print("VR: {}, IR: {}".format(VR, IR))
-  print("Vd: {}, Id: {}".format(Vd, Id))
+  if args.temperature_sweep:
+    instrument.timed('temperature sweep', temperature.write_sweep, args.output, diode.analyse_serial, dict(Vs=Vs, R=R, Is=args.Is, N=N), args.temperature_sweep, args.eg, args.xti, args.tnom)
+    return
+
+  r = instrument.timed('analyse', diode.analyse_serial, Vs, R, Is, N, Vt, m)
+  print("VR: {}, IR: {}".format(r.VR, r.IR))
+  print("Vd: {}, Id: {}".format(r.Vd, r.Id))
   if args.graph:
-    plot([lambda x: fsub(Vs,fmul(x,R)), lambda x: fmul(nVt,log(fadd(fdiv(x,Is),1)))], [0, fdiv(Vs,R)], [0, Vs])
+    instrument.timed('plot', diode.plot_serial, Vs, R, Is, N, Vt)
 
 if __name__ == "__main__":
   main()
@@ -1,17 +1,38 @@
 #!/usr/bin/env python
 
-from mpmath import mpc, fmul, fdiv, fsub, fadd, exp, power, log, sqrt, pi, plot
+from ehelper import backend, instrument, rc, stream
 import argparse
 import logging
 
 def main():
   parser = argparse.ArgumentParser(description='Analyse serial RC circuit')
-  parser.add_argument('R', type=float, help='Resistor value (in Ohms)')
-  parser.add_argument('C', type=float, help='Capacitor value (in Farads)')
+  parser.add_argument('R', type=float, nargs='?', help='Resistor value (in Ohms)')
+  parser.add_argument('C', type=float, nargs='?', help='Capacitor value (in Farads)')
   parser.add_argument('-g', '--graph', action='store_true', help='Draw a graph (in time domain by default)')
   parser.add_argument('-f', '--frequency', action='store_true', help='Use frequency domain (logarithmic scale) instead of time for graph')
+  parser.add_argument('-s', '--simulate', metavar='filename', help='Simulate the response to the samples of an input signal: a .npy array or raw binary, memory mapped (requires NumPy)')
+  parser.add_argument('-o', '--output', metavar='filename', help='Where the simulated output is written, as float64 (.npy, otherwise raw binary)')
+  parser.add_argument('--rate', type=float, help='Sample rate of the input in Hz (required with -s)')
+  parser.add_argument('--column', type=int, default=0, help='Column (channel) of the input to simulate (default = 0)')
+  parser.add_argument('--channels', type=int, default=1, help='Channels interleaved in a raw binary input (default = 1)')
+  parser.add_argument('--dtype', default='float32', help='Sample type of a raw binary input, as a NumPy dtype (default = float32)')
+  parser.add_argument('--resistor', action='store_true', help='Output the voltage across the resistor instead of the capacitor')
+  parser.add_argument('--chunk', type=int, help='Samples simulated at once (default = 1048576)')
+  parser.add_argument('--check', action='store_true', help='Print the largest error of the simulated step response against 1 - exp(-t/tc), over 10 tc at the sample rate')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('asrc', args)
+    return
+
+  if args.R is None or args.C is None:
+    parser.error('R and C are required unless --stream is given')
 
   R = args.R
   C = args.C
@@ -20,32 +41,36 @@ def main():
     logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
   logging.info(f'R: {R}, C: {C}')
 
-  twopi = fmul(2,pi)
-  tc = fmul(R,C)
-  nepers = fdiv(1,tc)
-  cutoff = fmul(nepers,fdiv(1,twopi))
-
-  print("tc: {}, nepers: {}, cutoff: {}".format(tc, nepers, cutoff))
+  r = instrument.timed('analyse', rc.analyse_serial, R, C, m)
+  print("tc: {}, nepers: {}, cutoff: {}".format(r.tc, r.nepers, r.cutoff))
 
-  def H(x):
-    if x > 0:
-      return 1
-    return 0
-
-  def pow10(x):
-    return fmul(power(10,x),twopi)
+  if args.graph:
+    instrument.timed('plot', rc.plot_serial, R, C, args.frequency)
 
-  def mag(x):
-    return sqrt(fadd(power(x.real,2),power(x.imag,2)))
+  if args.simulate or args.check:
+    simulate(parser, args, R, C)
 
-  def db(x):
-    return fmul(20,log(x,10))
+def simulate(parser, args, R, C):
+  from ehelper import transient
 
-  if args.graph:
-    if args.frequency:
-      plot(lambda f: db(mag(fdiv(1,fadd(1,fmul(mpc(0, pow10(f)),tc))))), [0,12])
-    else:
-      plot([lambda t: fsub(H(t),fmul(exp(fdiv(-t,tc)),H(t))), lambda t: fmul(exp(fdiv(-t,tc)),H(t))], [-tc, fmul(6,tc)], [0, 1])
+  chunk = transient.CHUNK if args.chunk is None else args.chunk
+  try:
+    if not args.rate:
+      raise ValueError("--rate is required to simulate")
+    if args.simulate and not args.output:
+      raise ValueError("-o is required with -s")
+    if chunk < 1:
+      raise ValueError("--chunk must be at least 1")
+    if args.check:
+      error = instrument.timed('check', transient.step_error, R, C, args.rate, chunk=chunk)
+      print(f"Step response error: {error:g}")
+    if args.simulate:
+      t = instrument.timed('simulate', transient.simulate, args.simulate, args.output, R, C, args.rate, args.column, args.channels, args.dtype, args.resistor, chunk)
+      print(f"Samples: {t.samples}, Vc: {t.Vc}, max: {t.maximum}, min: {t.minimum}")
+  except (ValueError, TypeError, OSError) as e:
+    parser.print_usage()
+    print(f"\nerror: {e}")
+    exit(1)
 
 if __name__ == "__main__":
   main()
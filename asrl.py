@@ -1,62 +1,74 @@
 #!/usr/bin/env python
 
-from mpmath import mp, mpf, exp, log, lambertw, fmul, fdiv, fsub, fadd, plot, pi, tan, cos, power, sqrt, acos, sin
+from ehelper import backend, instrument, rl, stream, waveform
 import argparse
 import logging
 
-def r2d(rads):
-  return fdiv(fmul(rads,180),pi)
+POSITIONALS = ['Vsrc', 'Vr', 'Vl', 'Rr', 'Rlr']
+MEASURED = ['Vsrc', 'Vr', 'Vl']
 
 def main():
   parser = argparse.ArgumentParser(description='Analyse Phase of RL circuit')
-  parser.add_argument('Vsrc', type=float, help='Measured Voltage from the source (RMS by default)')
-  parser.add_argument('Vr', type=float, help='Measured voltage over the source resistor (RMS by default)')
-  parser.add_argument('Vl', type=float, help='Measured voltage over the inductor (RMS by default)')
-  parser.add_argument('Rr', type=float, help='Resistance of the resistor')
-  parser.add_argument('Rlr', type=float, help='Resistance of the inductor')
+  parser.add_argument('Vsrc', type=float, nargs='?', help='Measured Voltage from the source (RMS by default)')
+  parser.add_argument('Vr', type=float, nargs='?', help='Measured voltage over the source resistor (RMS by default)')
+  parser.add_argument('Vl', type=float, nargs='?', help='Measured voltage over the inductor (RMS by default)')
+  parser.add_argument('Rr', type=float, nargs='?', help='Resistance of the resistor')
+  parser.add_argument('Rlr', type=float, nargs='?', help='Resistance of the inductor')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
   parser.add_argument('-m', '--max', action='store_true', help='Use maximum voltage for all measured voltages instead of RMS')
+  waveform.add_arguments(parser, MEASURED)
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
 
-  Vsrc = args.Vsrc
-  Vr = args.Vr
-  Vl = args.Vl
-  Rr = args.Rr
-  Rlr = args.Rlr
-
-  if args.max:
-    Vsrc = fdiv(Vsrc,sqrt(2)) 
-    Vr = fdiv(Vr,sqrt(2)) 
-    Vl = fdiv(Vl,sqrt(2)) 
+  if args.stream:
+    stream.run('asrl', args)
+    return
 
   if args.verbose:
     logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+
+  # the current is Vr's, so the phases measured against it are the impedances' angles
+  c = None
+  if args.waveform:
+    try:
+      values = waveform.arguments(args, POSITIONALS, MEASURED)
+      c = instrument.timed('waveform', waveform.measure, args, MEASURED, 'Vr')
+    except (OSError, ValueError) as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    logging.info(f'samples: {c.samples}, frequency: {c.frequency}, mean: {c.mean}')
+    values.update({n: c.rms[n] for n in MEASURED})
+  elif args.Vsrc is None or args.Vr is None or args.Vl is None or args.Rr is None or args.Rlr is None:
+    parser.error('Vsrc, Vr, Vl, Rr and Rlr are required unless --waveform or --stream is given')
+  else:
+    values = vars(args)
+
+  Vsrc = values['Vsrc']
+  Vr = values['Vr']
+  Vl = values['Vl']
+  Rr = values['Rr']
+  Rlr = values['Rlr']
+
+  if args.max and not c:
+    Vsrc = m.fdiv(Vsrc,m.sqrt(2)) 
+    Vr = m.fdiv(Vr,m.sqrt(2)) 
+    Vl = m.fdiv(Vl,m.sqrt(2)) 
+
   logging.info(f'Vsrc: {Vsrc}, Vr: {Vr}, Vl: {Vl}, Rr: {Rr}, Rlr: {Rlr}')
 
-  Itot = Ill = Il = Ilr = Ir = Isrc = fdiv(Vr,Rr)
-  Ztot = fdiv(Vsrc,Isrc)
-  Vtot = fmul(Itot, Ztot)
-  Zl = fdiv(Vl,Il)
-
-  Pl = acos(fdiv(fsub(fsub(power(Ztot,2),power(Rr,2)),power(Zl,2)),fmul(2,fmul(Rr,Zl))))
-  Rl = fmul(Zl,cos(Pl))
-  Rtot = Rl + Rr
-  Xll = Xl = Xtot = fmul(Zl,sin(Pl))
-  Ptot = acos(fdiv(Rtot,Ztot))
-
-  Rll = Rl - Rlr
-  Zll = sqrt(fadd(power(Rll,2),power(Xll,2)))
-  Vll = fmul(Ill, Zll)
-  Pll = acos(fdiv(Rll,Zll))
-  Vll = fmul(Ill,Zll)
-
-  Vlr = fmul(Ilr,Rlr)
-
-  print("Isrc: {}".format(Isrc))
-  print("Ptot: {}°, Ztot: {}, Rtot: {}, Xtot: {}".format(r2d(Ptot), Ztot, Rtot, Xtot))
-  print("Pl: {}°, Zl: {}, Rl: {}, Xl: {}".format(r2d(Pl), Zl, Rl, Xl))
-  print("Pll: {}°, Zll: {}, Rll: {}, Xll: {}".format(r2d(Pll), Zll, Rll, Xll))
-  print("Vtot: {}, Vr: {}, Vl: {}, Vlr: {}, Vll: {}".format(Vtot, Vr, Vl, Vlr, Vll))
+  r = instrument.timed('analyse', rl.analyse_serial, Vsrc, Vr, Vl, Rr, Rlr, m)
+  print("Isrc: {}".format(r.Isrc))
+  print("Ptot: {}°, Ztot: {}, Rtot: {}, Xtot: {}".format(r.Ptot, r.Ztot, r.Rtot, r.Xtot))
+  print("Pl: {}°, Zl: {}, Rl: {}, Xl: {}".format(r.Pl, r.Zl, r.Rl, r.Xl))
+  print("Pll: {}°, Zll: {}, Rll: {}, Xll: {}".format(r.Pll, r.Zll, r.Rll, r.Xll))
+  print("Vtot: {}, Vr: {}, Vl: {}, Vlr: {}, Vll: {}".format(r.Vtot, r.Vr, r.Vl, r.Vlr, r.Vll))
+  if c:
+    print("Measured Ptot: {}°, Pl: {}°".format(c.phase['Vsrc'], c.phase['Vl']))
 
 if __name__ == "__main__":
   main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+
+from datetime import datetime, timezone
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+
+# Every benchmark is a name and a function to time. They are written against
+# the ehelper package of the tree being measured (found on sys.path), so an
+# older commit can be measured with this file; a benchmark whose code the tree
+# doesn't have is recorded as null rather than failing the run.
+
+# one typical invocation of each of the 20 tools
+STARTUP = [
+  ('asd', ['5', '470']),
+  ('apd', ['5', '470', '1000']),
+  ('dsd', ['5', '.01']),
+  ('dpd', ['5', '.01', '.002']),
+  ('ascc', ['5', '1000', '100']),
+  ('apcc', ['5', '10000', '10000', '1000']),
+  ('afce', ['5', '1000', '10000']),
+  ('apt', ['1']),
+  ('asrc', ['1000', '1e-6']),
+  ('asrlc', ['22', '.00035', '120e-12']),
+  ('aprlc', ['130000', '.00035', '120e-12']),
+  ('dsrlc', ['774000', '10000', 'L', '.00035']),
+  ('dprlc', ['774000', '10000', 'L', '.00035']),
+  ('asrl', ['0.707107', '0.477341', '0.394315', '1000', '256']),
+  ('dsrl', ['0.707107', '195.3125', '256', '.64', 'R', '1']),
+  ('at', ['0.707107', '195.3125', '0.469346', '0.391846', '0.256941', '1000', '256', '137', '10000']),
+  ('dt', ['0.707107', '195.3125', '0.256941', '256', '137', '10000', '.32', '1.414213562']),
+  ('dbf', ['1000', '5', '50']),
+  ('dcf', ['1000', '5', '50']),
+  ('dctf', ['1', '2', '2', '1']),
+]
+
+ORDERS = [2, 5, 10, 20, 50, 100, 200, 500, 1000]
+QUICK_ORDERS = [2, 5, 10, 20, 50, 100]
+CAUER_ORDERS = [2, 3, 4, 5, 6, 8, 10, 15, 20]
+
+def startup(tree, repeat):
+  def run(script, args):
+    return lambda: subprocess.run([sys.executable, os.path.join(tree, f"{script}.py"), *args], cwd=tree, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+  return [(f"startup {script}", run(script, args), 1) for script, args in STARTUP]
+
+def solves():
+  from ehelper import bjt, diode, rl, rlc, transformer
+
+  b = []
+  for name in ['mpmath', 'float']:
+    b += [
+      (f"diode analyse_serial {name}", lambda m=name: diode.analyse_serial(5, 470, m=m), None),
+      (f"diode analyse_parallel {name}", lambda m=name: diode.analyse_parallel(5, 470, 1000, m=m), None),
+      (f"diode design_serial {name}", lambda m=name: diode.design_serial(5, .01, m=m), None),
+      (f"bjt analyse_serial_cc {name}", lambda m=name: bjt.analyse_serial_cc(5, 1000, 100, m=m), None),
+      (f"bjt analyse_parallel_cc {name}", lambda m=name: bjt.analyse_parallel_cc(5, 10000, 10000, 1000, m=m), None),
+      (f"bjt analyse_shunt_ce {name}", lambda m=name: bjt.analyse_shunt_ce(5, 1000, 10000, 2200, m=m), None),
+      (f"rlc analyse_serial {name}", lambda m=name: rlc.analyse_serial(22, .00035, 120e-12, m=m), None),
+      (f"rlc design_parallel {name}", lambda m=name: rlc.design_parallel(774000, 10000, 'L', .00035, m=m), None),
+      (f"rl analyse_serial {name}", lambda m=name: rl.analyse_serial(0.707107, 0.477341, 0.394315, 1000, 256, m=m), None),
+      (f"rl design_serial {name}", lambda m=name: rl.design_serial(0.707107, 195.3125, 256, .64, 'R', 1, m=m), None),
+      (f"transformer analyse {name}", lambda m=name: transformer.analyse(0.707107, 195.3125, 0.469346, 0.391846, 0.256941, 1000, 256, 137, 10000, m=m), None),
+      (f"transformer design {name}", lambda m=name: transformer.design(0.707107, 195.3125, 0.256941, 256, 137, 10000, .32, 1.414213562, m=m), None),
+    ]
+  return b
+
+def filters_(quick):
+  from ehelper import filters
+
+  b = []
+  for N in QUICK_ORDERS if quick else ORDERS:
+    b.append((f"dbf N={N}", lambda N=N: filters.butterworth(1000, N, 50), None))
+    b.append((f"dcf N={N}", lambda N=N: filters.chebyshev(1000, N, 50, .5), None))
+  for N in CAUER_ORDERS:
+    C = [float(x.real) for x in filters.butterworth(1, N, 1, radians=True).normalised_poly]
+    # the closed forms stop at five coefficients; the expansion (where the tree has it) goes on
+    b.append((f"dctf N={N}", lambda C=C: filters.cauer(C), None))
+  return b
+
+# the cost of one point of each graph: the -g windows evaluate a lambda per
+# point with mpmath, -o evaluates the plane as NumPy arrays
+def points():
+  import mpmath
+  from ehelper import backend, filters, rlc
+
+  d = filters.chebyshev(1000, 5, 50, .5)
+  z = mpmath.mpc(1000, 1000)
+  r = rlc.design_serial(774000, 10000, 'L', .00035)
+  m = backend.load('mpmath')
+  b = [
+    ("point cplot dcf N=5", lambda: mpmath.fabs(mpmath.fdiv(d.Rl, mpmath.polyval(d.component_poly, z))), None),
+    ("point plot rlc", lambda: mpmath.fmul(20, mpmath.log10(mpmath.fdiv(r.R, rlc.serial_z(m, r.R, r.L, r.C)(mpmath.fmul(r.w0, mpmath.power(10, .1)))))), None),
+  ]
+  try:
+    from ehelper import render
+    poles, k = render.transfer(d)
+    # a full 64 row tile, so the cost is that of a point in a real render
+    b.append(("point render dcf N=5", lambda: render.tile(poles, k, (-2, 2), (-2, 2), 1000, 1000, 0, 64), 64000))
+  except ImportError:
+    b.append(("point render dcf N=5", None, None))
+  return b
+
+# the best of repeat runs, per call (or per point when points are given)
+def measure(f, repeat, per=None):
+  t = timeit.Timer(f)
+  number, _ = t.autorange()
+  best = min(t.repeat(repeat, number))/number
+  return best/per if per else best
+
+def benchmarks(tree, quick, repeat):
+  groups = [lambda: startup(tree, repeat), solves, lambda: filters_(quick), points]
+  b = []
+  for g in groups:
+    try:
+      b += g()
+    except (ImportError, AttributeError, TypeError) as e:
+      logging.info(f"group skipped: {e}")
+  return b
+
+def commit(tree):
+  try:
+    sha = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=tree, capture_output=True, text=True, check=True).stdout.strip()
+    dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=tree, capture_output=True, text=True).stdout.strip())
+    return sha, dirty
+  except (OSError, subprocess.CalledProcessError):
+    return None, False
+
+def run(tree, quick=False, repeat=5, pattern=None):
+  sys.path.insert(0, tree)
+  results = {}
+  for name, f, per in benchmarks(tree, quick, repeat):
+    if pattern and not re.search(pattern, name):
+      continue
+    try:
+      results[name] = measure(f, repeat, per) if f else None
+    except Exception as e:
+      logging.info(f"{name}: {type(e).__name__}: {e}")
+      results[name] = None
+    logging.info(f"{name}: {results[name]}")
+  sha, dirty = commit(tree)
+  return {'commit': sha, 'dirty': dirty, 'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+          'python': platform.python_version(), 'machine': platform.node(), 'quick': quick, 'filter': pattern, 'results': results}
+
+def read_history(filename):
+  try:
+    with open(filename) as f:
+      return [json.loads(line) for line in f if line.strip()]
+  except FileNotFoundError:
+    return []
+
+def append_history(filename, record):
+  with open(filename, 'a') as f:
+    f.write(json.dumps(record) + "\n")
+
+def rev_parse(rev):
+  r = subprocess.run(['git', 'rev-parse', '--verify', f"{rev}^{{commit}}"], capture_output=True, text=True)
+  if r.returncode:
+    raise ValueError(f"not a commit: {rev}")
+  return r.stdout.strip()
+
+# the latest clean record of a commit (of the same benchmarks), or a new run
+# of it in a temporary worktree
+def record_of(rev, args):
+  sha = rev_parse(rev)
+  for r in reversed(read_history(args.history)):
+    if r['commit'] == sha and not r['dirty'] and r.get('quick') == args.quick and r.get('filter') == args.filter:
+      return r
+  with tempfile.TemporaryDirectory() as d:
+    tree = os.path.join(d, 'tree')
+    subprocess.run(['git', 'worktree', 'add', '--detach', tree, sha], check=True, capture_output=True)
+    try:
+      out = subprocess.run([sys.executable, os.path.abspath(__file__), '--tree', tree, '--json', '--repeat', str(args.repeat)] + (['--quick'] if args.quick else []) + (['-k', args.filter] if args.filter else []),
+        check=True, capture_output=True, text=True).stdout
+    finally:
+      subprocess.run(['git', 'worktree', 'remove', '--force', tree], capture_output=True)
+  r = json.loads(out)
+  append_history(args.history, r)
+  return r
+
+def format_time(t):
+  if t is None:
+    return "-"
+  for unit, scale in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+    if t >= scale:
+      return f"{t/scale:.3g}{unit}"
+  return f"{t/1e-9:.3g}ns"
+
+# the ratio of each benchmark's time, flagged when it is more than threshold slower (or faster)
+def compare(old, new, threshold):
+  lines = []
+  regressions = 0
+  for name in new['results']:
+    a, b = old['results'].get(name), new['results'][name]
+    if a is None or b is None:
+      flag, ratio = "", "-"
+    else:
+      ratio = f"{b/a:.2f}x"
+      flag = "REGRESSION" if b > a*(1 + threshold) else "faster" if b*(1 + threshold) < a else ""
+      regressions += flag == "REGRESSION"
+    lines.append(f"{name}: {format_time(a)} -> {format_time(b)} ({ratio}) {flag}".rstrip())
+  return lines, regressions
+
+def main():
+  parser = argparse.ArgumentParser(description="Benchmark every tool's start up and hot paths, keeping a history, or compare two commits")
+  parser.add_argument('-c', '--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two commits (from the history, or measured in a temporary worktree and added to it), flagging regressions')
+  parser.add_argument('-t', '--threshold', type=float, default=10, help='Percentage slower that counts as a regression (default = 10)')
+  parser.add_argument('-k', '--filter', metavar='PATTERN', help='Only run the benchmarks whose names match this regular expression')
+  parser.add_argument('-q', '--quick', action='store_true', help='Filter orders up to 100 only')
+  parser.add_argument('-r', '--repeat', type=int, default=5, help='Runs of each benchmark, of which the best is kept (default = 5)')
+  parser.add_argument('--history', metavar='filename', default='benchmarks.jsonl', help='History of runs, one JSON record per line (default = benchmarks.jsonl)')
+  parser.add_argument('--tree', metavar='DIR', default=os.path.dirname(os.path.abspath(__file__)), help='Tree whose ehelper and scripts are measured (default = this one)')
+  parser.add_argument('--json', action='store_true', help='Print the run as JSON instead of adding it to the history')
+  parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  args = parser.parse_args()
+
+  if args.verbose:
+    logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+  logging.info(f'compare: {args.compare}, threshold: {args.threshold}, filter: {args.filter}, quick: {args.quick}, repeat: {args.repeat}, history: {args.history}, tree: {args.tree}')
+
+  if args.compare:
+    try:
+      old, new = (record_of(rev, args) for rev in args.compare)
+    except (ValueError, subprocess.CalledProcessError) as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    lines, regressions = compare(old, new, args.threshold/100)
+    print(f"{old['commit'][:10]} -> {new['commit'][:10]}")
+    for line in lines:
+      print(line)
+    if regressions:
+      print(f"\n{regressions} regression(s) over {args.threshold:g}%")
+      exit(1)
+    return
+
+  r = run(os.path.abspath(args.tree), args.quick, args.repeat, args.filter)
+  if args.json:
+    print(json.dumps(r))
+    return
+  append_history(args.history, r)
+  for name, t in r['results'].items():
+    print(f"{name}: {format_time(t)}")
+
+if __name__ == "__main__":
+  main()
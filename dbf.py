@@ -1,78 +1,15 @@
 #!/usr/bin/env python
 
-from mpmath import sin, cos, fadd, fsub, fmul, fdiv, power, sqrt, exp, log10, pi, mpc, cplot, fabs, polyval
+from ehelper import backend, cache, filters, instrument, stream
 from os import remove
 import argparse
 import logging
 
-class Component:
-  def __init__(self, letter, number, value):
-    self.letter = letter
-    self.number = number
-    self.value = value
-
-  def print(self):
-    print("{}{}: {}".format(self.letter,self.number,self.value))
-    
-  def write_ngspice(self, f, innode, outnode):
-    f.write("{}{} {} {} {}\n".format(self.letter,self.number,innode,outnode,self.value))
-
-def write_ngspice(f, c, wc, R, Rs, current):
-  if current:
-    source = "I"
-  else:
-    source = "V"
-
-  f.write("Passive Butterworth\n")
-  f.write("\n")
-  f.write("{}in in 0 DC 0 AC 1\n".format(source))
-
-  if Rs:
-    if len(c) == 1 and c[0].letter == "C":
-      nextinnode = "out"
-    else:
-      nextinnode = 1
-      nextnode = 2
-    f.write("Rs in {} {}\n".format(nextinnode,R))
-  else:
-    nextinnode = "in"
-    nextnode = 1
-
-  i = 1
-  for v in c:
-    innode = nextinnode
-    if v.letter == "C":
-      outnode = 0
-    else:
-      if i < len(c) - 1:
-        outnode = nextnode
-        nextinnode = nextnode
-        nextnode = nextnode + 1
-      else:
-        outnode = nextinnode = "out"
-      
-    v.write_ngspice(f,innode,outnode)
-    i = i + 1
-
-  f.write("R{} {} 0 {}\n".format(len(c)+1,nextinnode,R))
-
-  f.write("\n")
-  f.write(".AC DEC 100 0.01 1GIG\n")
-  f.write(".control\n")
-  f.write("run\n")
-  if Rs and not current:
-    f.write("plot vdb(out)+6\n")
-  else:
-    f.write("plot vdb(out)\n")
-  f.write(".endc\n")
-  f.write(".END\n")
-
-
 def main():
   parser = argparse.ArgumentParser(description='Design Butterfield Filter')
-  parser.add_argument('fc', type=float, help='Frequency Cut-off')
-  parser.add_argument('N', type=int, help='Order of filter')
-  parser.add_argument('R', type=float, help='Resistance of load')
+  parser.add_argument('fc', type=float, nargs='?', help='Frequency Cut-off')
+  parser.add_argument('N', type=int, nargs='?', help='Order of filter')
+  parser.add_argument('R', type=float, nargs='?', help='Resistance of load')
   parser.add_argument('-s', '--source', action='store_true', help='Add source resistance (same ohms as load)')
   parser.add_argument('-r', '--radians', action='store_true', help='Use radians instead of frequency for cut-off')
   parser.add_argument('-c', '--current', action='store_true', help='Input is a current source instead of voltage source')
@@ -80,67 +17,45 @@ def main():
   parser.add_argument('-f', '--force', action='store_true', help='Force creation of an ngfile by deleting an existing file')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
   parser.add_argument('-g', '--graph', action='store_true', help='Display the complex output of the transfer function')
+  parser.add_argument('-o', '--output', metavar='filename', help='Render the complex output of the transfer function to a .png, .svg or .npy file (no display needed)')
+  parser.add_argument('-a', '--ac', metavar='filename', help="Write the ladder's AC response (f, dB, phase in degrees and group delay) as CSV ('-' for stdout) or .npy, without ngspice")
+  parser.add_argument('--sweep', metavar=('START', 'STOP', 'POINTS'), type=float, nargs=3, default=[0.01, 1e9, 100], help='Frequencies of the AC response, as in .AC DEC POINTS START STOP (default = 0.01 1e9 100)')
+  parser.add_argument('--size', type=int, default=1000, help='Width and height in pixels of the rendered output (default = 1000)')
+  parser.add_argument('--workers', type=int, help='Processes used to render the output or run the tolerance analysis (default = one per CPU)')
+  parser.add_argument('-t', '--tolerance', metavar='X=PERCENT', nargs='+', help="Monte Carlo tolerance analysis of the ladder, with each R, L or C spread by a percentage (as in C=5 L=10), giving percentiles of the passband ripple and the cutoff shift")
+  parser.add_argument('--samples', type=int, default=10000, help='Ladders sampled by the tolerance analysis (default = 10000)')
+  parser.add_argument('--distribution', choices=['uniform', 'normal'], default='uniform', help='Spread of each part in the tolerance analysis: uniform within the percentage, or normal with it as three standard deviations (default = uniform)')
+  parser.add_argument('--seed', type=int, help='Seed of the tolerance analysis, to repeat a run')
+  parser.add_argument('--passband', metavar='HZ', type=float, help='Edge of the passband the tolerance analysis takes the ripple over, in Hz (default = where the ladder is 1dB down)')
+  parser.add_argument('--envelope', metavar='filename', help="Write the tolerance analysis' percentiles of the gain at each frequency (the envelopes of the response) as CSV ('-' for stdout) or .npy")
+  parser.add_argument('-p', '--poly', choices=filters.ENGINES, default='auto', help='How the poles are multiplied out: direct (one at a time), fast (vectorized, divide and conquer) or auto (fast when N is over 100) (default = auto)')
+  cache.add_arguments(parser)
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('dbf', args)
+    return
+
+  if args.fc is None or args.N is None or args.R is None:
+    parser.error('fc, N and R are required unless --stream is given')
 
-  fc = args.fc
   N = args.N
   R = args.R
 
-  if args.radians:
-    wc = fc
-    fc = fdiv(wc,fmul(2,pi))
-  else:
-    wc = fmul(fc,fmul(2,pi))
+  d = instrument.timed('design', cache.call, cache.open_cache(args), 'dbf', filters.butterworth, args.fc, N, R, args.source, args.radians, args.current, m, args.poly)
 
   if args.verbose:
     logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
-  logging.info(f'fc: {fc}, N: {N}, R: {R}, source: {args.source}, radians: {args.radians}, current: {args.current}, ngspice: {args.ngspice}, force: {args.force}')
-  logging.info(f'wc: {wc}')
-
-  a = []
-  c = []
-  g = []
-
-  for j in range(1,N+1):
-    v = sin(fdiv(fmul(fsub(fmul(2,j),1),pi),fmul(2,N)))
-    if args.source:
-      g.append(v)
-    else:
-      a.append(v)
-      c.append(power(cos(fdiv(fmul(j,pi),fmul(2,N))),2))
-
-  if not args.source:
-    g.append(a[0])
+  logging.info(f'fc: {d.fc}, N: {N}, R: {R}, source: {args.source}, radians: {args.radians}, current: {args.current}, ngspice: {args.ngspice}, force: {args.force}, poly: {args.poly}')
+  logging.info(f'wc: {d.wc}')
 
-    for j in range(2,N+1):
-      g.append(fdiv(fmul(a[j-1],a[j-2]),fmul(c[j-2],g[j-2])))
-
-  c = []
-
-  if args.source:
-    Rtot = fmul(R,2)
-  else:
-    Rtot = R
-
-  i = 1
-  for v in reversed(g):
-    v = fdiv(v,wc)
-    if i % 2 == 1 and not (args.current or args.source) or i % 2 == 0 and (args.current or args.source):
-      comp = "L"
-      v = fmul(v,Rtot)
-    else:
-      if args.source:
-        Rt = fdiv(R,2)
-      else:
-        Rt = R
-
-      comp = "C"
-      v = fdiv(v,Rt)
-
-    v = Component(comp,i,v)
+  for v in d.components:
     v.print()
-    c.append(v)
-    i = i + 1
 
   if args.ngspice:
     if args.force:
@@ -150,65 +65,63 @@ def main():
         pass
     try:
       with open("/dev/stdout", "w") if args.ngspice == "-" else open(args.ngspice, "x") as f:
-        write_ngspice(f, c, wc, R, args.source, args.current)
+        instrument.timed('ngspice', filters.write_butterworth_ngspice, f, d.components, R, args.source, args.current)
     except FileExistsError:
       print("\nCouldn't create {} as the file already exists. Use '-f' if you wish to replace it".format(args.ngspice))
 
-  logging.info(f'Poles ({N}):')
-  sp = []
-  for k in range(1,N+1):
-    sp.append(fmul(-wc,exp(fdiv(fmul(mpc(0,fsub(fadd(fmul(2,k),N),1)),pi),fmul(2,N)))))
-    logging.info(f'sp[{k}]: {sp[k-1]*-1}')
-
-  poly = [1]
-  for p in sp:
-    add = []
-    for c in poly:
-      add.append(fmul(c,p))
-    poly.insert(0,0)
-    for i in range(len(add)):
-      poly[i] = fadd(poly[i], add[i])
-
-  poly.reverse()
-
-  def poly_string(poly, real_only = True):
-    poly_suffix = ["", "s", "s²", "s³"]
-
-    poly_s = ""
-    sep = ""
-    for i in range(len(poly)-1,-1,-1):
-      poly_s = poly_s + sep
-      sep = " + "
-      v = poly[len(poly)-1-i]
-      if real_only:
-        v = v.real
-      if v != 1 or i == 0:
-        poly_s = poly_s + f"{v}".replace("j","i")
-
-      poly_s = poly_s + (poly_suffix[i] if i < len(poly_suffix) else f"s^{i}")
-
-    return poly_s
-
-  normalised_poly = []
-  for i in range(0,len(poly)):
-    normalised_poly.append(fdiv(poly[i],power(wc,i)))
-
-  component_poly = []
-  for i in range(0,len(normalised_poly)):
-    k = len(normalised_poly) - 1 - i
-    component_poly.append(fdiv(fmul(normalised_poly[i],Rtot),power(wc,k)))
-
-  logging.info(f"Product of poles: {poly_string(poly)}")
-  logging.info(f"Normalised: {poly_string(normalised_poly)}")
-  logging.info(f"Component Poly: {poly_string(component_poly)}")
-
-  alt_comp_poly = f"{Rtot} * "
-  for p in sp:
-    alt_comp_poly = alt_comp_poly + f"({poly_string([fdiv(1,wc), fdiv(p,wc)], False)}) "
-  logging.info(f"Alternate form: {alt_comp_poly}")
+  # the pole and polynomial strings take longer to build than the design itself at high orders
+  if args.verbose:
+    logging.info(f'Poles ({N}):')
+    for k in range(1,N+1):
+      logging.info(f'sp[{k}]: {d.poles[k-1]*-1}')
+
+    logging.info(f"Product of poles: {filters.poly_string(d.poly)}")
+    logging.info(f"Normalised: {filters.poly_string(d.normalised_poly)}")
+    logging.info(f"Component Poly: {filters.poly_string(d.component_poly)}")
+    if d.accuracy is not None:
+      logging.info(f"Coefficient accuracy: relative error < {d.accuracy:.2g}")
+    else:
+      # the ladder's own polynomial is O(N²) to build, so only at the direct engine's orders
+      logging.info(f"Ladder check: relative error {float(filters.ladder_error(d, filters.butterworth_ladder(d.components, R, args.source), args.current, m)):.2g}")
+
+    alt_comp_poly = f"{d.Rtot} * "
+    for p in d.poles:
+      alt_comp_poly = alt_comp_poly + f"({filters.poly_string([m.fdiv(1,d.wc), m.fdiv(p,d.wc)], False)}) "
+    logging.info(f"Alternate form: {alt_comp_poly}")
+    instrument.lap('poly strings')
+
+  if args.ac:
+    from ehelper import ac, batch
+    start, stop, points = args.sweep
+    r = instrument.timed('ac', ac.response, ac.butterworth_ladder(d.components, R, args.source), args.current, ac.sweep(start, stop, int(points)))
+    batch.write_table(args.ac, ac.Response._fields, r._asdict())
+
+  if args.tolerance:
+    from ehelper import tolerance
+    try:
+      s = instrument.timed('tolerance', tolerance.analyse, filters.butterworth_ladder(d.components, R, args.source), args.current, d.fc, tolerance.tolerances(args.tolerance), args.samples, args.distribution, tolerance.butterworth_passband(d.fc, args.N) if args.passband is None else args.passband, workers=args.workers, seed=args.seed, envelope=bool(args.envelope))
+    except ValueError as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    for line in tolerance.spread_strings(s):
+      print(line)
+    if args.envelope:
+      from ehelper import batch
+      batch.write_table(args.envelope, *tolerance.envelope_table(s))
+
+  if args.output:
+    from ehelper import render
+    try:
+      render.write(instrument.timed('render', render.render, d, args.size, workers=args.workers), args.output)
+    except ValueError as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    logging.info(f"Transfer function rendered to {args.output}")
 
   if args.graph:
-    cplot(lambda x: fabs(fdiv(R,polyval(component_poly,x))), re=[float(wc*-2), float(wc*2)], im=[float(wc*-2), float(wc*2)], points=100000, verbose=True)
+    instrument.timed('plot', filters.plot_transfer, d)
 
 if __name__ == "__main__":
   main()
@@ -1,20 +1,36 @@
 #!/usr/bin/env python
 
-from mpmath import mp, mpf, exp, log, lambertw, fmul, fdiv, fsub, fadd, plot
+from ehelper import backend, cache, diode, instrument, standard, stream, temperature
 import argparse
 import logging
 
 def main():
   parser = argparse.ArgumentParser(description='Design Parallel Diode')
-  parser.add_argument('Vs', type=float, help='Voltage supply')
-  parser.add_argument('Id', type=float, help='Desired current over the diode in Amps')
-  parser.add_argument('IR2', type=float, help='Desired current over Resistor two in Amps')
+  parser.add_argument('Vs', type=float, nargs='?', help='Voltage supply')
+  parser.add_argument('Id', type=float, nargs='?', help='Desired current over the diode in Amps')
+  parser.add_argument('IR2', type=float, nargs='?', help='Desired current over Resistor two in Amps')
   parser.add_argument('Is', type=float, nargs='?', default=1e-12, help='Diode Saturation current in Amps (default = 1e-12)')
   parser.add_argument('N', type=float, nargs='?', default=1, help='Emission Coefficient (default = 1)')
   parser.add_argument('--Vt', type=float, default=0.026, help='Thermal Voltage in Volts (default = 0.026)')
   parser.add_argument('-g', '--graph', action='store_true', help='Draw a graph')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  parser.add_argument('-o', '--output', metavar='filename', help='Write the temperature sweep to a CSV or .npy file instead of stdout')
+  standard.add_arguments(parser)
+  temperature.add_arguments(parser)
+  cache.add_arguments(parser)
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('dpd', args)
+    return
+
+  if args.Vs is None or args.Id is None or args.IR2 is None:
+    parser.error('Vs, Id and IR2 are required unless --stream is given')
 
   Vs = args.Vs
   Id = args.Id
@@ -22,25 +38,41 @@ def main():
   Is = args.Is
   N = args.N
   Vt = args.Vt
-  nVt = N*Vt
 
   if args.verbose:
     logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+  if args.temperature is not None:
+    _, Vt, Is = temperature.junction(args.temperature, Is, N, args.eg, args.xti, args.tnom, m)
   logging.info(f'Vs: {Vs}, Id: {Id}, IR2: {IR2}, Is: {Is}, N: {N}, Vt: {Vt}')
 
-  Vd = fmul(log(fadd(fdiv(Id,Is),mpf(1))),nVt)
-  Rd = fdiv(Vd,Id)
-  VR2 = Vd
-  R2 = fdiv(VR2,IR2)
-  Rd2 = fdiv(fmul(Rd,R2),fadd(Rd,R2))
-  VR1 = fsub(Vs,Vd)
-  IR1 = fadd(Id,IR2)
-  R1 = fdiv(VR1,IR1)
-  print("VR1: {}, IR1: {}, R1: {}".format(VR1, IR1, R1))
-  print("VR2: {}, IR2: {}, R2: {}".format(VR2, IR2, R2))
-  print("Vd: {}, Id: {}, Rd: {}".format(Vd, Id, Rd))
+  r = instrument.timed('design', cache.call, cache.open_cache(args), 'dpd', diode.design_parallel, Vs, Id, IR2, Is, N, Vt, m)
+
+  # the drift over temperature of the circuit designed above
+  if args.temperature_sweep:
+    logging.info(f'R1: {r.R1}, R2: {r.R2}')
+    instrument.timed('temperature sweep', temperature.write_sweep, args.output, diode.analyse_parallel, dict(Vs=Vs, R1=float(r.R1), R2=float(r.R2), Is=args.Is, N=N), args.temperature_sweep, args.eg, args.xti, args.tnom)
+    return
+
+  print("VR1: {}, IR1: {}, R1: {}".format(r.VR1, r.IR1, r.R1))
+  print("VR2: {}, IR2: {}, R2: {}".format(r.VR2, r.IR2, r.R2))
+  print("Vd: {}, Id: {}, Rd: {}".format(r.Vd, r.Id, r.Rd))
+
+  if args.eseries:
+    try:
+      c1 = standard.choose(r.R1, args.eseries)
+      c2 = standard.choose(r.R2, args.eseries)
+    except ValueError as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    print(standard.choices_string(f"{args.eseries} R1", c1))
+    print(standard.choices_string(f"{args.eseries} R2", c2))
+    a = [diode.analyse_parallel(Vs, x.value, y.value, Is, N, Vt, m) for x, y in zip(c1, c2)]
+    print(standard.result_string("Id", [x.Id for x in a], Id))
+    print(standard.result_string("IR2", [x.IR2 for x in a], IR2))
+
   if args.graph:
-    plot([lambda x: fsub(Vs,fmul(fadd(x,fdiv(fmul(nVt,log(fadd(fdiv(x,Is),mpf(1)))),R2)),R1)), lambda x: fmul(nVt,log(fadd(fdiv(x,Is),mpf(1))))], [0, fdiv(Vs,fadd(R1,Rd2))], [0, Vs])
+    instrument.timed('plot', diode.plot_parallel, Vs, r.R1, r.R2, r.Vd, r.Id, Is, N, Vt)
 
 if __name__ == "__main__":
   main()
@@ -1,39 +1,71 @@
 #!/usr/bin/env python
 
-from mpmath import mp, mpf, exp, log, lambertw, fmul, fdiv, fsub, fadd, plot
+from ehelper import backend, cache, diode, instrument, standard, stream, temperature
 import argparse
 import logging
 
 def main():
   parser = argparse.ArgumentParser(description='Design Serial Diode')
-  parser.add_argument('Vs', type=float, help='Voltage supply')
-  parser.add_argument('Id', type=float, help='Desired current over the diode in Amps')
+  parser.add_argument('Vs', type=float, nargs='?', help='Voltage supply')
+  parser.add_argument('Id', type=float, nargs='?', help='Desired current over the diode in Amps')
   parser.add_argument('Is', type=float, nargs='?', default=1e-12, help='Diode Saturation current in Amps (default = 1e-12)')
   parser.add_argument('N', type=float, nargs='?', default=1, help='Emission Coefficient (default = 1)')
   parser.add_argument('--Vt', type=float, default=0.026, help='Thermal Voltage in Volts (default = 0.026)')
   parser.add_argument('-g', '--graph', action='store_true', help='Draw a graph')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  parser.add_argument('-o', '--output', metavar='filename', help='Write the temperature sweep to a CSV or .npy file instead of stdout')
+  standard.add_arguments(parser)
+  temperature.add_arguments(parser)
+  cache.add_arguments(parser)
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('dsd', args)
+    return
+
+  if args.Vs is None or args.Id is None:
+    parser.error('Vs and Id are required unless --stream is given')
 
   Vs = args.Vs
   Id = args.Id
   Is = args.Is
   N = args.N
   Vt = args.Vt
-  nVt = N*Vt
 
   if args.verbose:
     logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+  if args.temperature is not None:
+    _, Vt, Is = temperature.junction(args.temperature, Is, N, args.eg, args.xti, args.tnom, m)
   logging.info(f'Vs: {Vs}, Id: {Id}, Is: {Is}, N: {N}, Vt: {Vt}')
 
-  Vd = fmul(log(fadd(fdiv(Id,Is),mpf(1))),nVt)
-  VR = fsub(Vs, Vd)
-  IR = Id
-  R = fdiv(VR,IR)
-  print("VR: {}, IR: {}, R: {}".format(VR, IR, R))
-  print("Vd: {}, Id: {}, Rd: {}".format(Vd, Id, fdiv(Vd,Id)))
+  r = instrument.timed('design', cache.call, cache.open_cache(args), 'dsd', diode.design_serial, Vs, Id, Is, N, Vt, m)
+
+  # the drift over temperature of the circuit designed above
+  if args.temperature_sweep:
+    logging.info(f'R: {r.R}')
+    instrument.timed('temperature sweep', temperature.write_sweep, args.output, diode.analyse_serial, dict(Vs=Vs, R=float(r.R), Is=args.Is, N=N), args.temperature_sweep, args.eg, args.xti, args.tnom)
+    return
+
+  print("VR: {}, IR: {}, R: {}".format(r.VR, r.IR, r.R))
+  print("Vd: {}, Id: {}, Rd: {}".format(r.Vd, r.Id, r.Rd))
+
+  if args.eseries:
+    try:
+      c = standard.choose(r.R, args.eseries)
+    except ValueError as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    print(standard.choices_string(f"{args.eseries} R", c))
+    print(standard.result_string("Id", [diode.analyse_serial(Vs, x.value, Is, N, Vt, m).Id for x in c], Id))
+
   if args.graph:
-    plot([lambda x: fsub(Vs,fmul(x,R)), lambda x: fmul(nVt,log(fadd(fdiv(x,Is),1)))], [0, fdiv(Vs,R)], [0, Vs])
+    instrument.timed('plot', diode.plot_serial, Vs, r.R, Is, N, Vt)
 
 if __name__ == "__main__":
   main()
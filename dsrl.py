@@ -1,26 +1,33 @@
 #!/usr/bin/env python
 
-from mpmath import mp, mpf, exp, log, lambertw, fmul, fdiv, fsub, fadd, plot, pi, tan, cos, power, sqrt, acos, sin, asin
+from ehelper import backend, instrument, rl, standard, stream
 import argparse
 import logging
 
-def d2r(rads):
-  return fdiv(fmul(rads,pi),180)
-
-def r2d(rads):
-  return fdiv(fmul(rads,180),pi)
-
 def main():
   parser = argparse.ArgumentParser(description='Design RL circuit')
-  parser.add_argument('Vsrc', type=float, help='Voltage from the source (RMS by default)')
-  parser.add_argument('Vf', type=float, help='Voltage frequency')
-  parser.add_argument('Rl', type=float, help='Resistance of the inductor')
-  parser.add_argument('Ll', type=float, help='Inductance of the inductor (in henries)')
-  parser.add_argument('VP', choices=['V','P','R'], help='V, P or R; V if the desired value is to be voltage, P if the desired value is to be phase, R if the desired output is a ratio of the resistors value')
-  parser.add_argument('value', type=float, help='Desired voltage, phase or ratio of the inductor (RMS for voltage by default, degrees for phase, a decimal fraction for ratio, such as 1 to match, 2 to double or .5 for half the resistor value)')
+  parser.add_argument('Vsrc', type=float, nargs='?', help='Voltage from the source (RMS by default)')
+  parser.add_argument('Vf', type=float, nargs='?', help='Voltage frequency')
+  parser.add_argument('Rl', type=float, nargs='?', help='Resistance of the inductor')
+  parser.add_argument('Ll', type=float, nargs='?', help='Inductance of the inductor (in henries)')
+  parser.add_argument('VP', nargs='?', choices=['V','P','R'], help='V, P or R; V if the desired value is to be voltage, P if the desired value is to be phase, R if the desired output is a ratio of the resistors value')
+  parser.add_argument('value', type=float, nargs='?', help='Desired voltage, phase or ratio of the inductor (RMS for voltage by default, degrees for phase, a decimal fraction for ratio, such as 1 to match, 2 to double or .5 for half the resistor value)')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
   parser.add_argument('-m', '--max', action='store_true', help='Use maximum voltage for all voltages instead of RMS')
+  standard.add_arguments(parser)
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('dsrl', args)
+    return
+
+  if args.Vsrc is None or args.Vf is None or args.Rl is None or args.Ll is None or args.VP is None or args.value is None:
+    parser.error('Vsrc, Vf, Rl, Ll, VP and value are required unless --stream is given')
 
   Vsrc = args.Vsrc
   Vf = args.Vf
@@ -30,49 +37,32 @@ def main():
   value = args.value
 
   if args.max:
-    Vsrc = fdiv(Vsrc,sqrt(2)) 
+    Vsrc = m.fdiv(Vsrc,m.sqrt(2)) 
     if args.VP == 'V':
-      value = fdiv(value,sqrt(2)) 
+      value = m.fdiv(value,m.sqrt(2)) 
 
   if args.verbose:
     logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
   logging.info(f'Vsrc: {Vsrc}, Vf: {Vf}, Rl: {Rl}, Ll: {Ll}, VP: {VP}, value: {value}')
 
-  Xl = Xtot = fmul(fmul(fmul(2,pi),Vf),Ll)
-  Zl = sqrt(fadd(power(Rl,2),power(Xl,2)))
-  Pl = acos(fdiv(Rl,Xl))
-
-  Vtot = Vsrc
-
-  if VP == 'V':
-    Vl = value
-    Il = Ir = Itot = fdiv(Vl,Zl)
-    Ztot = fdiv(Vtot,Itot)
-  elif VP == 'P':
-    Ptot = d2r(value)
-    Ztot = fdiv(Xtot,sin(Ptot))
-  elif VP == 'R':
-    Rr = fdiv(Zl, value)
-    Rtot = fadd(Rr, Rl)
-    Ztot = sqrt(fadd(power(Rtot,2),power(Xtot,2)))
-
-  if VP == 'P' or VP == 'R':
-    Il = Ir = Itot = fdiv(Vtot,Ztot)
-    Vl = fmul(Il, Zl)
-
-  if VP == 'V' or VP == 'P':
-    Rtot = sqrt(fsub(power(Ztot,2),power(Xtot,2)))
-    Rr = fsub(Rtot,Rl)
-
-  if VP == 'V' or VP == 'R':
-    Ptot = asin(fdiv(Xtot,Ztot))
+  r = instrument.timed('design', rl.design_serial, Vsrc, Vf, Rl, Ll, VP, value, m)
+  print("Ptot: {}, Ztot: {}, Rtot: {}, Xtot: {}".format(r.Ptot, r.Ztot, r.Rtot, r.Xtot))
+  print("Pl: {}, Zl: {}, Rl: {}, Xtot: {}".format(r.Pl, r.Zl, r.Rl, r.Xl))
+  print("Rr: {}".format(r.Rr))
+  print("Vr: {}, Vl: {}".format(r.Vr, r.Vl))
 
-  Vr = fmul(Ir, Rr)
- 
-  print("Ptot: {}, Ztot: {}, Rtot: {}, Xtot: {}".format(r2d(Ptot), Ztot, Rtot, Xtot))
-  print("Pl: {}, Zl: {}, Rl: {}, Xtot: {}".format(r2d(Pl), Zl, Rl, Xl))
-  print("Rr: {}".format(Rr))
-  print("Vr: {}, Vl: {}".format(Vr, Vl))
+  # designed again from the ratio of the inductor's impedance to each choice of Rr
+  if args.eseries:
+    try:
+      c = standard.choose(r.Rr, args.eseries)
+    except ValueError as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    print(standard.choices_string(f"{args.eseries} Rr", c))
+    a = [rl.design_serial(Vsrc, Vf, Rl, Ll, 'R', m.fdiv(r.Zl,x.value), m) for x in c]
+    print(standard.result_string("Vl", [x.Vl for x in a], r.Vl))
+    print(standard.result_string("Ptot", [x.Ptot for x in a], r.Ptot))
 
 if __name__ == "__main__":
   main()
@@ -1,26 +1,64 @@
 #!/usr/bin/env python
 
-from mpmath import mp, mpf, exp, log, lambertw, fmul, fdiv, fsub, fadd, plot, pi, atan, cos, power, sqrt, sin, acos
+from ehelper import backend, instrument, transformer, standard, stream
 import argparse
 import logging
 
-def r2d(rads):
-  return fdiv(fmul(rads,180),pi)
+def search_designs(args, Vsrc, Vf, Vout, Rrin, Rrout, Rload):
+  from ehelper import optimise
+  from ehelper.batch import read_table, write_table
+
+  if args.transformers:
+    t = read_table(args.transformers, ['TR','Lout','Rrin','Rrout'], {'Rrin': Rrin, 'Rrout': Rrout})
+    p = optimise.search(Vsrc, Vf, Vout, t['Rrin'], t['Rrout'], Rload, t['Lout'], t['TR'], args.rs)
+  else:
+    p = optimise.search(Vsrc, Vf, Vout, Rrin, Rrout, Rload, tuple(args.lout), tuple(args.tr), args.rs, args.grid)
+
+  print(f"evaluated: {p.evaluated}, feasible: {p.feasible}, best: {len(p.table['Rs'])}")
+  if p.table['Rs'].size:
+    write_table(None, optimise.COLUMNS, {n: v[:args.top] for n, v in p.table.items()})
+  if args.table:
+    write_table(args.table, optimise.COLUMNS, p.table)
 
 def main():
   parser = argparse.ArgumentParser(description='Design Transformer')
-  parser.add_argument('Vsrc', type=float, help='Voltage supply (RMS by default)')
-  parser.add_argument('Vf', type=float, help='Voltage frequency')
-  parser.add_argument('Vout', type=float, help='Desired voltage over load (RMS by default)')
-  parser.add_argument('Rrin', type=float, help='Resistance of primary inductor (in henries)')
-  parser.add_argument('Rrout', type=float, help='Resistance of secondary inductor (in henries)')
-  parser.add_argument('Rload', type=float, help='Resistance of the load')
-  parser.add_argument('Lout', type=float, help='Secondary Inductance (in henries)')
-  parser.add_argument('TR', type=float, help='Turns Ratio of the transformer (Primary/Secondary)')
+  parser.add_argument('Vsrc', type=float, nargs='?', help='Voltage supply (RMS by default)')
+  parser.add_argument('Vf', type=float, nargs='?', help='Voltage frequency')
+  parser.add_argument('Vout', type=float, nargs='?', help='Desired voltage over load (RMS by default)')
+  parser.add_argument('Rrin', type=float, nargs='?', help='Resistance of primary inductor (in henries)')
+  parser.add_argument('Rrout', type=float, nargs='?', help='Resistance of secondary inductor (in henries)')
+  parser.add_argument('Rload', type=float, nargs='?', help='Resistance of the load')
+  parser.add_argument('Lout', type=float, nargs='?', help='Secondary Inductance (in henries)')
+  parser.add_argument('TR', type=float, nargs='?', help='Turns Ratio of the transformer (Primary/Secondary)')
   parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
   parser.add_argument('-m', '--max', action='store_true', help='Use maximum voltage for supply instead of RMS')
   parser.add_argument('-o', '--maxout', action='store_true', help='Use maximum voltage for desired output voltage instead of RMS')
+  parser.add_argument('--tr', type=float, nargs=2, metavar=('LOW', 'HIGH'), help='Search turns ratios in this range (with --lout) for the designs that are best on Rs, the VA drawn from the source and its phase, instead of designing for one TR and Lout (requires NumPy)')
+  parser.add_argument('--lout', type=float, nargs=2, metavar=('LOW', 'HIGH'), help='Search secondary inductances in this range (with --tr)')
+  parser.add_argument('--transformers', metavar='filename', help='Search the transformers to hand instead, one per row of a CSV or .npy file (columns TR,Lout[,Rrin,Rrout])')
+  parser.add_argument('--rs', type=float, nargs=2, default=[0, float('inf')], metavar=('LOW', 'HIGH'), help='Range of source resistors a searched design may need (default = 0 inf)')
+  parser.add_argument('--grid', type=int, default=1000, help='Points searched on each of the TR and Lout ranges before refining the best (default = 1000)')
+  parser.add_argument('--top', type=int, default=20, help='Searched designs printed, best first (default = 20)')
+  parser.add_argument('--table', metavar='filename', help='Write every searched design that no other beats to a CSV or .npy file')
+  standard.add_arguments(parser)
+  stream.add_arguments(parser)
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
   args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  if args.stream:
+    stream.run('dt', args)
+    return
+
+  search = args.tr or args.lout or args.transformers
+  if args.Vsrc is None or args.Vf is None or args.Vout is None or args.Rrin is None or args.Rrout is None or args.Rload is None:
+    parser.error('Vsrc, Vf, Vout, Rrin, Rrout and Rload are required unless --stream is given')
+  if not search and (args.Lout is None or args.TR is None):
+    parser.error('Lout and TR are required unless --tr and --lout, --transformers or --stream are given')
+  if search and not args.transformers and not (args.tr and args.lout):
+    parser.error('--tr and --lout are both needed to search ranges')
 
   Vsrc = args.Vsrc
   Vf = args.Vf
@@ -32,55 +70,45 @@ def main():
   TR = args.TR
 
   if args.max:
-    Vsrc = fdiv(Vsrc,sqrt(2)) 
+    Vsrc = m.fdiv(Vsrc,m.sqrt(2)) 
 
   if args.maxout:
-    Vout = fdiv(Vout,sqrt(2)) 
+    Vout = m.fdiv(Vout,m.sqrt(2)) 
 
   if args.verbose:
     logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
   logging.info(f'Vsrc: {Vsrc}, Vf: {Vf}, Vout: {Vout}, Rrin: {Rrin}, Rrout: {Rrout}, Rload: {Rload}, Lout: {Lout}, TR: {TR}')
 
-  Vload = Vout
-
-  Irout = Ilout = Iout = Iload = fdiv(Vload,Rload)
-  Vrout = fmul(Irout,Rrout)
-  Vlout = fadd(Vout,Vrout)
-  Vlin = fmul(Vlout,TR)
-  watts = fmul(Vlout,Ilout)
-  Xout = fmul(2,fmul(pi,fmul(Vf,Lout)))
-  Plin = fsub(fdiv(pi,2),atan(fdiv(Xout,fadd(Rload,Rrout))))
-
-  Ilin = Irin = Iin = Is = Itot = fdiv(watts,fmul(Vlin,cos(Plin)))
-  Zlin = fdiv(Vlin,Ilin)
-  Rlin = fmul(Zlin,cos(Plin))
-  Xlin = Xin = Xtot = fmul(Zlin,sin(Plin))
-  va = fmul(fmul(Ilin,Vlin),cos(Plin))
-
-  Vrin = fmul(Irin, Rrin)
-  Rin = fadd(Rlin,Rrin)
-  Zin = sqrt(fadd(power(Rin,2),power(Xin,2)))
-  Pin = acos(fdiv(Rin,Zin))
-  Vin = fmul(Iin,Zin)
- 
-  Vtot = Vsrc
-  Ztot = fdiv(Vtot,Itot)
-  Rtot = sqrt(fsub(power(Ztot,2),power(Xtot,2)))
-  Ptot = acos(fdiv(Rtot,Ztot))
-
-  Rs = fsub(Rtot,Rin)
-  Vs = fmul(Rs,Is)
+  if search:
+    try:
+      instrument.timed('search', search_designs, args, float(Vsrc), Vf, float(Vout), Rrin, Rrout, Rload)
+    except (OSError, ValueError) as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    return
 
-  Lin = fmul(power(TR,2),Lout)
+  r = instrument.timed('design', transformer.design, Vsrc, Vf, Vout, Rrin, Rrout, Rload, Lout, TR, m)
+  print("Rs: {}".format(r.Rs))
+  print("Iin: {}, Iout: {}".format(r.Iin, r.Iout))
+  print("Ptot: {}°, Ztot: {}, Rtot: {}, Xtot: {}".format(r.Ptot, r.Ztot, r.Rtot, r.Xtot))
+  print("Pin: {}°, Zin: {}, Rin: {}, Xin: {}".format(r.Pin, r.Zin, r.Rin, r.Xin))
+  print("Plin: {}°, Zlin: {}, Rlin: {}, Xlin: {}".format(r.Plin, r.Zlin, r.Rlin, r.Xlin))
+  print("Vtot: {}, Vs: {}, Vin: {}, Vrin: {}, Vlin: {}, Vout: {}, Vlout: {}, Vload: {}".format(r.Vtot, r.Vs, r.Vin, r.Vrin, r.Vlin, r.Vout, r.Vlout, r.Vload))
+  print("Xout: {}, Lout: {}, Lin: {}, TR: {}".format(r.Xout, r.Lout, r.Lin, r.TR))
+  print("va: {}, watts: {}".format(r.va, r.watts))
 
-  print("Rs: {}".format(Rs))
-  print("Iin: {}, Iout: {}".format(Iin, Iout))
-  print("Ptot: {}°, Ztot: {}, Rtot: {}, Xtot: {}".format(r2d(Ptot), Ztot, Rtot, Xtot))
-  print("Pin: {}°, Zin: {}, Rin: {}, Xin: {}".format(r2d(Pin), Zin, Rin, Xin))
-  print("Plin: {}°, Zlin: {}, Rlin: {}, Xlin: {}".format(r2d(Plin), Zlin, Rlin, Xlin))
-  print("Vtot: {}, Vs: {}, Vin: {}, Vrin: {}, Vlin: {}, Vout: {}, Vlout: {}, Vload: {}".format(Vtot, Vs, Vin, Vrin, Vlin, Vout, Vlout, Vload))
-  print("Xout: {}, Lout: {}, Lin: {}, TR: {}".format(Xout, Lout, Lin, TR))
-  print("va: {}, watts: {}".format(va, watts))
+  # everything after Rs is linear, so the load voltage scales with the current each choice lets through
+  if args.eseries:
+    try:
+      c = standard.choose(r.Rs, args.eseries)
+    except ValueError as e:
+      parser.print_usage()
+      print(f"\nerror: {e}")
+      exit(1)
+    print(standard.choices_string(f"{args.eseries} Rs", c))
+    Vload = [m.fdiv(m.fmul(r.Vload,r.Ztot),m.sqrt(m.fadd(m.power(m.fadd(x.value,r.Rin),2),m.power(r.Xtot,2)))) for x in c]
+    print(standard.result_string("Vload", Vload, r.Vload))
 
 if __name__ == "__main__":
   main()
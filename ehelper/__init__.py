@@ -0,0 +1,3 @@
+# Only the standard library is imported here; mpmath, NumPy and the plotting
+# code are loaded when a backend or graph that needs them is first used
+from . import backend, diode, bjt, rlc, rl, transformer, rc, filters
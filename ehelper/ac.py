@@ -0,0 +1,110 @@
+from collections import namedtuple
+import numpy as np
+from .filters import butterworth_ladder
+
+# AC analysis of the ladders from dbf, dcf and dctf without ngspice. Each
+# element is a two-port ABCD matrix (a series impedance or a shunt
+# admittance) and the ladder is their product, taken for every frequency at
+# once along with its derivative in w for the group delay. The ladder is the
+# one the ngspice deck describes: an L (or a leading R) is in series, a C (or
+# a later R) is a shunt to ground, and V(out) is the output.
+
+# db and phase (in degrees, unwrapped) of V(out), and the group delay in seconds
+Response = namedtuple('Response', ['f', 'db', 'phase', 'delay'])
+
+RESCALE = 16 # elements multiplied in between rescaling the matrices
+
+# the frequencies of ngspice's .AC DEC points start stop
+def sweep(start=0.01, stop=1e9, points=100):
+  n = int(np.floor(np.log10(stop/start)*points + 1e-9))
+  return start*10**(np.arange(n+1)/points)
+
+# z is the impedance of a series element and the admittance of a shunt one.
+# c is a ladder from write_ladder_ngspice (or butterworth_ladder); the values
+# may be arrays (e.g. of shape (designs, 1)) that broadcast against f, to
+# analyse many designs of the same topology at once
+def response(c, current, f):
+  f = np.asarray(f, dtype=float)
+  w = 2*np.pi*f
+  one = np.ones(np.broadcast_shapes(w.shape, *[np.shape(v.value) for v in c]), dtype=complex)
+  zero = np.zeros_like(one)
+
+  A, B, C, D = one, zero, zero, one
+  dA, dB, dC, dD = zero, zero, zero, zero
+  scale = np.zeros(one.shape)
+
+  for i, v in enumerate(c):
+    x = np.asarray(v.value.real, dtype=float)
+    match v.letter:
+      case "L":
+        series, z, dz = True, 1j*w*x, 1j*x
+      case "C":
+        series, z, dz = False, 1j*w*x, 1j*x
+      case "R":
+        series = i == 0
+        z, dz = x if series else 1/x, 0
+      case _:
+        raise ValueError(f"can't analyse a {v.letter} in a ladder")
+
+    if series:
+      dB, dD = dA*z + A*dz + dB, dC*z + C*dz + dD
+      B, D = A*z + B, C*z + D
+    else:
+      dA, dC = dA + dB*z + B*dz, dC + dD*z + D*dz
+      A, C = A + B*z, C + D*z
+
+    # only the ratios of the entries matter, so keep them in range
+    if i % RESCALE == RESCALE-1:
+      _, e = np.frexp(np.maximum.reduce([abs(A), abs(B), abs(C), abs(D)]))
+      A, B, C, D, dA, dB, dC, dD = [np.ldexp(y.real, -e) + 1j*np.ldexp(y.imag, -e) for y in (A, B, C, D, dA, dB, dC, dD)]
+      scale += e
+
+  # V(out) = 1/A for a unit voltage source, and -1/C for the unit current
+  # source of the deck (which draws its current out of the input node)
+  if current:
+    x, dx, sign = C, dC, np.pi
+  else:
+    x, dx, sign = A, dA, 0
+
+  with np.errstate(divide='ignore', invalid='ignore'):
+    db = -20*np.log10(np.abs(x)) - 20*np.log10(2)*scale
+    phase = np.degrees(np.unwrap(sign - np.angle(x), axis=-1))
+    delay = (dx/x).imag
+  return Response(np.broadcast_to(f, one.shape), db, phase, delay)
+
+# only the db of response (V(out) in dB), without the derivatives for the
+# delay or the phase, for the Monte Carlo that needs nothing else. It takes
+# half the time, as the products are updated in place.
+def gain(c, current, f):
+  w = 2*np.pi*np.asarray(f, dtype=float)
+  shape = np.broadcast_shapes(w.shape, *[np.shape(v.value) for v in c])
+  A, D = np.ones(shape, dtype=complex), np.ones(shape, dtype=complex)
+  B, C = np.zeros(shape, dtype=complex), np.zeros(shape, dtype=complex)
+  scale = np.zeros(shape)
+
+  for i, v in enumerate(c):
+    x = np.asarray(v.value.real, dtype=float)
+    match v.letter:
+      case "L" | "C":
+        series, z = v.letter == "L", 1j*w*x
+      case "R":
+        series = i == 0
+        z = x if series else 1/x
+      case _:
+        raise ValueError(f"can't analyse a {v.letter} in a ladder")
+
+    if series:
+      B += A*z
+      D += C*z
+    else:
+      A += B*z
+      C += D*z
+
+    if i % RESCALE == RESCALE-1:
+      _, e = np.frexp(np.maximum.reduce([abs(A), abs(B), abs(C), abs(D)]))
+      for y in (A, B, C, D):
+        y *= np.ldexp(1.0, -e)
+      scale += e
+
+  with np.errstate(divide='ignore'):
+    return -20*np.log10(np.abs(C if current else A)) - 20*np.log10(2)*scale
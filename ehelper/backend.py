@@ -0,0 +1,201 @@
+from types import SimpleNamespace
+import cmath
+import math
+import operator
+from . import instrument
+
+BACKENDS = ['mpmath', 'float', 'numpy']
+
+NAMES = ['fadd', 'fsub', 'fmul', 'fdiv', 'power', 'sqrt', 'exp', 'log', 'log10', 'lambertw', 'sin', 'cos', 'tan', 'asin', 'acos', 'atan',
+         'sinh', 'cosh', 'asinh', 'acosh', 'coth', 'fabs', 'polyval', 'polyroots', 'mpf', 'mpc', 'pi']
+
+def add_arguments(parser):
+  parser.add_argument('--backend', choices=BACKENDS, default='mpmath', help='Numeric backend used for the calculations (default = mpmath)')
+  parser.add_argument('--dps', type=int, default=15, help='Decimal digits of precision for the mpmath backend (default = 15)')
+
+loaded = {}
+
+def load(name='mpmath', dps=None):
+  if name not in loaded:
+    with instrument.stage('backend'):
+      match name:
+        case 'mpmath':
+          loaded[name] = mpmath_backend()
+        case 'float':
+          loaded[name] = float_backend()
+        case 'numpy':
+          loaded[name] = numpy_backend()
+        case _:
+          raise ValueError(f"unknown backend: {name}")
+    instrument.count(loaded[name])
+
+  if name == 'mpmath' and dps is not None:
+    import mpmath
+    mpmath.mp.dps = dps
+
+  return loaded[name]
+
+# accepts a loaded backend, the name of one, or None for mpmath
+def get(m=None):
+  if m is None or isinstance(m, str):
+    return load(m or 'mpmath')
+  return m
+
+def mpmath_backend():
+  import mpmath
+
+  m = SimpleNamespace(name='mpmath', **{n: getattr(mpmath, n) for n in NAMES})
+  m.lambertw_exp = lambda a, b: mpmath.lambertw(mpmath.fmul(a, mpmath.exp(b)))
+  return m
+
+# the float backend follows mpmath in returning a complex result instead of
+# raising when a real function is taken outside of its domain
+def real_or_complex(f, cf):
+  def g(*x):
+    if isinstance(x[0], complex):
+      return cf(*x)
+    try:
+      return f(*x)
+    except ValueError:
+      return cf(*x)
+  return g
+
+# and like mpmath, the log of zero is -inf rather than an error
+def logarithm(f, cf):
+  g = real_or_complex(f, cf)
+  def h(*x):
+    if x[0] == 0:
+      return -math.inf
+    return g(*x)
+  return h
+
+def polyval(coeffs, x):
+  v = 0
+  for c in coeffs:
+    v = v*x + c
+  return v
+
+# same ordering and clean up of tiny real/imaginary parts as mpmath's polyroots
+def polyroots(coeffs, tol=1e-7):
+  from numpy import roots
+
+  r = []
+  for x in roots([complex(c) for c in coeffs]):
+    x = complex(x)
+    if abs(x.imag) < tol*max(1, abs(x)):
+      x = complex(x.real, 0)
+    elif abs(x.real) < tol*max(1, abs(x)):
+      x = complex(0, x.imag)
+    r.append(x)
+
+  r.sort(key=lambda x: (abs(x.imag), x.real))
+  return [x.real if x.imag == 0 else x for x in r]
+
+# W(a*e^b) for a > 0, found from L = log(a) + b with the Fritsch, Shafer and
+# Crowley iteration (see batch.lambertw_exp for the array version)
+def lambertw_exp(a, b):
+  L = math.log(a) + b
+  if L < -700:
+    return math.exp(L)
+
+  w = math.log1p(math.exp(L)) if L <= 1 else L - math.log(L)
+  for i in range(8):
+    z = L - w - math.log(w)
+    q = 2*(1 + w)*(1 + w + 2*z/3)
+    e = z/(1 + w)*(q - z)/(q - 2*z)
+    w = w*(1 + e)
+    if abs(e) < 4e-16:
+      break
+
+  return w
+
+# W(x) on the principal branch, which is negative from -1/e to 0, by Halley's
+# iteration from the series about the branch point (or from x near 0)
+def lambertw(x):
+  if x > 0:
+    return lambertw_exp(x, 0)
+  if x == 0:
+    return 0.0
+  if x < -1/math.e:
+    raise ValueError(f"W(x) isn't real below -1/e (not {x})")
+  p = math.sqrt(max(2*(math.e*x + 1), 0))
+  w = -1 + p - p*p/3 + 11/72*p**3 if x < -0.25 else x*(1 - x + 1.5*x*x)
+  for i in range(16):
+    if w == -1:
+      break
+    e = math.exp(w)
+    f = w*e - x
+    d = f/(e*(w + 1) - (w + 2)*f/(2*w + 2))
+    w -= d
+    if abs(d) <= 4e-16*abs(w):
+      break
+  return w
+
+def float_backend():
+  return SimpleNamespace(
+    name='float',
+    fadd=operator.add,
+    fsub=operator.sub,
+    fmul=operator.mul,
+    fdiv=operator.truediv,
+    power=real_or_complex(math.pow, lambda x, y: complex(x)**y),
+    sqrt=real_or_complex(math.sqrt, cmath.sqrt),
+    exp=real_or_complex(math.exp, cmath.exp),
+    log=logarithm(math.log, cmath.log),
+    log10=logarithm(math.log10, cmath.log10),
+    lambertw=lambertw,
+    lambertw_exp=lambertw_exp,
+    sin=real_or_complex(math.sin, cmath.sin),
+    cos=real_or_complex(math.cos, cmath.cos),
+    tan=real_or_complex(math.tan, cmath.tan),
+    asin=real_or_complex(math.asin, cmath.asin),
+    acos=real_or_complex(math.acos, cmath.acos),
+    atan=real_or_complex(math.atan, cmath.atan),
+    sinh=real_or_complex(math.sinh, cmath.sinh),
+    cosh=real_or_complex(math.cosh, cmath.cosh),
+    asinh=real_or_complex(math.asinh, cmath.asinh),
+    acosh=real_or_complex(math.acosh, cmath.acosh),
+    coth=lambda x: 1/(cmath.tanh(x) if isinstance(x, complex) else math.tanh(x)),
+    fabs=abs,
+    polyval=polyval,
+    polyroots=polyroots,
+    mpf=float,
+    mpc=complex,
+    pi=math.pi,
+  )
+
+def numpy_backend():
+  import numpy as np
+  from .batch import lambertw_exp as lambertw_exp_array
+
+  return SimpleNamespace(
+    name='numpy',
+    fadd=np.add,
+    fsub=np.subtract,
+    fmul=np.multiply,
+    fdiv=np.divide,
+    power=np.float_power,
+    sqrt=np.emath.sqrt,
+    exp=np.exp,
+    log=np.emath.log,
+    log10=np.emath.log10,
+    lambertw=lambda x: lambertw_exp_array(x, 0),
+    lambertw_exp=lambertw_exp_array,
+    sin=np.sin,
+    cos=np.cos,
+    tan=np.tan,
+    asin=np.emath.arcsin,
+    acos=np.emath.arccos,
+    atan=np.arctan,
+    sinh=np.sinh,
+    cosh=np.cosh,
+    asinh=np.arcsinh,
+    acosh=np.arccosh,
+    coth=lambda x: 1/np.tanh(x),
+    fabs=np.abs,
+    polyval=np.polyval,
+    polyroots=polyroots,
+    mpf=np.float64,
+    mpc=np.complex128,
+    pi=np.pi,
+  )
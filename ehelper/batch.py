@@ -0,0 +1,68 @@
+from itertools import chain
+import numpy as np
+import sys
+
+# W(a*e^b) for a > 0, evaluated from L = log(a) + b so that the large exponents
+# seen in the diode equations (Vs/nVt easily exceeds 700) don't overflow float64
+def lambertw_exp(a, b):
+  L = np.asarray(np.log(a) + b, dtype=float)
+  x = np.exp(np.minimum(L, 1))
+  w = np.where(L <= 1, np.log1p(x), L - np.log(np.maximum(L, 1)))
+  w = np.where(L < -700, 1, w) # W(x) ~= x there, patched in below
+
+  # Fritsch, Shafer and Crowley iteration; converges to full precision in 2-3 steps
+  for i in range(8):
+    z = L - w - np.log(w)
+    q = 2*(1 + w)*(1 + w + 2*z/3)
+    e = z/(1 + w)*(q - z)/(q - 2*z)
+    w = w*(1 + e)
+    if np.all(np.abs(e) < 4e-16):
+      break
+
+  w = np.where(L < -700, x, w)
+  return w if w.ndim else w[()]
+
+def read_table(filename, names, defaults):
+  if filename.endswith(".npy"):
+    data = np.load(filename)
+    if data.dtype.names is None:
+      data = np.atleast_2d(data)
+      columns = {n: data[:,i] for i, n in enumerate(names[:data.shape[1]])}
+    else:
+      columns = {n: data[n] for n in data.dtype.names}
+  else:
+    with open("/dev/stdin") if filename == "-" else open(filename) as f:
+      first = f.readline()
+      fields = [h.strip() for h in first.split(",")]
+      try:
+        [float(h) for h in fields]
+        header_names = names[:len(fields)]
+        lines = chain([first], f)
+      except ValueError:
+        header_names = fields
+        lines = f
+      data = np.loadtxt(lines, delimiter=",", ndmin=2)
+    columns = {n: data[:,i] for i, n in enumerate(header_names)}
+
+  unknown = [n for n in columns if n not in names]
+  if unknown:
+    raise ValueError("unknown column(s): {}".format(", ".join(unknown)))
+
+  rows = len(next(iter(columns.values())))
+  table = {}
+  for n in names:
+    if n in columns:
+      table[n] = np.asarray(columns[n], dtype=float)
+    elif defaults.get(n) is not None:
+      table[n] = np.full(rows, defaults[n], dtype=float)
+    else:
+      raise ValueError("missing column: {}".format(n))
+
+  return table
+
+def write_table(filename, names, table):
+  data = np.column_stack([table[n] for n in names])
+  if filename and filename.endswith(".npy"):
+    np.save(filename, data)
+  else:
+    np.savetxt(filename if filename and filename != "-" else sys.stdout, data, fmt="%.15g", delimiter=",", header=",".join(names), comments="")
@@ -0,0 +1,124 @@
+from collections import namedtuple
+from . import backend
+
+SerialCommonCollector = namedtuple('SerialCommonCollector', ['Vr', 'Ir', 'Vb', 'Vbe', 'Ib', 'Vload', 'Iload', 'Av', 'Rin', 'Rout', 'Rpi', 'gpi', 'Re', 'gm', 'Ic', 'Ie'])
+ParallelCommonCollector = namedtuple('ParallelCommonCollector', ['Vr1', 'Ir1', 'Vr2', 'Ir2', 'Vb', 'Vbe', 'Ib', 'Vload', 'Iload', 'Av', 'Rin', 'Rout', 'Rpi', 'gpi', 'Re', 'gm', 'Ic', 'Ie'])
+ShuntFeedbackCommonEmitter = namedtuple('ShuntFeedbackCommonEmitter', ['Vload', 'Iload', 'Vrf', 'Irf', 'Vrs', 'Irs', 'Vbe', 'Ib', 'Rpi', 'gpi', 'gm', 'Av', 'Rmo', 'Rleq', 'Rmi', 'Rbase', 'gain', 'Ic', 'Ie'])
+
+def analyse_serial_cc(Vs, Rs, Rload, Beta=300, Is=1e-12, N=1, Vt=0.026, m=None):
+  m = backend.get(m)
+  nVt = N*Vt
+
+  Beta1 = m.fadd(Beta,1) # Beta plus 1
+  y = m.fmul(Rload,Beta1)
+  w = m.lambertw_exp(m.fdiv(m.fmul(Is,m.fadd(Rs,y)),m.fmul(nVt,Beta)),m.fdiv(Vs,nVt))
+  Ib = m.fdiv(m.fmul(w,nVt),m.fadd(Rs,y))
+  Ic = m.fmul(Ib,Beta)
+  Iload = Ie = m.fadd(Ib,Ic)
+  Vbe = m.fmul(m.log(m.fdiv(m.fmul(Ib,Beta),Is)),nVt)
+  Vload = m.fmul(Iload,Rload)
+  Vb = m.fadd(Vbe,Vload)
+  Vr = m.fsub(Vs, m.fadd(Vbe,Vload))
+  Ir = m.fdiv(Vr, Rs)
+  Re = m.fdiv(Vt,Ie)
+  gm = m.fdiv(Ic,Vt)
+  Rpi = m.fdiv(Beta,gm) # or Re*(Beta+1) or Vt/Ib
+  Rin = m.fadd(Rpi,m.fmul(Beta,Rload))
+  Av = m.fdiv(m.fmul(Beta,Rload),Rin)
+  Rout = m.fdiv(m.fmul(Rload,Re),m.fadd(Rload,Re))
+  return SerialCommonCollector(Vr, Ir, Vb, Vbe, Ib, Vload, Iload, Av, Rin, Rout, Rpi, m.fdiv(1,Rpi), Re, gm, Ic, Ie)
+
+def analyse_parallel_cc(Vs, R1, R2, Rload, Beta=300, Is=1e-12, N=1, Vt=0.026, m=None):
+  m = backend.get(m)
+  nVt = N*Vt
+
+  rrp1 = m.fadd(m.fdiv(R1,R2),1) # R ratio plus 1
+  vt_rrp1 = m.fmul(Vt,rrp1) # vt * rrp1
+  Beta1 = m.fadd(Beta,1) # Beta plus 1
+  y = m.fadd(R1,m.fmul(Beta1,m.fmul(Rload,rrp1)))
+  w = m.lambertw_exp(m.fdiv(m.fmul(Is,y),m.fmul(Beta,m.fmul(Vt,rrp1))),m.fdiv(Vs,vt_rrp1))
+  Ib = m.fdiv(m.fmul(w,vt_rrp1),y)
+  Ic = m.fmul(Ib,Beta)
+  Iload = Ie = m.fadd(Ib,Ic)
+  Vbe = m.fmul(m.log(m.fdiv(m.fmul(Ib,Beta),Is)),nVt)
+  Vload = m.fmul(Iload,Rload)
+  Vr2 = Vb = m.fadd(Vbe,Vload)
+  Ir2 = m.fdiv(Vr2,R2)
+  Vr1 = m.fsub(Vs,Vr2)
+  Ir1 = m.fdiv(Vr1,R1)
+  Re = m.fdiv(Vt,Ie)
+  gm = m.fdiv(Ic,Vt)
+  Rpi = m.fdiv(Beta,gm) # or Re*(Beta+1) or Vt/Ib
+  Rin = m.fadd(Rpi,m.fmul(Beta,Rload))
+  Av = m.fdiv(m.fmul(Beta,Rload),Rin)
+  Rout = m.fdiv(m.fmul(Rload,Re),m.fadd(Rload,Re))
+  return ParallelCommonCollector(Vr1, Ir1, Vr2, Ir2, Vb, Vbe, Ib, Vload, Iload, Av, Rin, Rout, Rpi, m.fdiv(1,Rpi), Re, gm, Ic, Ie)
+
+# Rs of None means there is no source resistor (Vrs and gain are then not meaningful)
+def analyse_shunt_ce(Vs, Rload, Rf, Rs=None, Beta=300, Is=1e-12, N=1, Vt=0.026, m=None):
+  m = backend.get(m)
+  nVt = N*Vt
+
+  Beta1 = m.fadd(Beta,1) # Beta plus 1
+  if Rs is None:
+    RsMod = 1
+  else:
+    RsMod = m.fadd(m.fdiv(m.fadd(Rload,Rf),Rs),1) # will be just 1 if Rs is open
+
+  Radd = m.fadd(m.fmul(Rload,Beta1),Rf)
+  w = m.lambertw_exp(m.fdiv(m.fmul(Is,Radd),m.fmul(m.fmul(nVt,Beta),RsMod)),m.fdiv(Vs,m.fmul(nVt,RsMod)))
+  Ib = m.fdiv(m.fmul(m.fmul(w,nVt),RsMod),Radd)
+  Ic = m.fmul(Ib,Beta)
+  Ie = m.fadd(Ib,Ic)
+  Vbe = Vrs = m.fmul(m.log(m.fdiv(Ic,Is)),nVt)
+  if Rs is None:
+    Irs = 0
+  else:
+    Irs = m.fdiv(Vrs,Rs)
+  Irf = m.fadd(Irs,Ib)
+  Iload = m.fadd(Irf,Ic)
+  Vload = m.fmul(Iload,Rload)
+  Vrf = m.fmul(Irf,Rf)
+  gm = m.fdiv(Ic,Vt)
+  Rpi = m.fdiv(Beta,gm) # or Vt/Ib
+  Av = m.fdiv(m.fmul(Rload,m.fsub(1,m.fmul(gm,Rf))),m.fadd(Rload,Rf))
+  Rmo = m.fdiv(m.fmul(Av,Rf),m.fsub(Av,1))
+  Rleq = m.fdiv(m.fmul(Rload,Rmo),m.fadd(Rload,Rmo))
+  Rmi = m.fdiv(Rf,m.fsub(1,Av))
+  Rbase = m.fdiv(m.fmul(Rmi,Rpi),m.fadd(Rmi,Rpi))
+  if Rs is None:
+    gain = None
+  else:
+    gain = m.fdiv(m.fmul(Rbase,Av),m.fadd(Rs,Rbase))
+  return ShuntFeedbackCommonEmitter(Vload, Iload, Vrf, Irf, Vrs, Irs, Vbe, Ib, Rpi, m.fdiv(1,Rpi), gm, Av, Rmo, Rleq, Rmi, Rbase, gain, Ic, Ie)
+
+def plot_serial_cc(Vs, Rs, Rload, Beta=300, Is=1e-12, N=1, Vt=0.026):
+  from mpmath import log, fmul, fdiv, fsub, fadd, plot
+
+  nVt = N*Vt
+  Beta1 = fadd(Beta,1)
+  plot([lambda x: fsub(Vs,fmul(x,Rs)), lambda x: fadd(fmul(log(fdiv(fmul(x,Beta),Is)),nVt),fmul(fmul(x,Beta1),Rload))], [0, fdiv(Vs,Rs)], [0, Vs])
+
+def plot_parallel_cc(Vs, R1, R2, Rload, Beta=300, Is=1e-12, N=1, Vt=0.026):
+  from mpmath import log, fmul, fdiv, fsub, fadd, plot
+
+  nVt = N*Vt
+  Beta1 = fadd(Beta,1)
+  vb = lambda x: fadd(fmul(log(fdiv(fmul(x,Beta),Is)),nVt),fmul(fmul(x,Beta1),Rload)) # give x as Ib, what is Vb?
+  plot([lambda x: fsub(Vs,fmul(fadd(x,fdiv(vb(x),R2)),R1)), lambda x: vb(x)], [0, fdiv(Vs,fadd(R1,R2))], [0, Vs])
+
+def plot_shunt_ce(Vs, Rload, Rf, Rs=None, Beta=300, Is=1e-12, N=1, Vt=0.026):
+  from mpmath import log, fmul, fdiv, fsub, fadd, plot
+
+  nVt = N*Vt
+  Beta1 = fadd(Beta,1)
+
+  def Vbe(x):
+    return fmul(log(fdiv(fmul(x,Beta),Is)),nVt)
+
+  if Rs is None:
+    Irs = lambda x: 0
+  else:
+    Irs = lambda x: fdiv(Vbe(x),Rs)
+
+  plot([lambda x: fsub(Vs,fmul(fadd(fmul(x,Beta1),Irs(x)),Rload)), lambda x: fadd(fmul(fadd(Irs(x),x),Rf),Vbe(x))], [0, fdiv(Vs,fmul(Beta1,Rload))], [0, Vs])
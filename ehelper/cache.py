@@ -0,0 +1,160 @@
+from functools import lru_cache
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+from . import backend
+
+# An opt-in on-disk cache of calculation results. An entry is keyed by the
+# tool, its arguments once bound to the function's signature (so positional,
+# keyword and default arguments agree, and 50 is 50.0), the backend and its
+# precision, and a hash of the library's source and data (the prototype
+# table), so any change to the code or a rebuilt table starts afresh. Each
+# entry is one pickle file, written to a temporary file and renamed into
+# place, so readers only ever see whole entries and concurrent writers of the
+# same entry both leave a correct one. A hit touches its file, and once a
+# write takes the directory over its size the least recently used entries are
+# removed. The directory is only scanned for this when a running total (its
+# size at the last scan plus what has been written since) goes over the size,
+# or every SCAN writes to catch up with other processes' entries.
+
+DIRECTORY = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'ehelper')
+SIZE = 100 # MB
+SCAN = 100 # writes between scans of the directory
+LOW = 0.9 # of the size, that eviction takes the cache down to
+
+@lru_cache
+def version():
+  h = hashlib.sha256()
+  here = os.path.dirname(os.path.abspath(__file__))
+  for name in sorted(os.listdir(here)):
+    if name.endswith(('.py', '.bin')):
+      with open(os.path.join(here, name), 'rb') as f:
+        h.update(name.encode() + b'\0' + f.read())
+  return h.hexdigest()
+
+def normalise(v):
+  if isinstance(v, bool) or v is None or isinstance(v, str):
+    return v
+  if isinstance(v, (list, tuple)):
+    return [normalise(x) for x in v]
+  if isinstance(v, dict):
+    return {str(k): normalise(x) for k, x in sorted(v.items())}
+  if isinstance(v, complex) or type(v).__name__ == 'mpc':
+    return ['complex', repr(float(v.real)), repr(float(v.imag))]
+  if type(v).__name__ == 'mpf':
+    return str(v)
+  return repr(float(v))
+
+def precision(m):
+  m = backend.get(m)
+  if m.name == 'mpmath':
+    import mpmath
+    return [m.name, mpmath.mp.dps]
+  return [m.name]
+
+def key(tool, function, args, kwargs):
+  bound = inspect.signature(function).bind(*args, **kwargs)
+  bound.apply_defaults()
+  arguments = {k: precision(v) if k == 'm' else normalise(v) for k, v in bound.arguments.items()}
+  text = repr([tool, arguments, version()])
+  return hashlib.sha256(text.encode()).hexdigest()
+
+class Cache:
+  def __init__(self, directory=None, size=SIZE):
+    self.directory = directory or DIRECTORY
+    self.size = size*1024*1024
+    # bytes in the directory as of the last scan and this process's writes
+    # since (None before the first scan)
+    self.used = None
+    self.writes = 0
+    os.makedirs(self.directory, exist_ok=True)
+
+  def path(self, k):
+    return os.path.join(self.directory, k + '.pickle')
+
+  def get(self, k):
+    try:
+      with open(self.path(k), 'rb') as f:
+        value = pickle.load(f)
+      os.utime(self.path(k))
+      return True, value
+    except (OSError, EOFError, pickle.UnpicklingError):
+      return False, None
+
+  def put(self, k, value):
+    fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'wb') as f:
+        pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+        size = f.tell()
+      os.replace(temporary, self.path(k))
+    except BaseException:
+      os.unlink(temporary)
+      raise
+    self.writes += 1
+    if self.used is None or self.used + size > self.size or self.writes % SCAN == 0:
+      self.evict()
+    else:
+      self.used += size
+
+  # once the cache is over its size, removes the least recently used entries
+  # until it is down to LOW of it, so the next writes don't each scan again;
+  # another process may be removing the same ones
+  def evict(self):
+    entries = []
+    for e in os.scandir(self.directory):
+      if e.name.endswith('.pickle'):
+        try:
+          s = e.stat()
+          entries.append((s.st_mtime, s.st_size, e.path))
+        except FileNotFoundError:
+          pass
+    total = sum(size for _, size, _ in entries)
+    if total <= self.size:
+      self.used = total
+      return
+    for _, size, path in sorted(entries):
+      if total <= LOW*self.size:
+        break
+      try:
+        os.unlink(path)
+      except FileNotFoundError:
+        pass
+      total -= size
+    self.used = total
+
+  def clear(self):
+    for e in os.scandir(self.directory):
+      if e.name.endswith('.pickle'):
+        try:
+          os.unlink(e.path)
+        except FileNotFoundError:
+          pass
+    self.used = 0
+
+# function(*args, **kwargs), from the cache when there is one (store may be None)
+def call(store, tool, function, *args, **kwargs):
+  if store is None:
+    return function(*args, **kwargs)
+  k = key(tool, function, args, kwargs)
+  hit, value = store.get(k)
+  if not hit:
+    value = function(*args, **kwargs)
+    store.put(k, value)
+  return value
+
+# the cache asked for on the command line, or None; -g plots bypass it
+def open_cache(args):
+  if not args.cache or getattr(args, 'graph', False):
+    return None
+  return Cache(args.cache, args.cache_size)
+
+def add_arguments(parser):
+  parser.add_argument('--cache', nargs='?', const=DIRECTORY, metavar='DIR',
+    help=f'Reuse results stored by earlier runs with the same arguments, and '
+    f'store new ones (default DIR = {DIRECTORY}; not used with -g)')
+  parser.add_argument('--cache-size', type=float, default=SIZE, metavar='MB',
+    help=f'Largest size of the cache before the least recently used results '
+    f'are removed (default = {SIZE})')
@@ -0,0 +1,68 @@
+from collections import namedtuple
+from . import backend
+
+SerialDiode = namedtuple('SerialDiode', ['VR', 'IR', 'Vd', 'Id'])
+ParallelDiode = namedtuple('ParallelDiode', ['VR1', 'IR1', 'VR2', 'IR2', 'Vd', 'Id'])
+SerialDiodeDesign = namedtuple('SerialDiodeDesign', ['VR', 'IR', 'R', 'Vd', 'Id', 'Rd'])
+ParallelDiodeDesign = namedtuple('ParallelDiodeDesign', ['VR1', 'IR1', 'R1', 'VR2', 'IR2', 'R2', 'Vd', 'Id', 'Rd'])
+
+def analyse_serial(Vs, R, Is=1e-12, N=1, Vt=0.026, m=None):
+  m = backend.get(m)
+  nVt = N*Vt
+
+  w = m.lambertw_exp(m.fdiv(m.fmul(Is,R),nVt),m.fdiv(m.fadd(Vs,m.fmul(Is,R)),nVt))
+  Id = m.fsub(m.fdiv(m.fmul(w,nVt),R),Is)
+  Vd = m.fmul(m.log(m.fadd(m.fdiv(Id,Is),m.mpf(1))),nVt)
+  VR = m.fsub(Vs, Vd)
+  IR = m.fdiv(VR, R)
+  return SerialDiode(VR, IR, Vd, Id)
+
+def analyse_parallel(Vs, R1, R2, Is=1e-12, N=1, Vt=0.026, m=None):
+  m = backend.get(m)
+  nVt = N*Vt
+
+  w = m.lambertw_exp(m.fdiv(m.fmul(m.fmul(R1,R2),Is),m.fmul(nVt,m.fadd(R1,R2))),m.fdiv(m.fmul(R2,m.fadd(Vs,m.fmul(Is,R1))),(m.fmul(nVt,m.fadd(R1,R2)))))
+  Id = m.fsub(m.fdiv(m.fmul(m.fmul(nVt,w),m.fadd(R1,R2)),m.fmul(R1,R2)),Is)
+  Vd = m.fmul(m.log(m.fadd(m.fdiv(Id,Is),m.mpf(1))),nVt)
+  VR2 = Vd
+  IR2 = m.fdiv(VR2,R2)
+  VR1 = m.fsub(Vs,Vd)
+  IR1 = m.fdiv(VR1,R1)
+  return ParallelDiode(VR1, IR1, VR2, IR2, Vd, Id)
+
+def design_serial(Vs, Id, Is=1e-12, N=1, Vt=0.026, m=None):
+  m = backend.get(m)
+  nVt = N*Vt
+
+  Vd = m.fmul(m.log(m.fadd(m.fdiv(Id,Is),m.mpf(1))),nVt)
+  VR = m.fsub(Vs, Vd)
+  IR = Id
+  R = m.fdiv(VR,IR)
+  return SerialDiodeDesign(VR, IR, R, Vd, Id, m.fdiv(Vd,Id))
+
+def design_parallel(Vs, Id, IR2, Is=1e-12, N=1, Vt=0.026, m=None):
+  m = backend.get(m)
+  nVt = N*Vt
+
+  Vd = m.fmul(m.log(m.fadd(m.fdiv(Id,Is),m.mpf(1))),nVt)
+  Rd = m.fdiv(Vd,Id)
+  VR2 = Vd
+  R2 = m.fdiv(VR2,IR2)
+  VR1 = m.fsub(Vs,Vd)
+  IR1 = m.fadd(Id,IR2)
+  R1 = m.fdiv(VR1,IR1)
+  return ParallelDiodeDesign(VR1, IR1, R1, VR2, IR2, R2, Vd, Id, Rd)
+
+def plot_serial(Vs, R, Is=1e-12, N=1, Vt=0.026):
+  from mpmath import log, fmul, fdiv, fsub, fadd, plot
+
+  nVt = N*Vt
+  plot([lambda x: fsub(Vs,fmul(x,R)), lambda x: fmul(nVt,log(fadd(fdiv(x,Is),1)))], [0, fdiv(Vs,R)], [0, Vs])
+
+def plot_parallel(Vs, R1, R2, Vd, Id, Is=1e-12, N=1, Vt=0.026):
+  from mpmath import mpf, log, fmul, fdiv, fsub, fadd, plot
+
+  nVt = N*Vt
+  Rd = fdiv(Vd,Id)
+  Rd2 = fdiv(fmul(Rd,R2),fadd(Rd,R2))
+  plot([lambda x: fsub(Vs,fmul(fadd(x,fdiv(fmul(nVt,log(fadd(fdiv(x,Is),mpf(1)))),R2)),R1)), lambda x: fmul(nVt,log(fadd(fdiv(x,Is),mpf(1))))], [0, fdiv(Vs,fadd(R1,Rd2))], [0, Vs])
@@ -0,0 +1,612 @@
+from collections import namedtuple
+from . import backend, instrument, netlist, prototype
+
+# Rl is the load resistor and Rtot the total resistance seen by the transfer function;
+# accuracy bounds the relative error of the poly coefficients when the fast engine is used
+Filter = namedtuple('Filter', ['components', 'fc', 'wc', 'w0', 'Rl', 'Rtot', 'poles', 'poly', 'normalised_poly', 'component_poly', 'accuracy'])
+
+ENGINES = ['auto', 'direct', 'fast']
+
+# one element of a design (decks are written from a netlist.Netlist)
+class Component:
+  __slots__ = ['letter', 'number', 'value']
+
+  def __init__(self, letter, number, value):
+    self.letter = letter
+    self.number = number
+    self.value = value
+
+  def print(self):
+    print("{}{}: {}".format(self.letter,self.number,self.value))
+
+# the ladder of a Butterworth design as dbf.py's deck describes it, with the
+# source resistor when Rs
+def butterworth_netlist(c, R, Rs, current):
+  if current:
+    source = "I"
+  else:
+    source = "V"
+
+  if Rs and not current:
+    plot = "vdb(out)+6"
+  else:
+    plot = "vdb(out)"
+  n = netlist.Netlist("Passive Butterworth", source, plot)
+
+  if Rs:
+    if len(c) == 1 and c[0].letter == "C":
+      nextinnode = "out"
+    else:
+      nextinnode = 1
+      nextnode = 2
+    n.add("R", "s", R, "in", nextinnode)
+  else:
+    nextinnode = "in"
+    nextnode = 1
+
+  i = 1
+  for v in c:
+    innode = nextinnode
+    if v.letter == "C":
+      outnode = 0
+    else:
+      if i < len(c) - 1:
+        outnode = nextnode
+        nextinnode = nextnode
+        nextnode = nextnode + 1
+      else:
+        outnode = nextinnode = "out"
+
+    n.add(v.letter, v.number, v.value, innode, outnode)
+    i = i + 1
+
+  n.add("R", len(c)+1, R, nextinnode, 0)
+  return n
+
+def write_butterworth_ngspice(f, c, R, Rs, current):
+  butterworth_netlist(c, R, Rs, current).write(f)
+
+# for ladders that start with the source resistor and end with the load resistor (Chebyshev and Cauer)
+def ladder_netlist(c, current, title):
+  if current:
+    source = "I"
+  else:
+    source = "V"
+  n = netlist.Netlist(title, source, "mag(out)/.5")
+
+  if len(c) == 3 and c[0].letter == "C":
+    nextinnode = "out"
+  else:
+    nextinnode = "in"
+    nextnode = 1
+
+  i = 1
+  for v in c:
+    innode = nextinnode
+    if v.letter == "C" or v.letter == "R" and i > 1:
+      outnode = 0
+    else:
+      if i < len(c) - 2:
+        outnode = nextnode
+        nextinnode = nextnode
+        nextnode = nextnode + 1
+      else:
+        outnode = nextinnode = "out"
+
+    n.add(v.letter, v.number, v.value, innode, outnode)
+    i = i + 1
+  return n
+
+def write_ladder_ngspice(f, c, current, title):
+  ladder_netlist(c, current, title).write(f)
+
+def poly_string(poly, real_only = True):
+  poly_suffix = ["", "s", "s²", "s³"]
+
+  poly_s = ""
+  sep = ""
+  for i in range(len(poly)-1,-1,-1):
+    poly_s = poly_s + sep
+    sep = " + "
+    v = poly[len(poly)-1-i]
+    if real_only:
+      v = v.real
+    if v != 1.0 or i == 0:
+      poly_s = poly_s + f"{v}".replace("j","i")
+
+    poly_s = poly_s + (poly_suffix[i] if i < len(poly_suffix) else f"s^{i}")
+
+  return poly_s
+
+def expand_poles(m, sp):
+  poly = [1]
+  for p in sp:
+    add = []
+    for c in poly:
+      add.append(m.fmul(c,p))
+    poly.insert(0,0)
+    for i in range(len(add)):
+      poly[i] = m.fadd(poly[i], add[i])
+
+  poly.reverse()
+  return poly
+
+# 'direct' multiplies out the poles one at a time with backend m; 'fast' uses
+# ehelper.polynomial (NumPy, float64) and 'auto' picks it for orders over 100
+def fast_engine(engine, N):
+  if engine not in ENGINES:
+    raise ValueError(f"engine must be one of {', '.join(ENGINES)} (not {engine})")
+  return engine == 'fast' or engine == 'auto' and N > 100
+
+# poles and normalised coefficients from the fast engine, where q are the
+# poles normalised to w0 (which is wc for butterworth)
+def fast_poly(m, q, w0, wc):
+  from . import polynomial
+
+  p = polynomial.expand(q)
+  sp = [m.fmul(w0,m.mpc(x.real,x.imag)) for x in q]
+  normalised_poly = []
+  poly = []
+  for i, c in enumerate(polynomial.values(p, m)):
+    poly.append(m.fmul(c,m.power(w0,i)))
+    normalised_poly.append(m.fmul(c,m.power(m.fdiv(w0,wc),i)))
+  return sp, poly, normalised_poly, p.err
+
+# the g values (element values for R0 = 1 and wc = 1) of the prototypes,
+# which ehelper.prototype has precomputed for the common orders and ripples
+def butterworth_g(m, N, source=False):
+  a = []
+  c = []
+  g = []
+
+  for j in range(1,N+1):
+    v = m.sin(m.fdiv(m.fmul(m.fsub(m.fmul(2,j),1),m.pi),m.fmul(2,N)))
+    if source:
+      g.append(v)
+    else:
+      a.append(v)
+      c.append(m.power(m.cos(m.fdiv(m.fmul(j,m.pi),m.fmul(2,N))),2))
+
+  if not source:
+    g.append(a[0])
+
+    for j in range(2,N+1):
+      g.append(m.fdiv(m.fmul(a[j-1],a[j-2]),m.fmul(c[j-2],g[j-2])))
+  return g
+
+def chebyshev_g(m, N, e):
+  ed = m.fmul(m.log10(m.fadd(m.power(e,2),1)),10) # ripple in decibles
+  beta = m.log(m.coth(m.fdiv(ed,m.fdiv(40,m.log(10)))))
+  y = m.sinh(m.fdiv(beta,m.fmul(2,N)))
+
+  a = []
+  b = []
+
+  for k in range(1,N+1):
+    ak = m.sin(m.fdiv(m.fmul(m.fsub(m.fmul(2,k),1),m.pi),m.fmul(2,N)))
+    bk = m.fadd(m.power(y,2),m.power(m.sin(m.fdiv(m.fmul(k,m.pi),N)),2))
+    a.append(ak)
+    b.append(bk)
+
+  g = [1, m.fdiv(m.fmul(2,a[0]),y)]
+
+  for k in range(1,N):
+    gk = m.fdiv(m.fmul(4,m.fmul(a[k-1],a[k])),m.fmul(b[k-1],g[k]))
+    g.append(gk)
+
+  if N % 2 == 1:
+    g.append(1)
+  else:
+    g.append(m.power(m.coth(m.fdiv(beta,4)),2))
+  return g
+
+def butterworth(fc, N, R, source=False, radians=False, current=False, m=None, engine='auto'):
+  m = backend.get(m)
+
+  if radians:
+    wc = fc
+    fc = m.fdiv(wc,m.fmul(2,m.pi))
+  else:
+    wc = m.fmul(fc,m.fmul(2,m.pi))
+
+  g = prototype.butterworth(N, source, m) or butterworth_g(m, N, source)
+  instrument.lap('g values')
+
+  c = []
+
+  if source:
+    Rtot = m.fmul(R,2)
+  else:
+    Rtot = R
+
+  i = 1
+  for v in reversed(g):
+    v = m.fdiv(v,wc)
+    if i % 2 == 1 and not (current or source) or i % 2 == 0 and (current or source):
+      comp = "L"
+      v = m.fmul(v,Rtot)
+    else:
+      if source:
+        Rt = m.fdiv(R,2)
+      else:
+        Rt = R
+
+      comp = "C"
+      v = m.fdiv(v,Rt)
+
+    c.append(Component(comp,i,v))
+    i = i + 1
+  instrument.lap('components')
+
+  if fast_engine(engine, N):
+    from .polynomial import butterworth_poles
+    sp, poly, normalised_poly, accuracy = fast_poly(m, butterworth_poles(N), wc, wc)
+  else:
+    sp = []
+    for k in range(1,N+1):
+      sp.append(m.fmul(-wc,m.exp(m.fdiv(m.fmul(m.mpc(0,m.fsub(m.fadd(m.fmul(2,k),N),1)),m.pi),m.fmul(2,N)))))
+
+    poly = expand_poles(m, sp)
+    accuracy = None
+
+    normalised_poly = []
+    for i in range(0,len(poly)):
+      normalised_poly.append(m.fdiv(poly[i],m.power(wc,i)))
+  instrument.lap('poles')
+
+  component_poly = []
+  for i in range(0,len(normalised_poly)):
+    k = len(normalised_poly) - 1 - i
+    component_poly.append(m.fdiv(m.fmul(normalised_poly[i],Rtot),m.power(wc,k)))
+
+  instrument.lap('polynomial')
+
+  return Filter(c, fc, wc, wc, R, Rtot, sp, poly, normalised_poly, component_poly, accuracy)
+
+def chebyshev(fc, N, R, e=1, radians=False, current=False, m=None, engine='auto'):
+  m = backend.get(m)
+
+  if radians:
+    wc = fc
+    fc = m.fdiv(wc,m.fmul(2,m.pi))
+  else:
+    wc = m.fmul(fc,m.fmul(2,m.pi))
+
+  w0 = m.fdiv(wc,m.cosh(m.fdiv(m.acosh(m.fdiv(1,e)),N)))
+
+  g = prototype.chebyshev(N, e, m) or chebyshev_g(m, N, e)
+  instrument.lap('g values')
+
+  c = []
+
+  i = 0
+  for v in g:
+    v = m.fdiv(v,w0)
+    if i == 0:
+      comp = "R"
+      v = R
+    elif i == len(g)-1:
+      Rl = g[len(g)-1]
+      if c[len(c)-1].letter == "L":
+        Rl = m.fdiv(1,Rl)
+
+      Rl = m.fmul(Rl,R)
+
+      comp = "R"
+      v = Rl
+    elif i % 2 == 0 and not current or i % 2 == 1 and current:
+      comp = "L"
+      v = m.fmul(v,R)
+    else:
+      comp = "C"
+      v = m.fdiv(v,R)
+
+    c.append(Component(comp,i,v))
+    i = i + 1
+  instrument.lap('components')
+
+  if fast_engine(engine, N):
+    from .polynomial import chebyshev_poles
+    sp, poly, normalised_poly, accuracy = fast_poly(m, chebyshev_poles(N, e), w0, wc)
+  else:
+    sp = []
+    for k in range(1,N+1):
+      thetam = m.fmul(m.fdiv(m.pi,2),m.fdiv(m.fsub(m.fmul(2,k),1),N))
+      spm = m.mpc(m.fmul(m.sinh(m.fmul(m.fdiv(1,N),m.asinh(m.fdiv(1,e)))),m.sin(thetam)),m.fmul(m.cosh(m.fmul(m.fdiv(1,N),m.asinh(m.fdiv(1,e)))),m.cos(thetam)))
+      sp.append(m.fmul(w0,spm))
+
+    poly = expand_poles(m, sp)
+    accuracy = None
+
+    normalised_poly = []
+    for i in range(0,len(poly)):
+      normalised_poly.append(m.fdiv(poly[i],m.power(wc,i)))
+  instrument.lap('poles')
+
+  Rtot = m.fadd(R,Rl)
+  component_poly = []
+  for i in range(0,len(normalised_poly)):
+    k = len(normalised_poly) - 1 - i
+    component_poly.append(m.fdiv(m.fmul(Rtot,normalised_poly[i]),m.fmul(normalised_poly[len(normalised_poly)-1],m.power(wc,k))))
+
+  instrument.lap('polynomial')
+
+  return Filter(c, fc, wc, w0, Rl, Rtot, sp, poly, normalised_poly, component_poly, accuracy)
+
+# polynomials below are lists of coefficients, lowest order first
+def poly_mul(m, a, b):
+  c = [0]*(len(a)+len(b)-1)
+  for i, x in enumerate(a):
+    for j, y in enumerate(b):
+      c[i+j] = m.fadd(c[i+j],m.fmul(x,y))
+  return c
+
+def poly_add(m, a, b):
+  if len(a) < len(b):
+    a, b = b, a
+  return [m.fadd(x,b[i]) if i < len(b) else x for i, x in enumerate(a)]
+
+# a/(x - r), dropping the remainder
+def poly_deflate(m, a, r):
+  q = [0]*(len(a)-1)
+  carry = 0
+  for i in range(len(a)-1,0,-1):
+    carry = m.fadd(a[i],m.fmul(carry,r))
+    q[i-1] = carry
+  return q
+
+# the components of write_butterworth_ngspice, with its source and load resistors
+def butterworth_ladder(c, R, Rs):
+  return ([Component("R", "s", R)] if Rs else []) + list(c) + [Component("R", len(c)+1, R)]
+
+# The component_poly (highest order first) of a ladder as the ngspice writers
+# connect it: a C is a shunt, an L is in series, a leading R is the source's
+# and the last R is the load. It is the continuant of the element values,
+# found from the load back with unit current through it: a shunt adds s*C*v
+# to the current i and a series element s*L*i (or R*i) to the voltage v, so
+# N elements take N polynomial updates. A current source with nothing in
+# series has the load's voltage over its current instead, Rl*i.
+def ladder_poly(m, c, current=False):
+  v = [c[-1].value]
+  i = [1]
+  for x in reversed(c[:-1]):
+    match x.letter:
+      case "C":
+        i = poly_add(m, i, [0] + [m.fmul(x.value,y) for y in v])
+      case "L":
+        v = poly_add(m, v, [0] + [m.fmul(x.value,y) for y in i])
+      case "R":
+        v = poly_add(m, v, [m.fmul(x.value,y) for y in i])
+  if current and c[0].letter != "R":
+    v = [m.fmul(c[-1].value,y) for y in i]
+  return list(reversed(v))
+
+# how far the ladder c (by default the design's components) is from realising
+# the design's normalised_poly: the largest relative difference between their
+# coefficients, once the polynomials are scaled to agree at s = 0
+def ladder_error(design, c=None, current=False, m=None):
+  m = backend.get(m)
+  lp = ladder_poly(m, c or design.components, current)
+  N = len(design.normalised_poly) - 1
+  if len(lp) != N+1:
+    raise ValueError(f"the ladder is of order {len(lp)-1}, not {N}")
+  t = [m.fdiv(x,m.power(design.wc,N-i)) for i, x in enumerate(design.normalised_poly)]
+  k = m.fdiv(lp[-1],t[-1])
+  error = 0
+  for x, y in zip(lp, t):
+    y = m.fmul(k,y)
+    error = max(error, m.fabs(m.fdiv(m.fsub(x,y),y)) if y != 0 else m.fabs(x))
+  return error
+
+# roots of a polynomial (lowest order first); mpmath is given the steps and
+# the extra precision to find the double roots met in cauer_expansion
+def poly_roots(m, a):
+  if len(a) < 2:
+    return []
+  if m.name == 'mpmath':
+    import mpmath
+    return m.polyroots(list(reversed(a)), maxsteps=50+10*len(a), extraprec=mpmath.mp.prec+10*len(a))
+  return m.polyroots(list(reversed(a)))
+
+# The element values (with R0 = 1 and wc = 1) of the ladder whose Rl*A(s) is
+# a multiple of C, for any order. The load is chosen for the most gain the
+# ladder can give, which is when the reflection coefficient rho = -F/C just
+# reaches zero: F(s)F(-s) = C(s)C(-s) - k with k the minimum of |C(jw)|².
+# F is the spectral factor with its zeros in the left half plane, and the
+# elements are the Cauer (continued fraction) expansion of the input
+# admittance (C + F)/(C - F), each step a division costing O(N). The
+# element values grow more sensitive to rounding with the order, so mpmath
+# works with about two more digits for each.
+def cauer_expansion(m, C):
+  if len(C) < 2:
+    raise ValueError("at least two coefficients [C] must be specified")
+  if m.name == 'mpmath':
+    import mpmath
+    with mpmath.workprec(mpmath.mp.prec + 7*len(C)):
+      g = cauer_values(m, [mpmath.mpf(x) for x in C])
+    return [+x for x in g]
+  return cauer_values(m, C)
+
+def cauer_values(m, C):
+  a = list(reversed(C))
+  N = len(a) - 1
+
+  # |C(jw)|² = P(x)² + xQ(x)² where x = w²
+  P = [a[i] if i % 4 == 0 else m.fmul(-1,a[i]) for i in range(0,N+1,2)]
+  Q = [a[i] if i % 4 == 1 else m.fmul(-1,a[i]) for i in range(1,N+1,2)]
+  E = poly_add(m, poly_mul(m, P, P), [0] + poly_mul(m, Q, Q) if Q else [0])
+
+  # E is flat at w = 0 up to x^j (a maximally flat C has j = N), which shows
+  # as coefficients lost in the rounding of what cancels in them
+  b = [m.fabs(x) for x in a]
+  size = poly_add(m, poly_mul(m, b[::2], b[::2]), [0] + poly_mul(m, b[1::2], b[1::2]))
+  j = 1
+  while j < N and m.fabs(E[j]) <= m.fmul(1e-9,size[j]):
+    E[j] = 0
+    j += 1
+
+  # the minima of E for w >= 0 (each found where E' is zero, so accurately)
+  dE = [m.fmul(i,E[i]) for i in range(1,len(E))]
+  d2E = [m.fmul(i,dE[i]) for i in range(1,len(dE))]
+  minima = [(E[0], 0)]
+  for x in poly_roots(m, dE[j-1:]):
+    if m.fabs(x.imag) <= 1e-6*m.fabs(x) and x.real > 0 and m.polyval(list(reversed(d2E)), x.real) > 0:
+      minima.append((m.polyval(list(reversed(E)), x.real), x.real))
+  k = min(v for v, x in minima)
+  if k <= 0:
+    raise ValueError("C has a zero on the imaginary axis, so no ladder realises it")
+
+  # F(s)F(-s) = E(-s²) - k. E - k touches zero at every minimum that ties
+  # with k (an equiripple C has several): each gives F a factor s² + x (or s
+  # for each time it touches at w = 0) and is divided out, so the rest has
+  # simple roots, whose left half plane zeros complete F
+  E[0] = m.fsub(E[0],k)
+  F = [a[N]]
+  for v, x in minima:
+    if m.fsub(v,k) > m.fmul(1e-6,k):
+      continue
+    if x == 0:
+      E = E[j:]
+      F = [0]*j + F
+    else:
+      E = poly_deflate(m, poly_deflate(m, E, x), x)
+      F = poly_mul(m, F, [x, 0, 1])
+
+  for x in poly_roots(m, E):
+    s = m.sqrt(m.fmul(-1,m.mpc(x.real,x.imag)))
+    if s.real > 0:
+      s = m.fmul(-1,s)
+    F = poly_mul(m, F, [m.fmul(-1,s), 1])
+  F = [x.real for x in F]
+
+  # the ladder seen from the source, Y = (C + F)/(C - F), and from the load
+  # (normalised to Rl, which is Y(0)^-1), (C + F*)/(C - F*) with
+  # F*(s) = (-1)^N F(-s). An expansion loses accuracy as it goes, so each end
+  # gives half of the elements.
+  Fo = [x if (N + i) % 2 == 0 else m.fmul(-1,x) for i, x in enumerate(F)]
+  Rl = m.fdiv(m.fsub(a[0],F[0]),m.fadd(a[0],F[0]))
+  first = continued_fraction(m, a, F, (N+1)//2)
+  last = continued_fraction(m, a, Fo, N//2)
+  last = [m.fdiv(v,Rl) if (N - i) % 2 == 1 else m.fmul(v,Rl) for i, v in enumerate(last)]
+  return [1] + first + list(reversed(last)) + [Rl]
+
+# the first steps of the Cauer expansion of (C + F)/(C - F) (lowest order
+# first): a shunt C, then a series L, ... each the ratio of the leading terms
+def continued_fraction(m, a, F, steps):
+  N = len(a) - 1
+  num = poly_add(m, a, F)
+  den = poly_add(m, a, [m.fmul(-1,x) for x in F])[:N]
+  g = []
+  for i in range(N, N-steps, -1):
+    v = m.fdiv(num[i],den[i-1])
+    if v <= 0:
+      raise ValueError("C is not the polynomial of a passive ladder (its roots must be in the left half plane)")
+    g.append(v)
+    # the remainder drops two degrees
+    num, den = den, poly_add(m, num, [0] + [m.fmul(-v,x) for x in den])[:i-1]
+  return g
+
+# C holds the coefficients of the normalised transfer function, highest order first;
+# expansion synthesises any order (see cauer_expansion), and is always used above five coefficients
+def cauer(C, wc=1, rs=1, current=False, m=None, expansion=False):
+  m = backend.get(m)
+
+  c = []
+  R = rs
+  g = [R]
+  R0 = Rs = 1.0
+
+  i = len(C)
+  s = [0]*i
+  for v in C:
+    i = i -1
+    s[i] = v
+
+  if expansion or len(C) > 5:
+    g = g + cauer_expansion(m, C)[1:]
+    Rtot = m.fadd(R0,g[-1])
+  else:
+    match len(C):
+      case 0 | 1:
+        raise ValueError("at least two coefficients [C] must be specified")
+      case 2:
+        R2 = R0
+        Rtot = m.fadd(R0,R2)
+        mod = m.fdiv(Rtot,s[0])
+        C1 = m.fmul(s[1],mod)
+        g.append(C1)
+        g.append(R2)
+      case 3:
+        C1 = m.fdiv(m.fmul(2,s[2]),s[1])
+        Rtot = m.fdiv(m.fmul(-s[0],m.fmul(m.power(C1,2),R0)),m.fsub(s[2],m.fmul(s[0],m.power(C1,2))))
+        R3 = Rl = m.fsub(Rtot,R0)
+        L2 = m.fmul(C1,R3)
+        g.append(C1)
+        g.append(L2)
+        g.append(R3)
+      case 4:
+        a = m.fmul(s[0],m.power(s[3],2))
+        b = m.fmul(m.fmul(s[1],m.fmul(s[2],s[3])),-1)
+        coeffs = [a,b,m.fmul(3,a),m.fadd(m.power(s[2],3),m.fmul(2,b)),m.fmul(3,a),b,a]
+        roots = m.polyroots(coeffs)
+        # TODO: take the largest real root and give the user the option to choose alternatives
+        Rl = R4 = roots[1]
+        Rtot = m.fadd(R0,R4)
+        mod = m.fdiv(Rtot,s[0])
+        C3 = m.fdiv(m.fmul(s[3],m.fadd(1,m.power(R4,2))),m.fmul(s[2],R4))
+        C1 = m.fdiv(C3,R4)
+        L2 = m.fdiv(m.fmul(s[3],mod),m.power(m.fmul(C1,R4),2))
+        g.append(C1)
+        g.append(L2)
+        g.append(C3)
+        g.append(R4)
+      case 5:
+        Rtot = m.fdiv(m.fmul(16,m.fmul(s[0],m.fmul(s[4],m.fsub(2,m.power(s[4],2))))),m.fadd(m.fmul(32,m.fmul(s[0],s[4])),m.fsub(m.fmul(4,m.fmul(s[2],m.fmul(m.power(s[3],2),s[4]))),m.fadd(m.fmul(8,m.fmul(s[1],s[3])),m.fadd(m.fmul(16,m.fmul(s[0],m.power(s[4],3))),m.power(s[3],4))))))
+        C1 = m.fdiv(m.fmul(2,s[4]),s[3])
+
+        nnn = m.fadd(m.fmul(16,m.fmul(s[0],m.fmul(m.power(s[4],3),m.fsub(Rtot,1)))),m.fsub(m.fmul(m.power(s[3],4),Rtot),m.fmul(4,m.fmul(s[2],m.fmul(m.power(s[3],2),m.fmul(s[4],Rtot))))))
+        ddd = m.fmul(16,m.fmul(s[0],m.fmul(s[3],m.fmul(m.power(s[4],2),m.fsub(Rtot,1)))))
+        eee = m.fmul(64,m.fmul(s[0],m.fmul(m.power(s[3],4),m.fmul(m.power(s[4],2),Rtot))))
+
+        C3 = m.fdiv(m.fsub(m.sqrt(m.fsub(m.power(nnn,2),eee)),nnn),ddd)
+        L4 = m.fdiv(m.fmul(2,m.fmul(s[4],m.fsub(Rtot,1))),s[3])
+        R5 = m.fsub(Rtot,1)
+        mod = m.fdiv(Rtot,s[0])
+        L2 = m.fdiv(m.fmul(s[4],mod),m.fmul(C1,m.fmul(C3,L4)))
+
+        g.append(C1.real)
+        g.append(L2.real)
+        g.append(C3.real)
+        g.append(L4.real)
+        g.append(R5.real)
+  instrument.lap('g values')
+
+  i = 0
+  for v in g:
+    v = m.fdiv(v,wc)
+    if i == 0:
+      comp = "R"
+      v = R
+    elif i == len(g)-1:
+      Rl = g[len(g)-1]
+      comp = "R"
+      Rl = v = m.fmul(Rl,R)
+    elif i % 2 == 0 and not current or i % 2 == 1 and current:
+      comp = "L"
+      v = m.fmul(v,R)
+    else:
+      comp = "C"
+      v = m.fdiv(v,R)
+
+    c.append(Component(comp,i,v))
+    i = i + 1
+  instrument.lap('components')
+
+  return Filter(c, None, wc, wc, Rl, Rtot, None, None, list(C), ladder_poly(m, c, current), None)
+
+# |Rl/component_poly(s)| over the complex plane around the cut-off
+def plot_transfer(design, points=100000):
+  from mpmath import fdiv, cplot, fabs, polyval
+
+  wc = design.wc
+  cplot(lambda x: fabs(fdiv(design.Rl,polyval(design.component_poly,x))), re=[float(-2*wc), float(2*wc)], im=[float(-2*wc), float(2*wc)], points=points, verbose=True)
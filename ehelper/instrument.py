@@ -0,0 +1,155 @@
+from contextlib import contextmanager, nullcontext
+import atexit
+import logging
+import os
+import sys
+import time
+
+# Per stage timing of a tool's run, behind --profile or the EHELPER_PROFILE
+# environment variable. A stage is a with block (or a call through timed());
+# within one, lap() charges the time since the last lap, or since the stage
+# began, to a named step, so a long function can be split up without being
+# restructured. Stages nest, and are reported by their path ('design/poles').
+# While profiling, every function of a loaded backend is wrapped to count its
+# calls. Disabled, a stage is a shared null context and a lap or timed() call
+# returns at once.
+
+ENVIRONMENT = 'EHELPER_PROFILE' # '-' (or 1) for stderr, otherwise a file name
+FORMAT_ENVIRONMENT = 'EHELPER_PROFILE_FORMAT'
+FORMATS = ['json', 'cprofile']
+
+# when the package was imported, so the interpreter start up and the imports
+# (cpu time only) and the argument parsing can be told apart
+imported = (time.perf_counter(), time.process_time())
+
+active = None
+null = nullcontext()
+
+class Profile:
+  def __init__(self, filename='-', format='json'):
+    self.filename = filename
+    self.format = format
+    self.stages = {}
+    self.operations = {}
+    self.path = []
+    self.last = imported
+    self.profiler = None
+    if format == 'cprofile':
+      import cProfile
+      self.profiler = cProfile.Profile()
+      self.profiler.enable()
+
+  def add(self, name, wall, cpu):
+    s = self.stages.setdefault('/'.join(self.path + [name]), {'calls': 0, 'wall': 0.0, 'cpu': 0.0})
+    s['calls'] += 1
+    s['wall'] += wall
+    s['cpu'] += cpu
+
+  def lap(self, name):
+    now = (time.perf_counter(), time.process_time())
+    self.add(name, now[0] - self.last[0], now[1] - self.last[1])
+    self.last = now
+
+  @contextmanager
+  def stage(self, name):
+    start = (time.perf_counter(), time.process_time())
+    self.path.append(name)
+    self.last = start
+    try:
+      yield
+    finally:
+      self.path.pop()
+      self.last = (time.perf_counter(), time.process_time())
+      self.add(name, self.last[0] - start[0], self.last[1] - start[1])
+
+  # pi is left alone as mpmath's is a callable constant
+  def count(self, ns):
+    for name, f in vars(ns).items():
+      if name != 'pi' and callable(f) and not isinstance(f, type) and not getattr(f, 'counted', False):
+        setattr(ns, name, self.counter(f"{ns.name}.{name}", f))
+
+  def counter(self, name, f):
+    operations = self.operations
+    operations.setdefault(name, 0)
+    def counted(*args, **kwargs):
+      operations[name] += 1
+      return f(*args, **kwargs)
+    counted.counted = True
+    return counted
+
+  def report(self):
+    precision = {}
+    if 'mpmath' in sys.modules:
+      mp = sys.modules['mpmath'].mp
+      precision = {'dps': mp.dps, 'prec': mp.prec}
+    return {
+      'tool': os.path.basename(sys.argv[0]),
+      'args': sys.argv[1:],
+      'wall': time.perf_counter() - imported[0],
+      'cpu': time.process_time(),
+      'stages': {'startup': {'calls': 1, 'wall': None, 'cpu': imported[1]}, **self.stages},
+      'operations': {k: v for k, v in self.operations.items() if v},
+      'precision': precision,
+    }
+
+  def stop(self):
+    output = sys.stderr if self.filename in ('-', '1') else None
+    if self.profiler:
+      import pstats
+      self.profiler.disable()
+      if output:
+        pstats.Stats(self.profiler, stream=output).sort_stats('cumulative').print_stats(40)
+      else:
+        self.profiler.dump_stats(self.filename)
+      return
+
+    import json
+    text = json.dumps(self.report(), indent=2)
+    if output:
+      print(text, file=output)
+    else:
+      with open(self.filename, 'w') as f:
+        f.write(text + "\n")
+
+def stage(name):
+  return null if active is None else active.stage(name)
+
+def lap(name):
+  if active is not None:
+    active.lap(name)
+
+# f(*args, **kwargs) as a stage
+def timed(name, f, *args, **kwargs):
+  if active is None:
+    return f(*args, **kwargs)
+  with active.stage(name):
+    return f(*args, **kwargs)
+
+# wraps the functions of a backend namespace to count their calls, when profiling
+def count(ns):
+  if active is not None:
+    active.count(ns)
+
+# starts profiling when --profile or the environment asks for it, with the
+# time since the package was imported taken as the argument parsing; the
+# report is written when the tool exits
+def start(args=None, filename=None, format=None):
+  global active
+  filename = filename or getattr(args, 'profile', None) or os.environ.get(ENVIRONMENT)
+  if not filename or active is not None:
+    return
+  format = format or getattr(args, 'profile_format', None) or os.environ.get(FORMAT_ENVIRONMENT) or 'json'
+  if format not in FORMATS:
+    # only the environment can get here past argparse, and a bad setting there shouldn't stop the tool
+    logging.warning(f"{FORMAT_ENVIRONMENT} must be one of {', '.join(FORMATS)} (not {format}), so json is used")
+    format = 'json'
+  active = Profile(filename, format)
+  active.lap('arguments')
+  from . import backend
+  for ns in backend.loaded.values():
+    active.count(ns)
+  atexit.register(active.stop)
+
+def add_arguments(parser):
+  parser.add_argument('--profile', nargs='?', const='-', metavar='filename', help=f"Time each stage of the run, count the backend's operations and write them as JSON (or cProfile output) to stderr or a file (also set by {ENVIRONMENT})")
+  parser.add_argument('--profile-format', choices=FORMATS, help=f'json (stages, operation counts and precision) or cprofile (a .prof file, or the top functions on stderr) (default = json, or {FORMAT_ENVIRONMENT})')
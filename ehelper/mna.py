@@ -0,0 +1,275 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heapify, heappop, heappush
+import numpy as np
+from . import netlist
+
+# Modified nodal analysis of a netlist.Deck. The matrix has a row for every
+# node and for every voltage source (its current). Its sparsity pattern is
+# the same at every frequency, so it is ordered (minimum degree) and the fill
+# it will take on is worked out once as a Structure. Each frequency still
+# gets its own numeric factorization, but they are done side by side: every
+# step of the elimination is one NumPy operation over a block of frequencies.
+
+OP = namedtuple('OP', ['voltages', 'currents', 'iterations'])
+AC = namedtuple('AC', ['f', 'voltages', 'currents'])
+
+GMIN = 1e-12 # conductance from every node to ground, as SPICE adds across junctions
+BLOCK = 1 << 22 # matrix entries times frequencies factored at once
+
+# the elimination order and, for each pivot, where its entries (and those it
+# updates) are kept in the array of matrix values
+class Structure:
+  def __init__(self, n, pattern, late):
+    adj = [set() for i in range(n)]
+    for i, j in pattern:
+      if i != j:
+        adj[i].add(j)
+        adj[j].add(i)
+
+    self.index = {(i, i): i for i in range(n)}
+    for i, j in pattern:
+      self.entry(i, j)
+
+    # a late row (a voltage source) has nothing on its diagonal until one of its nodes is eliminated
+    ready = [not x for x in late]
+    heap = [(len(adj[v]), v) for v in range(n) if ready[v]]
+    heapify(heap)
+    done = [False]*n
+    self.order = []
+    self.steps = []
+    while heap:
+      d, p = heappop(heap)
+      if done[p] or d != len(adj[p]):
+        continue
+      done[p] = True
+      rows = sorted(adj[p])
+      self.order.append(p)
+      self.steps.append((p, np.array(rows, dtype=int),
+        np.array([self.entry(i, p) for i in rows], dtype=int),
+        np.array([self.entry(p, j) for j in rows], dtype=int),
+        np.array([self.entry(i, j) for i in rows for j in rows], dtype=int)))
+      for i in rows:
+        adj[i].discard(p)
+        adj[i].update(j for j in rows if j != i)
+        ready[i] = True
+        heappush(heap, (len(adj[i]), i))
+
+    if len(self.order) != n:
+      raise ValueError("the circuit is singular (a voltage source is shorted or not connected)")
+
+  def entry(self, i, j):
+    return self.index.setdefault((i, j), len(self.index))
+
+  # A holds the matrix values (entries x frequencies) and b the right hand
+  # sides (rows x frequencies); both are overwritten
+  def solve(self, A, b):
+    for p, rows, ip, pi, ij in self.steps:
+      if len(rows):
+        l = A[ip]/A[p]
+        A[ij] -= (l[:,None,:]*A[pi][None,:,:]).reshape(len(ij), -1)
+        b[rows] -= l*b[p]
+
+    x = np.zeros_like(b)
+    for p, rows, ip, pi, ij in reversed(self.steps):
+      x[p] = (b[p] - (A[pi]*x[rows]).sum(axis=0))/A[p]
+    return x
+
+# the matrix as stamps: entries (i, j) get g + jwc + l/jw; -1 is ground and
+# is dropped. Inductors are shorts for a DC solution, so their nodes are merged.
+class System:
+  def __init__(self, deck, dc, gmin=GMIN):
+    self.deck = deck
+    nodes = {}
+    merged = {}
+    find = lambda a: a if merged.get(a, a) == a else find(merged[a])
+    if dc:
+      for e in deck.elements:
+        if e.name[0] == 'l':
+          a, b = sorted(map(find, e.nodes), key=lambda x: x != netlist.GROUND)
+          if a != b:
+            merged[b] = a
+
+    for e in deck.elements:
+      for x in e.nodes:
+        if find(x) != netlist.GROUND:
+          nodes.setdefault(find(x), len(nodes))
+    self.names = {x: nodes[find(x)] for e in deck.elements for x in e.nodes if find(x) != netlist.GROUND}
+    self.sources = {e.name: len(nodes) + k for k, e in enumerate(e for e in deck.elements if e.name[0] == 'v')}
+    self.n = len(nodes) + len(self.sources)
+    self.diodes = [e for e in deck.elements if e.name[0] == 'd']
+    self.dc = dc
+
+    node = lambda x: -1 if find(x) == netlist.GROUND else nodes[find(x)]
+    self.stamps = []
+    for i in range(len(nodes)):
+      self.stamp(i, i, gmin)
+    for e in deck.elements:
+      a, b = map(node, e.nodes)
+      match e.name[0]:
+        case 'r':
+          self.conductance(a, b, 1/e.value)
+        case 'c':
+          if not dc:
+            self.conductance(a, b, 0, c=e.value)
+        case 'l':
+          if not dc:
+            self.conductance(a, b, 0, l=1/e.value)
+        case 'v':
+          k = self.sources[e.name]
+          self.stamp(a, k, 1)
+          self.stamp(k, a, 1)
+          self.stamp(b, k, -1)
+          self.stamp(k, b, -1)
+          self.stamp(k, k, 0)
+        case 'd':
+          self.conductance(a, b, 0)
+    self.junctions = np.array([(node(e.nodes[0]), node(e.nodes[1])) for e in self.diodes], dtype=int).reshape(-1, 2)
+
+    self.structure = Structure(self.n, {(i, j) for i, j, *_ in self.stamps}, [False]*len(nodes) + [True]*len(self.sources))
+    index = self.structure.index
+    self.at = np.array([index[i, j] for i, j, *_ in self.stamps], dtype=int)
+    self.g, self.c, self.l = np.array([s[2:] for s in self.stamps]).reshape(-1, 3).T
+    self.diagonals = [[index[a, a] if a >= 0 else -1, index[b, b] if b >= 0 else -1, index[a, b] if min(a, b) >= 0 else -1, index[b, a] if min(a, b) >= 0 else -1] for a, b in self.junctions]
+
+  def stamp(self, i, j, g, c=0, l=0):
+    if i >= 0 and j >= 0:
+      self.stamps.append((i, j, g, c, l))
+
+  def conductance(self, a, b, g, c=0, l=0):
+    self.stamp(a, a, g, c, l)
+    self.stamp(b, b, g, c, l)
+    self.stamp(a, b, -g, -c, -l)
+    self.stamp(b, a, -g, -c, -l)
+
+  # the matrix values at angular frequencies w, with each diode a conductance gd
+  def matrix(self, w, gd=()):
+    jw = 1j*np.asarray(w, dtype=float)
+    A = np.zeros((len(self.structure.index), len(jw)), dtype=complex)
+    with np.errstate(divide='ignore', invalid='ignore'):
+      np.add.at(A, self.at, self.g[:,None] + self.c[:,None]*jw + np.where(self.l[:,None] != 0, self.l[:,None]/jw, 0))
+    for (aa, bb, ab, ba), g in zip(self.diagonals, gd):
+      for k, sign in ((aa, 1), (bb, 1), (ab, -1), (ba, -1)):
+        if k >= 0:
+          A[k] += sign*g
+    return A
+
+  # injects the current i from node a to node b
+  def inject(self, x, a, b, i):
+    if a >= 0:
+      x[a] -= i
+    if b >= 0:
+      x[b] += i
+
+  def rhs(self, ac, width=1):
+    x = np.zeros((self.n, width), dtype=complex)
+    for e in self.deck.elements:
+      if e.name[0] not in 'vi':
+        continue
+      v = (e.ac[0]*np.exp(1j*np.radians(e.ac[1])) if e.ac else 0) if ac else e.value
+      if e.name[0] == 'v':
+        x[self.sources[e.name]] += v
+      else:
+        self.inject(x, *[-1 if n == netlist.GROUND else self.names[n] for n in e.nodes], v)
+    return x
+
+  def results(self, x):
+    voltages = {name: x[i] for name, i in self.names.items()}
+    currents = {f"i({name})": x[k] for name, k in self.sources.items()}
+    return voltages, currents
+
+# SPICE's limit on how far a junction voltage may move in one Newton step
+def limit(v, v0, nVt, vcrit):
+  big = (v > vcrit) & (np.abs(v - v0) > 2*nVt)
+  with np.errstate(invalid='ignore', divide='ignore'):
+    a = np.where(v0 > 0, 1 + (v - v0)/nVt, 0)
+    stepped = np.where(v0 > 0, np.where(a > 0, v0 + nVt*np.log(np.maximum(a, 1e-300)), vcrit), nVt*np.log(np.maximum(v/nVt, 1e-300)))
+  return np.where(big, stepped, v)
+
+def diode_parameters(system, Vt):
+  Is = []
+  nVt = []
+  for e in system.diodes:
+    kind, params = system.deck.models.get(e.value, ('d', {}))
+    if kind != 'd':
+      raise ValueError(f"{e.name}: model {e.value} is not a diode")
+    Is.append(params.get('is', 1e-12))
+    nVt.append(params.get('n', 1)*Vt)
+  return np.array(Is), np.array(nVt)
+
+def newton(system, Vt, iterations, tolerance):
+  Is, nVt = diode_parameters(system, Vt)
+  vcrit = nVt*np.log(nVt/(np.sqrt(2)*Is))
+  a, b = system.junctions.T if len(system.diodes) else (np.zeros(0, dtype=int),)*2
+  vd = np.zeros(len(Is))
+  x = np.zeros((system.n, 1), dtype=complex)
+  base = system.rhs(False)
+
+  # converged once the solution stops moving and the junction voltages it
+  # gives are those the diodes were linearised at
+  for k in range(1, iterations+1):
+    gd = Is/nVt*np.exp(vd/nVt) + GMIN
+    Id = Is*(np.exp(vd/nVt) - 1)
+    r = base.copy()
+    for i in range(len(Is)):
+      system.inject(r, a[i], b[i], Id[i] - gd[i]*vd[i])
+    new = system.structure.solve(system.matrix([0.0], gd), r)
+    if not len(Is):
+      return new, gd, k
+
+    v = np.array([(new[i, 0].real if i >= 0 else 0) - (new[j, 0].real if j >= 0 else 0) for i, j in system.junctions])
+    if np.all(np.abs(new - x) <= tolerance*(1 + np.abs(new))) and np.all(np.abs(v - vd) <= tolerance*(1 + np.abs(v))):
+      return new, gd, k
+    x = new
+    vd = limit(v, vd, nVt, vcrit)
+  raise ValueError(f"no DC solution found in {iterations} iterations")
+
+# the DC operating point; diodes use the model's IS and N (defaults 1e-12 and 1)
+def operating_point(deck, Vt=0.026, iterations=100, tolerance=1e-9, gmin=GMIN):
+  system = System(deck, True, gmin)
+  x, gd, k = newton(system, Vt, iterations, tolerance)
+  voltages, currents = system.results(x[:,0].real)
+  return OP({n: float(v) for n, v in voltages.items()}, {n: float(i) for n, i in currents.items()}, k)
+
+def frequencies(kind, points, start, stop):
+  match kind:
+    case 'dec':
+      from .ac import sweep
+      return sweep(start, stop, points)
+    case 'oct':
+      return start*2**(np.arange(int(np.floor(np.log2(stop/start)*points + 1e-9)) + 1)/points)
+    case 'lin':
+      return np.linspace(start, stop, points)
+  raise ValueError(f"unknown sweep: {kind}")
+
+# the small signal response at f (by default the deck's .ac sweep), with the
+# diodes linearised at the DC operating point
+def ac(deck, f=None, Vt=0.026, gmin=GMIN):
+  if f is None:
+    sweeps = [a for a in deck.analyses if a[0] == 'ac']
+    if not sweeps:
+      raise ValueError("the deck has no .ac analysis")
+    f = frequencies(*sweeps[0][1:])
+  f = np.asarray(f, dtype=float)
+
+  gd = ()
+  if any(e.name[0] == 'd' for e in deck.elements):
+    _, gd, _ = newton(System(deck, True, gmin), Vt, 100, 1e-9)
+
+  system = System(deck, False, gmin)
+  size = max(1, BLOCK//len(system.structure.index))
+  x = np.concatenate([system.structure.solve(system.matrix(2*np.pi*f[i:i+size], gd), np.repeat(system.rhs(True), len(f[i:i+size]), axis=1)) for i in range(0, len(f), size)], axis=1)
+  return AC(f, *system.results(x))
+
+# every analysis in the deck (an operating point when there are none)
+def simulate(deck):
+  if isinstance(deck, str):
+    deck = netlist.read(deck)
+  return [ac(deck) if a[0] == 'ac' else operating_point(deck) for a in deck.analyses or [('op',)]]
+
+# many decks (or file names) at once, spread over a pool of processes
+def simulate_many(decks, workers=None):
+  if workers == 1 or len(decks) < 2:
+    return [simulate(d) for d in decks]
+  with ProcessPoolExecutor(workers) as pool:
+    return list(pool.map(simulate, decks))
@@ -0,0 +1,185 @@
+from array import array
+from collections import namedtuple
+import re
+
+# Reads back the SPICE decks the tools write (and simple hand written ones):
+# R, L, C, D, V and I elements, .model for diodes, .ac and .op. Names are case
+# insensitive, '+' continues a line, '*' starts a comment and anything between
+# .control and .endc is skipped.
+#
+# The decks themselves are written from a Netlist, which holds a ladder as
+# arrays rather than an object for each element: the letters as bytes, the
+# numbers and node pairs as integers and the values as doubles (all SPICE
+# reads of them), so an element takes 33 bytes, 10^5 of them about 3.3MB, and
+# a batch of thousands of designs stays small. A deck is formatted as one string and written at once.
+
+# value is the R, L or C value, the diode's model name, or for a source its
+# DC value; ac is a source's AC magnitude and phase (in degrees)
+Element = namedtuple('Element', ['name', 'nodes', 'value', 'ac'])
+Deck = namedtuple('Deck', ['title', 'elements', 'models', 'analyses'])
+
+GROUND = '0'
+
+# node numbers in a Netlist: the named nodes are negative, the rest as written
+IN = -1
+OUT = -2
+NODES = {0: GROUND, IN: 'in', OUT: 'out'}
+SOURCE = -1 # the number of the source resistor, written Rs
+
+SUFFIXES = {'t': 1e12, 'g': 1e9, 'meg': 1e6, 'k': 1e3, 'mil': 25.4e-6, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12, 'f': 1e-15}
+NUMBER = re.compile(r'([+-]?(?:\d+\.?\d*|\.\d+)(?:e[+-]?\d+)?)(meg|mil|[tgkmunpf])?[a-z]*$')
+
+# 1k, 4.7u, 1GIG, 10Meg ... (any letters after the scale factor are units)
+def value(s):
+  match = NUMBER.match(s.lower())
+  if not match:
+    raise ValueError(f"not a number: {s}")
+  return float(match.group(1))*SUFFIXES.get(match.group(2), 1)
+
+def node(s):
+  s = s.lower()
+  return GROUND if s == 'gnd' else s
+
+def lines(text):
+  joined = []
+  for line in text.splitlines():
+    line = line.strip()
+    if line.startswith('+') and joined:
+      joined[-1] += ' ' + line[1:]
+    else:
+      joined.append(line)
+  return joined
+
+# Vname n+ n- [DC] v [AC mag [phase]]
+def source(name, fields):
+  nodes = (node(fields[0]), node(fields[1]))
+  dc = 0.0
+  ac = None
+  words = [f.lower() for f in fields[2:]]
+  i = 0
+  while i < len(words):
+    if words[i] == 'dc':
+      dc = value(words[i+1])
+      i += 2
+    elif words[i] == 'ac':
+      i += 1
+      args = []
+      while i < len(words) and len(args) < 2 and NUMBER.match(words[i]):
+        args.append(value(words[i]))
+        i += 1
+      ac = (args[0] if args else 1.0, args[1] if len(args) > 1 else 0.0)
+    else:
+      dc = value(words[i])
+      i += 1
+  return Element(name, nodes, dc, ac)
+
+# .model name D(IS=1e-12 N=1)
+def model(fields):
+  text = ' '.join(fields[1:]).lower().replace('(', ' ').replace(')', ' ').replace('=', ' = ')
+  words = text.split()
+  kind = words[0]
+  params = {}
+  for i in range(1, len(words)-2):
+    if words[i+1] == '=':
+      params[words[i]] = value(words[i+2])
+  return fields[0].lower(), kind, params
+
+def parse(text):
+  all_lines = lines(text)
+  title = all_lines[0] if all_lines else ''
+  elements = []
+  models = {}
+  analyses = []
+  control = False
+
+  for number, line in enumerate(all_lines[1:], 2):
+    if not line or line.startswith('*'):
+      continue
+    fields = line.split()
+    word = fields[0].lower()
+    if control:
+      control = word != '.endc'
+      continue
+
+    try:
+      match word[0]:
+        case '.':
+          match word:
+            case '.control':
+              control = True
+            case '.model':
+              name, kind, params = model(fields[1:])
+              models[name] = (kind, params)
+            case '.ac':
+              analyses.append(('ac', fields[1].lower(), int(value(fields[2])), value(fields[3]), value(fields[4])))
+            case '.op':
+              analyses.append(('op',))
+            case '.end':
+              break
+        case 'r' | 'l' | 'c':
+          elements.append(Element(word, (node(fields[1]), node(fields[2])), value(fields[3]), None))
+        case 'd':
+          elements.append(Element(word, (node(fields[1]), node(fields[2])), fields[3].lower(), None))
+        case 'v' | 'i':
+          elements.append(source(word, fields[1:]))
+        case _:
+          raise ValueError(f"unsupported element {fields[0]}")
+    except (IndexError, ValueError) as e:
+      raise ValueError(f"line {number}: {line}: {e or 'missing field'}") from None
+
+  return Deck(title, elements, models, analyses)
+
+def read(filename):
+  with open("/dev/stdin") if filename == "-" else open(filename) as f:
+    return parse(f.read())
+
+def node_number(n):
+  match n:
+    case 'in':
+      return IN
+    case 'out':
+      return OUT
+  return int(n)
+
+def node_name(n):
+  return NODES.get(n, n)
+
+# a ladder driven by a unit AC voltage (or current, source 'I') source into
+# node in, with an AC sweep, and a control block that plots plot
+class Netlist:
+  __slots__ = ['title', 'source', 'plot', 'letters', 'numbers', 'nodes', 'values']
+
+  def __init__(self, title, source='V', plot='vdb(out)'):
+    self.title = title
+    self.source = source
+    self.plot = plot
+    self.letters = bytearray()
+    self.numbers = array('q')
+    self.nodes = array('q')
+    self.values = array('d')
+
+  def __len__(self):
+    return len(self.letters)
+
+  # number is an int, or 's' for the source resistor
+  def add(self, letter, number, value, innode, outnode):
+    self.letters.append(ord(letter))
+    self.numbers.append(SOURCE if number == 's' else number)
+    self.nodes.append(node_number(innode))
+    self.nodes.append(node_number(outnode))
+    self.values.append(float(value.real))
+
+  def elements(self):
+    nodes = iter(self.nodes)
+    return [f"{chr(l)}{'s' if k == SOURCE else k} {node_name(a)} {node_name(b)} {v!r}" for l, k, a, b, v in zip(self.letters, self.numbers, nodes, nodes, self.values)]
+
+  # the deck, without the control block when it's for ngspice -b
+  def text(self, control=True):
+    lines = [self.title, "", f"{self.source}in in 0 DC 0 AC 1"] + self.elements() + ["", ".AC DEC 100 0.01 1GIG"]
+    if control:
+      lines += [".control", "run", f"plot {self.plot}", ".endc"]
+    lines.append(".END")
+    return "\n".join(lines) + "\n"
+
+  def write(self, f, control=True):
+    f.write(self.text(control))
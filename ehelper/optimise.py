@@ -0,0 +1,113 @@
+from bisect import bisect_right
+from collections import namedtuple
+import numpy as np
+from . import transformer
+
+# A search of transformer.design over the turns ratio and secondary inductance
+# (ranges, or a list of the transformers to hand), for the designs that reach
+# Vout with a source resistor in range. Every candidate is one element of a
+# single numpy backend call. A design is judged on Rs, the VA drawn from the
+# source (design's own watts and va are the load's, the same for all) and
+# |Ptot|, the source's phase, all the lower the better, and only the designs no
+# other beats on all three are kept. Over ranges, the grid's best are then
+# refined on a finer grid around each before the set is taken again.
+
+# the kept designs' columns, best first, and how many were evaluated and
+# how many of those were feasible
+Pareto = namedtuple('Pareto', ['table', 'evaluated', 'feasible'])
+
+OBJECTIVES = ['Rs', 'VA', 'Phase']
+COLUMNS = ['TR', 'Lout', 'Rrin', 'Rrout', 'Rs', 'VA', 'Phase', 'Iin', 'Vin', 'Lin', 'watts']
+GRID = 1000 # points on each axis of a range
+REFINE = 10 # points on each axis around a grid point
+BEST = 200 # grid points refined
+
+# every candidate's design, with the objectives and whether it's feasible
+def evaluate(Vsrc, Vf, Vout, Rrin, Rrout, Rload, Lout, TR, Rs=(0, np.inf)):
+  with np.errstate(all='ignore'):
+    r = transformer.design(Vsrc, Vf, Vout, Rrin, Rrout, Rload, Lout, TR, 'numpy')
+    shape = np.broadcast(Lout, TR, Rrin, Rrout).shape
+    t = {
+      'TR': TR, 'Lout': Lout, 'Rrin': Rrin, 'Rrout': Rrout,
+      'Rs': r.Rs, 'VA': np.multiply(Vsrc, r.Iin), 'Phase': np.abs(np.real(r.Ptot)),
+      'Iin': r.Iin, 'Vin': r.Vin, 'Lin': r.Lin, 'watts': r.watts,
+    }
+    t = {n: np.broadcast_to(v, shape).ravel() for n, v in t.items()}
+    ok = np.isreal(t['Rs']) & np.isreal(t['Iin']) & np.isreal(t['Vin'])
+    t = {n: np.real(v) for n, v in t.items()}
+    ok &= np.isfinite(t['Rs']) & (t['Rs'] >= Rs[0]) & (t['Rs'] <= Rs[1])
+  return t, ok
+
+# the rows no other row beats (or equals) on every objective: taken in order of
+# Rs, a row is kept unless one before it has no more VA and no larger phase.
+# The kept rows' (VA, phase) form a staircase, VA rising as the phase falls,
+# so each row is one bisection.
+def front(t):
+  order = np.lexsort((t['Phase'], t['VA'], t['Rs']))
+  va = []
+  phase = []
+  keep = []
+  for i, v, p in zip(order.tolist(), t['VA'][order].tolist(), t['Phase'][order].tolist()):
+    k = bisect_right(va, v)
+    if k and phase[k-1] <= p:
+      continue
+    keep.append(i)
+    # the steps this row now beats
+    j = k
+    while j < len(va) and phase[j] >= p:
+      j += 1
+    va[k:j] = [v]
+    phase[k:j] = [p]
+  return np.array(keep, dtype=int)
+
+# best first: by the sum of the objectives, each scaled to 0-1 over the set
+def rank(t):
+  score = np.zeros(len(t['Rs']))
+  for n in OBJECTIVES:
+    x = t[n]
+    span = x.max() - x.min()
+    score += (x - x.min())/span if span else 0
+  order = np.argsort(score, kind='stable')
+  return {n: v[order] for n, v in t.items()}
+
+def select(t, rows):
+  return {n: v[rows] for n, v in t.items()}
+
+# TR and Lout are (low, high) ranges searched on a log scale, or arrays of the
+# transformers to hand (with Rrin and Rrout scalars or arrays alike)
+def search(Vsrc, Vf, Vout, Rrin, Rrout, Rload, Lout, TR, Rs=(0, np.inf), grid=GRID, refine=REFINE, best=BEST):
+  if Rs[0] > Rs[1]:
+    raise ValueError(f"the range of Rs must be the lower value first (not {Rs[0]} to {Rs[1]})")
+  ranges = isinstance(TR, tuple)
+  if ranges:
+    if min(*TR, *Lout) <= 0:
+      raise ValueError("the ranges of TR and Lout must be positive")
+    TR = np.geomspace(*TR, grid)[:,None]
+    Lout = np.geomspace(*Lout, grid)[None,:]
+
+  t, ok = evaluate(Vsrc, Vf, Vout, Rrin, Rrout, Rload, Lout, TR, Rs)
+  evaluated = len(ok)
+  feasible = int(ok.sum())
+  t = select(t, np.flatnonzero(ok))
+  if not feasible:
+    return Pareto(t, evaluated, 0)
+  t = select(t, front(t))
+
+  if ranges and refine > 1:
+    # within a grid step either side of each of the best, on the same log
+    # scale, leaving out the grid points themselves
+    t = rank(t)
+    step = np.log(TR[1,0]/TR[0,0]), np.log(Lout[0,1]/Lout[0,0])
+    around = np.linspace(-1, 1, refine + 2)[1:-1]
+    around = around[around != 0]
+    n = min(best, len(t['TR']))
+    tr = np.clip(t['TR'][:n,None,None]*np.exp(step[0]*around)[None,:,None], TR[0,0], TR[-1,0])
+    lout = np.clip(t['Lout'][:n,None,None]*np.exp(step[1]*around)[None,None,:], Lout[0,0], Lout[0,-1])
+    r, ok = evaluate(Vsrc, Vf, Vout, Rrin, Rrout, Rload, lout, tr, Rs)
+    evaluated += len(ok)
+    feasible += int(ok.sum())
+    r = select(r, np.flatnonzero(ok))
+    t = {k: np.concatenate([t[k], r[k]]) for k in t}
+    t = select(t, front(t))
+
+  return Pareto(rank(t), evaluated, feasible)
@@ -0,0 +1,138 @@
+from collections import namedtuple
+import numpy as np
+
+# Expands prod(s + q) for many q at once. The q here are the negated poles, so
+# for a stable filter every Re(q) > 0: each conjugate pair then becomes the real
+# factor s² + 2Re(q)s + |q|² and every coefficient of the product is positive.
+# Convolving positive sequences never cancels, so multiplying the factors
+# directly (pairwise, by divide and conquer) keeps every coefficient to a
+# small relative error, which an FFT based product would not.
+#
+# Coefficients are held as mantissas and binary exponents (m*2^e), as those of
+# a filter of order in the thousands range well beyond float64.
+
+# highest order first; err bounds the relative error of every coefficient
+Expansion = namedtuple('Expansion', ['m', 'e', 'err'])
+
+u = np.finfo(float).eps/2
+ZERO = -2**30 # exponent given to a zero coefficient
+BITS = 480 # largest spread of exponents convolved in one piece (keeps products out of the subnormals)
+SMALL = 64 # degree up to which the factors are multiplied together as plain floats
+
+# poles of the butterworth and chebyshev prototypes (negated, as sp in filters),
+# normalised to wc and w0 respectively. Each part is found as the sine of a
+# small angle so that it keeps its relative accuracy when it is near zero.
+def butterworth_poles(N):
+  k = np.arange(1, N+1)
+  j = 2*k-N-1
+  return np.sin(np.pi*(N-np.abs(j))/(2*N)) + 1j*np.sin(np.pi*j/(2*N))
+
+def chebyshev_poles(N, e):
+  k = np.arange(1, N+1)
+  j = 2*k-1
+  a = np.arcsinh(1/e)/N
+  return np.sinh(a)*np.sin(np.pi*np.minimum(j, 2*N-j)/(2*N)) + 1j*np.cosh(a)*np.sin(np.pi*(N-j)/(2*N))
+
+def factors(q, tol=1e-12):
+  q = np.asarray(q, dtype=complex)
+  if np.any(q.real <= 0):
+    raise ValueError("every pole must be in the left half plane")
+
+  small = np.abs(q.imag) <= tol*np.abs(q)
+  upper = q[~small & (q.imag > 0)]
+  if 2*len(upper) != len(q[~small]):
+    raise ValueError("complex poles must come in conjugate pairs")
+
+  quadratics = np.stack([np.ones(len(upper)), 2*upper.real, upper.real**2 + upper.imag**2], axis=1)
+  linears = np.stack([np.ones(small.sum()), q[small].real], axis=1)
+  return quadratics, linears
+
+# multiplies rows pairwise while they are of low degree (an odd row out is set aside)
+def multiply_rows(rows, err):
+  done = []
+  while len(rows) > 1 and rows.shape[1] <= SMALL:
+    if len(rows) % 2:
+      done.append((rows[-1], err))
+      rows = rows[:-1]
+    a = rows[0::2]
+    b = rows[1::2]
+    n = a.shape[1]
+    c = np.zeros((len(a), 2*n-1))
+    for i in range(n):
+      c[:,i:i+n] += a[:,i:i+1]*b
+    rows = c
+    err = 2*err + (n+1)*u
+  return [(r, err) for r in rows] + done
+
+def pieces(e):
+  if e.max() - e.min() <= BITS:
+    return [(0, len(e))]
+
+  p = []
+  start = 0
+  lo = hi = e[0]
+  for i in range(1, len(e)):
+    lo = min(lo, e[i])
+    hi = max(hi, e[i])
+    if hi - lo > BITS:
+      p.append((start, i))
+      start = i
+      lo = hi = e[i]
+  p.append((start, len(e)))
+  return p
+
+def split(x):
+  m, e = np.frexp(x)
+  return m, np.where(m == 0, ZERO, e.astype(np.int64))
+
+def multiply(a, b):
+  m = np.zeros(len(a.m)+len(b.m)-1)
+  e = np.full(len(m), ZERO, dtype=np.int64)
+  pa = pieces(a.e)
+  pb = pieces(b.e)
+  for i, j in pa:
+    a0 = a.e[i:j].max()
+    x = np.ldexp(a.m[i:j], a.e[i:j]-a0)
+    for k, l in pb:
+      b0 = b.e[k:l].max()
+      xm, xe = split(np.convolve(x, np.ldexp(b.m[k:l], b.e[k:l]-b0)))
+      xe = np.where(xm == 0, ZERO, xe+a0+b0)
+      s = slice(i+k, i+k+len(xm))
+      top = np.maximum(e[s], xe)
+      m[s] = np.ldexp(m[s], e[s]-top) + np.ldexp(xm, xe-top)
+      e[s] = top
+
+  m, f = split(m)
+  return Expansion(m, np.where(m == 0, ZERO, e+f), a.err + b.err + (min(len(a.m), len(b.m)) + len(pa)*len(pb) + 1)*u)
+
+# q are the negated poles (each part known to a relative error of qerr);
+# returns the coefficients of prod(s + q)
+def expand(q, qerr=8*u):
+  q = np.asarray(q, dtype=complex)
+  if len(q) == 0:
+    return Expansion(np.array([0.5]), np.array([1]), 0.0)
+
+  # scale by a power of two so the factors are near one (undone exactly below)
+  scale = int(np.round(np.log2(np.abs(q).max())))
+  quadratics, linears = factors(np.ldexp(q.real, -scale) + 1j*np.ldexp(q.imag, -scale))
+
+  err = 2*qerr + 3*u # forming |q|² from the parts
+  polys = []
+  for rows in (quadratics, linears):
+    if len(rows):
+      polys += [Expansion(*split(r), e) for r, e in multiply_rows(rows, err)]
+
+  while len(polys) > 1:
+    polys = [multiply(polys[i], polys[i+1]) if i+1 < len(polys) else polys[i] for i in range(0, len(polys), 2)]
+
+  p = polys[0]
+  return Expansion(p.m, np.where(p.m == 0, ZERO, p.e + scale*np.arange(len(p.m))), p.err)
+
+# the coefficients as values of backend m (mpmath keeps the full exponent range;
+# float and numpy give inf where a coefficient is beyond float64)
+def values(p, m):
+  if m.name == 'mpmath':
+    from mpmath import ldexp
+    return [ldexp(m.mpf(float(x)), int(y)) for x, y in zip(p.m, p.e)]
+  with np.errstate(over='ignore'):
+    return [float(x) for x in np.ldexp(p.m, np.clip(p.e, -2**20, 2**20))]
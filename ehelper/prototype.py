@@ -0,0 +1,116 @@
+from collections import namedtuple
+from functools import lru_cache
+import logging
+import mmap
+import os
+import struct
+import sys
+
+# The g values of the normalised Butterworth and Chebyshev prototypes, which
+# depend only on the order, the ripple factor e and whether the source is
+# matched, precomputed for orders up to ORDERS and the ripples in RIPPLES so a
+# design only has to scale them to its fc and R. They are worked out by the
+# recursions in filters with mpmath to DPS digits and rounded to doubles, in
+# one file of little endian float64 after a versioned header, which is memory
+# mapped on first use (without NumPy) and read in place. Anything else (other
+# orders and ripples, mpmath above double precision, a missing or stale file)
+# falls back to the recursions. The file is rebuilt with prototype.build().
+
+FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'prototypes.bin')
+MAGIC = b'EHPROTO\0'
+VERSION = 1
+ORDERS = 200
+RIPPLES = [k/10 for k in range(1, 11)] # as the tools take e, so 0.5 is exactly the float parsed
+DPS = 40
+
+# magic, version, orders and ripples, then the ripples as doubles
+HEADER = struct.Struct('<8sIII4x')
+
+# values is every table back to back: the Butterworth g1..gN for each order
+# with a load, then with a matched source, then for each ripple the Chebyshev
+# g1..gN+1 (g0 is always 1)
+Table = namedtuple('Table', ['orders', 'ripples', 'values'])
+
+def butterworth_offset(N, source, orders):
+  return (orders*(orders + 1)//2 if source else 0) + N*(N - 1)//2
+
+def chebyshev_offset(N, r, orders):
+  return orders*(orders + 1) + r*(orders*(orders + 3)//2) + N*(N - 1)//2 + N - 1
+
+def size(orders, ripples):
+  return orders*(orders + 1) + ripples*(orders*(orders + 3)//2)
+
+@lru_cache
+def table(filename=FILE):
+  if sys.byteorder != 'little':
+    return None
+  try:
+    with open(filename, 'rb') as f:
+      data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+  except (OSError, ValueError):
+    return None
+
+  try:
+    magic, version, orders, ripples = HEADER.unpack_from(data)
+  except struct.error:
+    magic = version = None
+  if magic != MAGIC or version != VERSION or len(data) != HEADER.size + 8*(ripples + size(orders, ripples)):
+    logging.warning(f"{filename} isn't a version {VERSION} prototype table, so the g values are calculated (rebuild it with ehelper.prototype.build())")
+    return None
+  values = memoryview(data)[HEADER.size:].cast('d')
+  return Table(orders, values[:ripples].tolist(), values[ripples:])
+
+# the table's values are doubles, so mpmath only takes them at its default
+# precision or below
+def usable(m):
+  if m.name == 'mpmath':
+    import mpmath
+    return mpmath.mp.prec <= 53
+  return True
+
+# g1..gN, or None when not in the table
+def butterworth(N, source=False, m=None, filename=FILE):
+  t = table(filename)
+  if t is None or not isinstance(N, int) or not 1 <= N <= t.orders or m is not None and not usable(m):
+    return None
+  i = butterworth_offset(N, source, t.orders)
+  g = t.values[i:i+N].tolist()
+  return [m.mpf(x) for x in g] if m is not None else g
+
+# g0..gN+1, or None when not in the table
+def chebyshev(N, e, m=None, filename=FILE):
+  t = table(filename)
+  if t is None or not isinstance(N, int) or not 1 <= N <= t.orders or m is not None and not usable(m):
+    return None
+  try:
+    r = t.ripples.index(float(e)) if isinstance(e, (int, float)) or type(e).__name__ == 'mpf' else -1
+  except ValueError:
+    return None
+  if r < 0:
+    return None
+  i = chebyshev_offset(N, r, t.orders)
+  g = [1.0] + t.values[i:i+N+1].tolist()
+  return [m.mpf(x) for x in g] if m is not None else g
+
+# writes the table, with every g value found to dps digits
+def build(filename=FILE, orders=ORDERS, ripples=RIPPLES, dps=DPS):
+  import mpmath
+  from . import backend, filters
+
+  m = backend.mpmath_backend()
+  values = []
+  with mpmath.workdps(dps):
+    for source in (False, True):
+      for N in range(1, orders + 1):
+        values += [float(x) for x in filters.butterworth_g(m, N, source)]
+    for e in ripples:
+      for N in range(1, orders + 1):
+        values += [float(x) for x in filters.chebyshev_g(m, N, mpmath.mpf(e))[1:]]
+
+  temporary = filename + '.tmp'
+  with open(temporary, 'wb') as f:
+    f.write(HEADER.pack(MAGIC, VERSION, orders, len(ripples)))
+    f.write(struct.pack(f'<{len(ripples)}d', *ripples))
+    f.write(struct.pack(f'<{len(values)}d', *values))
+  os.replace(temporary, filename)
+  table.cache_clear()
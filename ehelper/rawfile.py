@@ -0,0 +1,167 @@
+from collections import namedtuple
+import os
+import time
+import numpy as np
+
+# ngspice's raw output files, as written by ngspice -b -r and by spice.py -r.
+# A file holds one or more plots, each a header of "Key: value" lines, the
+# variables (the first is the sweep, e.g. frequency) and then every point's
+# values in order: either as text ("Values:", complex values as "re,im") or
+# as little endian doubles ("Binary:", complex values as two), which ngspice
+# writes unless SPICE_ASCIIRAWFILE is set. A binary plot is memory mapped and
+# each variable is a strided view of it, so nothing is read until it is used
+# and a sweep of any length costs no more memory than its header.
+
+# data is each variable's values by name (lower case), in the file's order
+Plot = namedtuple('Plot', ['title', 'name', 'flags', 'variables', 'types', 'data'])
+
+# the largest differences from the design's transfer function over the points
+# compared (in dB and degrees)
+Comparison = namedtuple('Comparison', ['db', 'phase', 'points'])
+
+FLOOR = -100 # dB, below which a response isn't compared
+BLOCK = 32 # poles multiplied together between taking logs
+
+# the header's fields and variables, and the line that starts the values (None
+# at the end of the file)
+def read_header(f, filename):
+  header = {}
+  while line := f.readline():
+    key, _, value = line.decode('latin-1').partition(':')
+    key = key.strip().lower()
+    if key == 'variables':
+      break
+    if key:
+      header[key] = value.strip()
+  else:
+    if header:
+      raise ValueError(f"{filename} ends in a plot's header")
+    return None, None, None, None
+
+  try:
+    n = int(header['no. variables'])
+    int(header['no. points'])
+  except (KeyError, ValueError):
+    raise ValueError(f"{filename} isn't an ngspice raw file") from None
+  variables = []
+  types = []
+  for i in range(n):
+    fields = f.readline().decode('latin-1').split()
+    if len(fields) < 3:
+      raise ValueError(f"{filename} has too few variables")
+    variables.append(fields[1].lower())
+    types.append(fields[2])
+  start = f.readline().decode('latin-1').strip().lower()
+  if start not in ('binary:', 'values:'):
+    raise ValueError(f"{filename} has no values after its variables")
+  return header, variables, types, start
+
+# each point is its index then a value for every variable
+def read_values(f, points, n, width):
+  tokens = []
+  while len(tokens) < points*(n*width + 1) and (line := f.readline()):
+    tokens += line.decode('latin-1').replace(',', ' ').split()
+  values = np.array(tokens[:points*(n*width + 1)], dtype=float).reshape(points, n*width + 1)[:,1:]
+  return values[:,0::2] + 1j*values[:,1::2] if width == 2 else values
+
+def read(filename):
+  plots = []
+  size = os.path.getsize(filename)
+  with open(filename, 'rb') as f:
+    while True:
+      header, variables, types, start = read_header(f, filename)
+      if header is None:
+        break
+      n = len(variables)
+      points = int(header['no. points'])
+      flags = header.get('flags', 'real').lower().split()
+      width = 2 if 'complex' in flags else 1
+
+      if start == 'values:':
+        values = read_values(f, points, n, width)
+      else:
+        offset = f.tell()
+        dtype = np.dtype('<c16' if width == 2 else '<f8')
+        if offset + points*n*dtype.itemsize > size:
+          raise ValueError(f"{filename} is shorter than its {points} points")
+        values = np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=(points, n)) if points else np.zeros((0, n), dtype)
+        f.seek(offset + points*n*dtype.itemsize)
+
+      plots.append(Plot(header.get('title', ''), header.get('plotname', ''), flags, variables, types, {v: values[:,i] for i, v in enumerate(variables)}))
+  if not plots:
+    raise ValueError(f"{filename} has no plots")
+  return plots
+
+# the first plot with a frequency sweep and the node asked for
+def ac(plots, node='out'):
+  for p in plots:
+    if 'frequency' in p.data and f"v({node})" in p.data:
+      return np.real(p.data['frequency']), p.data[f"v({node})"]
+  raise ValueError(f"no AC analysis of V({node})")
+
+# variables is [(name, type)], data their values in the same order; f is
+# opened in binary mode
+def write(f, title, name, variables, data, binary=True):
+  complex_data = any(np.iscomplexobj(v) for v in data)
+  points = len(data[0])
+  f.write(f"Title: {title}\n"
+          f"Date: {time.ctime()}\n"
+          f"Plotname: {name}\n"
+          f"Flags: {'complex' if complex_data else 'real'}\n"
+          f"No. Variables: {len(variables)}\n"
+          f"No. Points: {points}\n"
+          "Variables:\n".encode('latin-1'))
+  for i, (v, kind) in enumerate(variables):
+    f.write(f"\t{i}\t{v}\t{kind}\n".encode('latin-1'))
+
+  values = np.stack([np.asarray(v, dtype=complex if complex_data else float) for v in data], axis=1)
+  if binary:
+    f.write(b"Binary:\n")
+    f.write(values.astype('<c16' if complex_data else '<f8').tobytes())
+    return
+
+  f.write(b"Values:\n")
+  lines = []
+  for k, row in enumerate(values):
+    for i, x in enumerate(row):
+      value = f"{x.real:.15e},{x.imag:.15e}" if complex_data else f"{x:.15e}"
+      lines.append(f" {k}\t{value}" if i == 0 else f"\t{value}")
+  f.write(("\n".join(lines) + "\n\n").encode('latin-1'))
+
+# 20log10|H| and the phase of H(s) = Rl/component_poly(s) (as drawn by -g and
+# -o) at s = j2πf, from the poles, so that orders beyond the range of a float
+# can be compared too
+def transfer(design, f):
+  from .render import transfer as poles
+
+  q, k = poles(design)
+  z = 2j*np.pi*np.asarray(f, dtype=float)/complex(design.wc).real
+  lg = np.full(z.shape, k)
+  phase = np.full(z.shape, 0.0 if (design.Rl.real > 0) == (design.component_poly[0].real > 0) else np.pi)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    for i in range(0, len(q), BLOCK):
+      p = np.ones_like(z)
+      for x in q[i:i+BLOCK]:
+        p *= z - x
+      lg -= np.log2(np.abs(p))
+      phase -= np.angle(p)
+  return 20*np.log10(2)*lg, np.degrees(np.unwrap(phase))
+
+# how far the simulated V(out), v at frequencies f, is from the design's
+# transfer function, wherever that is above floor dB. The transfer function is
+# the voltage ratio, so designs for a current source can't be compared.
+def compare(design, f, v, floor=FLOOR, current=False):
+  if current:
+    raise ValueError("the transfer function is that of a voltage source, so a design for a current source can't be compared with it")
+  db, phase = transfer(design, f)
+  with np.errstate(divide='ignore'):
+    vdb = 20*np.log10(np.abs(v))
+  vphase = np.degrees(np.unwrap(np.angle(v)))
+  compared = db > floor
+  if not compared.any():
+    return Comparison(0.0, 0.0, 0)
+  return Comparison(
+    float(np.abs(vdb - db)[compared].max()),
+    float(np.abs((vphase - phase + 180) % 360 - 180)[compared].max()),
+    int(compared.sum()),
+  )
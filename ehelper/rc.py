@@ -0,0 +1,53 @@
+from collections import namedtuple
+from . import backend
+
+SerialRC = namedtuple('SerialRC', ['tc', 'nepers', 'cutoff'])
+
+def analyse_serial(R, C, m=None):
+  m = backend.get(m)
+
+  twopi = m.fmul(2,m.pi)
+  tc = m.fmul(R,C)
+  nepers = m.fdiv(1,tc)
+  cutoff = m.fmul(nepers,m.fdiv(1,twopi))
+  return SerialRC(tc, nepers, cutoff)
+
+# fraction of full charge reached after the given number of time constants
+def charge_ratio(cycles, m=None):
+  m = backend.get(m)
+  return m.fsub(1,m.exp(m.fsub(0,cycles)))
+
+# number of time constants needed to reach the given fraction of full charge
+def charge_cycles(Vratio, m=None):
+  m = backend.get(m)
+  return m.fsub(0,m.log(m.fsub(1,Vratio)))
+
+def plot_serial(R, C, frequency=False):
+  from mpmath import mpc, fmul, fdiv, fsub, fadd, exp, power, log, sqrt, pi, plot
+
+  twopi = fmul(2,pi)
+  tc = fmul(R,C)
+
+  def H(x):
+    if x > 0:
+      return 1
+    return 0
+
+  def pow10(x):
+    return fmul(power(10,x),twopi)
+
+  def mag(x):
+    return sqrt(fadd(power(x.real,2),power(x.imag,2)))
+
+  def db(x):
+    return fmul(20,log(x,10))
+
+  if frequency:
+    plot(lambda f: db(mag(fdiv(1,fadd(1,fmul(mpc(0, pow10(f)),tc))))), [0,12])
+  else:
+    plot([lambda t: fsub(H(t),fmul(exp(fdiv(-t,tc)),H(t))), lambda t: fmul(exp(fdiv(-t,tc)),H(t))], [-tc, fmul(6,tc)], [0, 1])
+
+def plot_charge(cycles):
+  from mpmath import exp, fsub, plot
+
+  plot([lambda x: fsub(1,exp(fsub(0,x)))], [0, cycles], [0, 1])
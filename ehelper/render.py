@@ -0,0 +1,126 @@
+from base64 import b64encode
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import os
+import struct
+import zlib
+import numpy as np
+
+# Renders |H(s)| = |Rl/component_poly(s)| of a filter design over the complex
+# plane without a display. H is evaluated from the roots of component_poly
+# (the poles) as log|H| = log|k| - sum(log|s - pole|), so orders far beyond the
+# range of a float still render. The grid is split into tiles of rows, which
+# are evaluated as NumPy arrays in a pool of worker processes.
+
+# db holds 20log10|H| with the top row at +im and the left column at -re
+Image = namedtuple('Image', ['db', 're', 'im', 'poles'])
+
+BLOCK = 32 # poles multiplied together between taking logs
+TILE = 64 # rows in a tile
+
+# poles scaled to wc, and log2|H| at wc*z less the sum over the poles
+def transfer(design):
+  import mpmath
+
+  cp = design.component_poly
+  wc = design.wc
+  if design.poles is not None:
+    poles = np.array([-complex(p) for p in design.poles])
+  else:
+    poles = np.roots([complex(x) for x in cp])
+
+  k = mpmath.log(mpmath.fabs(design.Rl), 2) - mpmath.log(mpmath.fabs(cp[0]), 2) - (len(cp)-1)*mpmath.log(mpmath.fabs(wc), 2)
+  return poles/complex(wc), float(k)
+
+def tile(poles, k, re, im, width, height, start, stop):
+  x = np.linspace(re[0], re[1], width)
+  y = np.linspace(im[1], im[0], height)[start:stop]
+  z = x[None,:] + 1j*y[:,None]
+
+  lg = np.full(z.shape, k)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    for i in range(0, len(poles), BLOCK):
+      p = np.ones_like(z)
+      for q in poles[i:i+BLOCK]:
+        p *= z - q
+      lg -= np.log2(np.abs(p))
+  return 20*np.log10(2)*lg
+
+# size is the width and height in pixels, span how far the plane reaches
+# either side of zero (in multiples of wc) and workers the number of processes
+# (one per CPU by default, none when there is a single tile or worker)
+def render(design, size=1000, span=2, workers=None):
+  poles, k = transfer(design)
+  re = im = (-span, span)
+  tiles = [(i, min(i+TILE, size)) for i in range(0, size, TILE)]
+  work = lambda t: (poles, k, re, im, size, size, *t)
+
+  workers = min(workers or os.cpu_count(), len(tiles))
+  if workers > 1:
+    with ProcessPoolExecutor(workers) as pool:
+      rows = list(pool.map(tile, *zip(*map(work, tiles))))
+  else:
+    rows = [tile(*work(t)) for t in tiles]
+
+  wc = float(abs(design.wc))
+  return Image(np.concatenate(rows), (-span*wc, span*wc), (-span*wc, span*wc), poles*wc)
+
+# a few points of the viridis colour map, interpolated linearly
+COLOURS = np.array([(68, 1, 84), (59, 82, 139), (33, 145, 140), (94, 201, 98), (253, 231, 37)], dtype=float)
+
+# the dB range is taken from the 1st to the 99th percentile so the poles
+# (where |H| is infinite) don't wash out the rest of the plane
+def colours(db, lo=None, hi=None):
+  finite = db[np.isfinite(db)]
+  if lo is None:
+    lo = np.percentile(finite, 1) if len(finite) else 0
+  if hi is None:
+    hi = np.percentile(finite, 99) if len(finite) else 1
+  with np.errstate(invalid='ignore'):
+    t = np.clip((np.nan_to_num(db, nan=lo, posinf=hi, neginf=lo) - lo)/((hi - lo) or 1), 0, 1)*(len(COLOURS)-1)
+  i = np.minimum(t.astype(int), len(COLOURS)-2)
+  f = (t - i)[..., None]
+  return np.round(COLOURS[i]*(1-f) + COLOURS[i+1]*f).astype(np.uint8)
+
+def png(rgb):
+  height, width, _ = rgb.shape
+  chunk = lambda kind, data: struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+  rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rgb.reshape(height, -1)], axis=1)
+  return (b'\x89PNG\r\n\x1a\n' +
+    chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) +
+    chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)) +
+    chunk(b'IEND', b''))
+
+# the PNG with axes and a cross on each pole
+def svg(image):
+  height, width = image.db.shape
+  m = 60
+  x = lambda v: m + (v - image.re[0])/(image.re[1] - image.re[0])*width
+  y = lambda v: m + (image.im[1] - v)/(image.im[1] - image.im[0])*height
+
+  s = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width+2*m}" height="{height+2*m}" font-family="sans-serif" font-size="12">',
+    f'<image x="{m}" y="{m}" width="{width}" height="{height}" href="data:image/png;base64,{b64encode(png(colours(image.db))).decode()}"/>',
+    f'<rect x="{m}" y="{m}" width="{width}" height="{height}" fill="none" stroke="black"/>']
+  for v in np.linspace(*image.re, 5):
+    s.append(f'<text x="{x(v):.1f}" y="{height+m+16}" text-anchor="middle">{v:.4g}</text>')
+  for v in np.linspace(*image.im, 5):
+    s.append(f'<text x="{m-4}" y="{y(v)+4:.1f}" text-anchor="end">{v:.4g}j</text>')
+  for p in image.poles:
+    if image.re[0] <= p.real <= image.re[1] and image.im[0] <= p.imag <= image.im[1]:
+      s.append(f'<path d="M{x(p.real)-3:.1f},{y(p.imag)-3:.1f}l6,6m0,-6l-6,6" stroke="white"/>')
+  s.append('</svg>')
+  return '\n'.join(s) + '\n'
+
+# the format is chosen by the extension: .png, .svg or .npy (the dB values)
+def write(image, filename):
+  ext = os.path.splitext(filename)[1].lower()
+  if ext == '.npy':
+    np.save(filename, image.db)
+  elif ext == '.svg':
+    with open(filename, 'w') as f:
+      f.write(svg(image))
+  elif ext == '.png':
+    with open(filename, 'wb') as f:
+      f.write(png(colours(image.db)))
+  else:
+    raise ValueError(f"can't write {filename}: the graph is written as .png, .svg or .npy")
@@ -0,0 +1,76 @@
+from collections import namedtuple
+from . import backend
+
+# phases (Ptot, Pl and Pll) are in degrees
+SerialRL = namedtuple('SerialRL', ['Isrc', 'Ptot', 'Ztot', 'Rtot', 'Xtot', 'Pl', 'Zl', 'Rl', 'Xl', 'Pll', 'Zll', 'Rll', 'Xll', 'Vtot', 'Vr', 'Vl', 'Vlr', 'Vll'])
+SerialRLDesign = namedtuple('SerialRLDesign', ['Ptot', 'Ztot', 'Rtot', 'Xtot', 'Pl', 'Zl', 'Rl', 'Xl', 'Rr', 'Vr', 'Vl'])
+
+def d2r(m, rads):
+  return m.fdiv(m.fmul(rads,m.pi),180)
+
+def r2d(m, rads):
+  return m.fdiv(m.fmul(rads,180),m.pi)
+
+# all voltages are RMS
+def analyse_serial(Vsrc, Vr, Vl, Rr, Rlr, m=None):
+  m = backend.get(m)
+
+  Itot = Ill = Il = Ilr = Ir = Isrc = m.fdiv(Vr,Rr)
+  Ztot = m.fdiv(Vsrc,Isrc)
+  Vtot = m.fmul(Itot, Ztot)
+  Zl = m.fdiv(Vl,Il)
+
+  Pl = m.acos(m.fdiv(m.fsub(m.fsub(m.power(Ztot,2),m.power(Rr,2)),m.power(Zl,2)),m.fmul(2,m.fmul(Rr,Zl))))
+  Rl = m.fmul(Zl,m.cos(Pl))
+  Rtot = Rl + Rr
+  Xll = Xl = Xtot = m.fmul(Zl,m.sin(Pl))
+  Ptot = m.acos(m.fdiv(Rtot,Ztot))
+
+  Rll = Rl - Rlr
+  Zll = m.sqrt(m.fadd(m.power(Rll,2),m.power(Xll,2)))
+  Pll = m.acos(m.fdiv(Rll,Zll))
+  Vll = m.fmul(Ill,Zll)
+
+  Vlr = m.fmul(Ilr,Rlr)
+
+  return SerialRL(Isrc, r2d(m, Ptot), Ztot, Rtot, Xtot, r2d(m, Pl), Zl, Rl, Xl, r2d(m, Pll), Zll, Rll, Xll, Vtot, Vr, Vl, Vlr, Vll)
+
+# VP is what value gives for the inductor: 'V' its (RMS) voltage, 'P' the phase (in degrees)
+# or 'R' the ratio of its impedance to the resistor's
+def design_serial(Vsrc, Vf, Rl, Ll, VP, value, m=None):
+  m = backend.get(m)
+
+  Xl = Xtot = m.fmul(m.fmul(m.fmul(2,m.pi),Vf),Ll)
+  Zl = m.sqrt(m.fadd(m.power(Rl,2),m.power(Xl,2)))
+  Pl = m.acos(m.fdiv(Rl,Xl))
+
+  Vtot = Vsrc
+
+  if VP == 'V':
+    Vl = value
+    Il = Ir = Itot = m.fdiv(Vl,Zl)
+    Ztot = m.fdiv(Vtot,Itot)
+  elif VP == 'P':
+    Ptot = d2r(m, value)
+    Ztot = m.fdiv(Xtot,m.sin(Ptot))
+  elif VP == 'R':
+    Rr = m.fdiv(Zl, value)
+    Rtot = m.fadd(Rr, Rl)
+    Ztot = m.sqrt(m.fadd(m.power(Rtot,2),m.power(Xtot,2)))
+  else:
+    raise ValueError(f"VP must be V, P or R (not {VP})")
+
+  if VP == 'P' or VP == 'R':
+    Il = Ir = Itot = m.fdiv(Vtot,Ztot)
+    Vl = m.fmul(Il, Zl)
+
+  if VP == 'V' or VP == 'P':
+    Rtot = m.sqrt(m.fsub(m.power(Ztot,2),m.power(Xtot,2)))
+    Rr = m.fsub(Rtot,Rl)
+
+  if VP == 'V' or VP == 'R':
+    Ptot = m.asin(m.fdiv(Xtot,Ztot))
+
+  Vr = m.fmul(Ir, Rr)
+
+  return SerialRLDesign(r2d(m, Ptot), Ztot, Rtot, Xtot, r2d(m, Pl), Zl, Rl, Xl, Rr, Vr, Vl)
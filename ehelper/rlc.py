@@ -0,0 +1,117 @@
+from collections import namedtuple
+from . import backend
+
+RLC = namedtuple('RLC', ['R', 'L', 'C', 'w0', 'f0', 'dw', 'bw', 'q', 'd', 'z0', 'lwco', 'lzco', 'ldbco', 'uwco', 'uzco', 'udbco', 'bwpower'])
+
+def serial_z(m, r, l, c):
+  xl = lambda w: m.fmul(l,w)
+  xc = lambda w: m.fdiv(1,m.fmul(c,w))
+  return lambda w: m.sqrt(m.fadd(m.power(m.fsub(xl(w),xc(w)),2),m.power(r,2)))
+
+def parallel_z(m, r, l, c):
+  xl = lambda w: m.fmul(l,w)
+  xc = lambda w: m.fdiv(1,m.fmul(c,w))
+  return lambda w: m.fdiv(1,m.sqrt(m.fadd(m.power(m.fdiv(1,r),2),m.power(m.fadd(m.fdiv(1,xl(w)),m.fdiv(1,m.fmul(-1,xc(w)))),2))))
+
+# z at resonance and at the two cut-off frequencies, along with the gain (in dB) at the cut-offs
+def cutoffs(m, r, l, c, w0, a, parallel):
+  if parallel:
+    z = parallel_z(m, r, l, c)
+    ratio = lambda z: m.fdiv(z,r)
+  else:
+    z = serial_z(m, r, l, c)
+    ratio = lambda z: m.fdiv(r,z)
+  ratio2db = lambda r: m.fmul(20,m.log10(r))
+
+  z0 = z(w0)
+  lwco = m.fsub(w0,a)
+  lzco = z(lwco)
+  ldbco = ratio2db(ratio(lzco))
+  uwco = m.fadd(w0,a)
+  uzco = z(uwco)
+  udbco = ratio2db(ratio(uzco))
+  bwpower = m.power(10,m.fdiv(m.fadd(ldbco,udbco),20))
+  return z0, lwco, lzco, ldbco, uwco, uzco, udbco, bwpower
+
+def analyse_serial(R, L, C, m=None):
+  m = backend.get(m)
+  r = R
+  l = L
+  c = C
+
+  w0 = m.fdiv(1,m.sqrt(m.fmul(l,c)))
+  f0 = m.fdiv(w0,m.fmul(2,m.pi))
+  x0 = m.fdiv(1,m.fmul(c,w0))
+  q = m.fdiv(x0,r)
+  dw = m.fdiv(w0,q)
+  a = m.fdiv(dw,2)
+  bw = m.fdiv(dw,m.fmul(2,m.pi))
+  d = m.fdiv(a,w0)
+  return RLC(r, l, c, w0, f0, dw, bw, q, d, *cutoffs(m, r, l, c, w0, a, False))
+
+def analyse_parallel(R, L, C, m=None):
+  m = backend.get(m)
+  r = R
+  l = L
+  c = C
+
+  w0 = m.fdiv(1,m.sqrt(m.fmul(l,c)))
+  f0 = m.fdiv(w0,m.fmul(2,m.pi))
+  a = m.fdiv(1,m.fmul(2,m.fmul(r,c)))
+  d = m.fdiv(a,w0)
+  q = m.fmul(r,m.sqrt(m.fdiv(c,l)))
+  dw = m.fmul(2,a)
+  bw = m.fdiv(dw,m.fmul(2,m.pi))
+  return RLC(r, l, c, w0, f0, dw, bw, q, d, *cutoffs(m, r, l, c, w0, a, True))
+
+def design(f0, bw, component, value, parallel, m):
+  w0 = m.fmul(2,m.fmul(m.pi,f0))
+  dw = m.fmul(2,m.fmul(m.pi,bw))
+  a = m.fdiv(dw,2)
+  q = m.fdiv(w0,dw)
+  d = m.fdiv(a,w0)
+
+  match component:
+    case "L":
+      l = value
+      c = m.fdiv(1,m.fmul(m.power(w0,2),l))
+      r = m.fdiv(1,m.fmul(2,m.fmul(c,a))) if parallel else m.fmul(a, m.fmul(2, l))
+    case "C":
+      c = value
+      l = m.fdiv(1,m.fmul(m.power(w0,2),c))
+      r = m.fdiv(1,m.fmul(2,m.fmul(c,a))) if parallel else m.fmul(a, m.fmul(2, l))
+    case "R":
+      r = value
+      if parallel:
+        c = m.fdiv(1,m.fmul(2,m.fmul(r,a)))
+        l = m.fdiv(1,m.fmul(m.power(w0,2),c))
+      else:
+        l = m.fdiv(r,m.fmul(2,a))
+        c = m.fdiv(1,m.fmul(m.power(w0,2),l))
+    case _:
+      raise ValueError(f"component must be R, L or C (not {component})")
+
+  return RLC(r, l, c, w0, f0, dw, bw, q, d, *cutoffs(m, r, l, c, w0, a, parallel))
+
+def design_serial(f0, bw, component, value, m=None):
+  return design(f0, bw, component, value, False, backend.get(m))
+
+def design_parallel(f0, bw, component, value, m=None):
+  return design(f0, bw, component, value, True, backend.get(m))
+
+def plot_response(rlc, parallel):
+  from mpmath import fmul, fdiv, power, log10, plot
+
+  m = backend.load('mpmath')
+  r = rlc.R
+  w0 = rlc.w0
+  if parallel:
+    z = parallel_z(m, r, rlc.L, rlc.C)
+    ratio = lambda z: fdiv(z,r)
+  else:
+    z = serial_z(m, r, rlc.L, rlc.C)
+    ratio = lambda z: fdiv(r,z)
+
+  w0pow10 = lambda n: fmul(w0,power(10,n))
+  ratio2db = lambda r: fmul(20,log10(r))
+  plot([lambda x: ratio2db(ratio(z(w0pow10(x))))], [-1,1], [ratio2db(ratio(z(w0pow10(-1)))),1])
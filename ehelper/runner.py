@@ -0,0 +1,142 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import inspect
+import os
+import re
+import shlex
+import signal
+import subprocess
+import numpy as np
+from . import ac, filters, rawfile, server
+
+# Runs the decks of many dbf, dcf and dctf designs through ngspice (or any
+# simulator that takes a deck and writes a raw file, such as spice.py) and
+# checks each AC response against the one its ladder should have (from
+# ehelper.ac). The designs are requests as the server takes them, with an
+# optional id naming their files. A job holds its deck as a netlist.Netlist
+# and writes it without the .control block, so the simulator only runs the
+# .ac sweep and writes the raw file, runs the command with a timeout and
+# reads back V(out), which is also compared with the design's own transfer
+# function when it has a voltage source. The simulators are processes of
+# their own, so the pool is of threads, each waiting on one. A simulator is
+# started in a session of its own, so that on a timeout everything it started
+# (e.g. the simulator under a sh -c) is killed with it.
+
+TOOLS = ['dbf', 'dcf', 'dctf']
+TITLES = {'dcf': "Passive Chebyshev", 'dctf': "Cauer Topology Filter"}
+COMMAND = 'ngspice -b -r {raw} {deck}'
+TIMEOUT = 60 # seconds
+DB = 0.1 # largest difference in dB that passes
+PHASE = 1 # and in degrees
+FLOOR = -100 # dB, below which the response isn't compared
+
+Job = namedtuple('Job', ['name', 'deck', 'ladder', 'current', 'design'])
+
+# status is pass, fail, error or timeout; db and phase are the largest
+# differences from the ladder's response over the points compared, and
+# transfer the rawfile.Comparison with the transfer function (None for a
+# current source)
+Result = namedtuple('Result', ['name', 'status', 'db', 'phase', 'points', 'message', 'raw', 'transfer'])
+
+def failed(name, status, message, raw=None):
+  return Result(name, status, None, None, 0, message, raw, None)
+
+# the design of a request, or a Result when it can't be designed
+def design(request, index, m=None):
+  name = f"design-{index}"
+  try:
+    if not isinstance(request, dict) or request.get('tool') not in TOOLS:
+      raise ValueError(f"tool must be one of {', '.join(TOOLS)}")
+    name = re.sub(r'[^\w.-]', '_', str(request.get('id', f"{request['tool']}-{index}")))
+    tool = server.TOOLS[request['tool']]
+    args = request.get('args', {})
+    bound = inspect.signature(tool).bind(*args) if isinstance(args, list) else inspect.signature(tool).bind(**args)
+    bound.apply_defaults()
+    a = bound.arguments
+    a['m'] = m
+    d = tool(**a)
+  except Exception as e:
+    return failed(name, 'error', f"{type(e).__name__}: {e}")
+
+  if request['tool'] == 'dbf':
+    ladder = filters.butterworth_ladder(d['components'], a['R'], a['source'])
+    deck = filters.butterworth_netlist(d['components'], a['R'], a['source'], a['current'])
+  else:
+    ladder = d['components']
+    deck = filters.ladder_netlist(d['components'], a['current'], TITLES[request['tool']])
+  return Job(name, deck, ladder, a['current'], filters.Filter(**{k: d[k] for k in filters.Filter._fields}))
+
+# the largest differences between V(out) and the ladder's response at f
+def compare(job, f, v, floor=FLOOR):
+  expected = ac.response(job.ladder, job.current, f)
+  with np.errstate(divide='ignore'):
+    db = 20*np.log10(np.abs(v))
+  phase = np.degrees(np.unwrap(np.angle(v)))
+  compared = expected.db > floor
+  if not compared.any():
+    return 0.0, 0.0, 0
+  d = np.abs(db - expected.db)[compared]
+  p = np.abs((phase - expected.phase + 180) % 360 - 180)[compared]
+  return float(d.max()), float(p.max()), int(compared.sum())
+
+def run(job, command=COMMAND, directory='.', timeout=TIMEOUT, db=DB, phase=PHASE, floor=FLOOR):
+  deck = os.path.join(directory, job.name + '.cir')
+  raw = os.path.join(directory, job.name + '.raw')
+  with open(deck, 'w') as f:
+    job.deck.write(f, control=False)
+  # so a simulator that writes nothing can't pass on an earlier run's file
+  if os.path.exists(raw):
+    os.remove(raw)
+
+  try:
+    p = subprocess.Popen([t.format(deck=deck, raw=raw) for t in shlex.split(command)], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, start_new_session=True)
+  except OSError as e:
+    return failed(job.name, 'error', str(e))
+  try:
+    stdout, stderr = p.communicate(timeout=timeout)
+  except subprocess.TimeoutExpired:
+    try:
+      os.killpg(p.pid, signal.SIGKILL)
+    except ProcessLookupError:
+      pass
+    p.communicate()
+    return failed(job.name, 'timeout', f"no result within {timeout}s")
+  if p.returncode:
+    lines = (stderr or stdout).strip().splitlines()
+    return failed(job.name, 'error', f"the simulator exited with {p.returncode}" + (f": {lines[-1]}" if lines else ""))
+
+  try:
+    f, v = rawfile.ac(rawfile.read(raw))
+  except (OSError, ValueError) as e:
+    return failed(job.name, 'error', f"{raw}: {e}", raw)
+
+  e_db, e_phase, points = compare(job, f, v, floor)
+  ok = e_db <= db and e_phase <= phase
+  transfer = None
+  if not job.current:
+    transfer = rawfile.compare(job.design, f, v, floor)
+    ok = ok and transfer.db <= db and transfer.phase <= phase
+  return Result(job.name, 'pass' if ok else 'fail', e_db, e_phase, points, None, raw, transfer)
+
+# the jobs, with an error in place of any whose name (and so whose files) an
+# earlier job already has
+def unique(jobs):
+  names = set()
+  checked = []
+  for job in jobs:
+    if isinstance(job, Job):
+      if job.name in names:
+        job = failed(job.name, 'error', f"another design is already named {job.name}, so their files would overwrite each other")
+      names.add(job.name)
+    checked.append(job)
+  return checked
+
+# runs every job, at most workers (one per CPU by default) at a time, giving
+# the results in order
+def run_many(jobs, command=COMMAND, directory='.', workers=None, timeout=TIMEOUT, db=DB, phase=PHASE, floor=FLOOR):
+  os.makedirs(directory, exist_ok=True)
+  jobs = unique(jobs)
+  def one(job):
+    return job if isinstance(job, Result) else run(job, command, directory, timeout, db, phase, floor)
+  with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+    return list(pool.map(one, jobs))
@@ -0,0 +1,210 @@
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+import asyncio
+import json
+import logging
+import math
+import os
+from . import backend, cache, diode, bjt, rlc, rl, transformer, rc, filters
+
+def apt(cycles=None, Vratio=None, m=None):
+  if Vratio is not None:
+    return {'cycles': rc.charge_cycles(Vratio, m)}
+  return {'Vratio': rc.charge_ratio(cycles, m)}
+
+def dbf(fc, N, R, source=False, radians=False, current=False, ngspice=False, engine='auto', m=None):
+  d = filters.butterworth(fc, N, R, source, radians, current, m, engine)
+  return with_netlist(d, ngspice, lambda f: filters.write_butterworth_ngspice(f, d.components, R, source, current))
+
+def dcf(fc, N, R, e=1, radians=False, current=False, ngspice=False, engine='auto', m=None):
+  d = filters.chebyshev(fc, N, R, e, radians, current, m, engine)
+  return with_netlist(d, ngspice, lambda f: filters.write_ladder_ngspice(f, d.components, current, "Passive Chebyshev"))
+
+def dctf(C, wc=1, rs=1, current=False, ngspice=False, expansion=False, m=None):
+  d = filters.cauer(C, wc, rs, current, m, expansion)
+  return with_netlist(d, ngspice, lambda f: filters.write_ladder_ngspice(f, d.components, current, "Cauer Topology Filter"))
+
+def with_netlist(d, ngspice, write):
+  r = d._asdict()
+  if ngspice:
+    f = StringIO()
+    write(f)
+    r['ngspice'] = f.getvalue()
+  return r
+
+# the arguments are those of the library functions, so voltages are RMS and
+# afce's Rs is left out (or null) when there is no source resistor
+TOOLS = {
+  'asd': diode.analyse_serial,
+  'apd': diode.analyse_parallel,
+  'dsd': diode.design_serial,
+  'dpd': diode.design_parallel,
+  'ascc': bjt.analyse_serial_cc,
+  'apcc': bjt.analyse_parallel_cc,
+  'afce': bjt.analyse_shunt_ce,
+  'asrlc': rlc.analyse_serial,
+  'aprlc': rlc.analyse_parallel,
+  'dsrlc': rlc.design_serial,
+  'dprlc': rlc.design_parallel,
+  'asrl': rl.analyse_serial,
+  'dsrl': rl.design_serial,
+  'at': transformer.analyse,
+  'dt': transformer.design,
+  'asrc': rc.analyse_serial,
+  'apt': apt,
+  'dbf': dbf,
+  'dcf': dcf,
+  'dctf': dctf,
+}
+
+# a float, or None when it isn't finite, as JSON has no inf or nan
+def number(x):
+  x = float(x)
+  return x if math.isfinite(x) else None
+
+# mpf/mpc and NumPy values become plain floats (null when not finite), complex
+# values [re, im]
+def encode(v):
+  if v is None or isinstance(v, (bool, int, str)):
+    return v
+  if isinstance(v, filters.Component):
+    return {'name': f"{v.letter}{v.number}", 'value': encode(v.value)}
+  if hasattr(v, '_asdict'):
+    v = v._asdict()
+  if isinstance(v, dict):
+    return {k: encode(x) for k, x in v.items()}
+  if hasattr(v, 'tolist'):
+    v = v.tolist()
+  if isinstance(v, (list, tuple)):
+    return [encode(x) for x in v]
+  if isinstance(v, complex) or type(v).__name__ == 'mpc':
+    return [number(v.real), number(v.imag)]
+  return number(v)
+
+# a request is {"tool": "asd", "args": {"Vs": 5, "R": 470}} (or "args": [5, 470]),
+# optionally with "backend", "dps" and an "id" that is copied to the reply
+def run(request):
+  reply = {'id': request['id']} if isinstance(request, dict) and 'id' in request else {}
+  # the request itself is checked first, so that errors from the calculation
+  # (a KeyError among them) are reported as what they are
+  if not isinstance(request, dict) or 'tool' not in request:
+    reply['error'] = "a request is a JSON object with a tool"
+    return reply
+  if not isinstance(request['tool'], str) or request['tool'] not in TOOLS:
+    reply['error'] = f"unknown tool: {request['tool']}"
+    return reply
+  args = request.get('args', {})
+  if not isinstance(args, (list, dict)):
+    reply['error'] = "args must be a JSON array or object"
+    return reply
+
+  try:
+    tool = TOOLS[request['tool']]
+    m = backend.load(request.get('backend', 'mpmath'), request.get('dps', 15))
+    if isinstance(args, list):
+      r = cache.call(store, request['tool'], tool, *args, m=m)
+    else:
+      r = cache.call(store, request['tool'], tool, **args, m=m)
+    reply['result'] = encode(r)
+  except Exception as e:
+    reply['error'] = f"{type(e).__name__}: {e}"
+  return reply
+
+def run_many(requests):
+  return [run(r) for r in requests]
+
+# each worker's cache (None when the server was not given one)
+store = None
+
+def warm_up(directory=None, size=cache.SIZE):
+  global store
+  backend.load('mpmath')
+  if directory:
+    store = cache.Cache(directory, size)
+
+class Server:
+  # longest request line accepted, which bounds the size of a batch
+  limit = 64*1024*1024
+  # requests read ahead of the client taking their replies, after which
+  # reading stops until it does
+  pipeline = 256
+
+  def __init__(self, workers=None, chunk=64, cache_directory=None, cache_size=cache.SIZE):
+    self.workers = workers or os.cpu_count()
+    self.chunk = chunk
+    self.pool = ProcessPoolExecutor(self.workers, initializer=warm_up, initargs=(cache_directory, cache_size))
+
+  # a batch is split into at most one chunk per worker (of no more than
+  # self.chunk requests) so the cost of handing work to the pool is shared
+  async def handle(self, request):
+    loop = asyncio.get_running_loop()
+    if not isinstance(request, list):
+      return await loop.run_in_executor(self.pool, run, request)
+
+    size = max(1, min(self.chunk, -(-len(request) // self.workers)))
+    chunks = [request[i:i+size] for i in range(0, len(request), size)]
+    replies = await asyncio.gather(*[loop.run_in_executor(self.pool, run_many, c) for c in chunks])
+    return [r for c in replies for r in c]
+
+  # one JSON request (or array of requests) per line, answered by one line in the same order
+  async def client(self, reader, writer):
+    peer = writer.get_extra_info('peername')
+    logging.info(f'connected: {peer}')
+    pending = asyncio.Queue(self.pipeline)
+
+    # once the client has gone the replies are still taken off the queue, so
+    # the reader is never left waiting on a full one
+    async def reply():
+      gone = False
+      while (task := await pending.get()) is not None:
+        result = await task
+        if gone:
+          continue
+        try:
+          writer.write(json.dumps(result, allow_nan=False).encode() + b"\n")
+          await writer.drain()
+        except ConnectionError:
+          gone = True
+
+    async def error(message):
+      future = asyncio.get_running_loop().create_future()
+      future.set_result({'error': message})
+      await pending.put(future)
+
+    replier = asyncio.create_task(reply())
+    try:
+      while True:
+        try:
+          line = await reader.readline()
+        except ValueError:
+          await error(f"request longer than {self.limit} bytes")
+          break
+        except ConnectionError:
+          break
+        if not line:
+          break
+        if not line.strip():
+          continue
+        try:
+          request = json.loads(line)
+        except ValueError as e:
+          await error(f"invalid JSON: {e}")
+          continue
+        await pending.put(asyncio.create_task(self.handle(request)))
+    finally:
+      await pending.put(None)
+      await replier
+      writer.close()
+      logging.info(f'disconnected: {peer}')
+
+  async def serve(self, socket=None, host='127.0.0.1', port=None):
+    if socket:
+      server = await asyncio.start_unix_server(self.client, socket, limit=self.limit)
+    else:
+      server = await asyncio.start_server(self.client, host, port, limit=self.limit)
+    logging.info(f'listening on {socket or (host, port)} with {self.workers} workers')
+    async with server:
+      await server.serve_forever()
+
+  def close(self):
+    self.pool.shutdown()
@@ -0,0 +1,107 @@
+from collections import namedtuple
+import warnings
+import numpy as np
+from .tolerance import DISTRIBUTIONS, PERCENTILES
+
+# Monte Carlo spread of a circuit's operating point. The analysis functions of
+# bjt (and diode) already take arrays through the numpy backend, the bias
+# point being a Lambert W of every sample at once, so each block of samples is
+# a single call with every parameter that varies given as an array.
+
+# the percentiles asked for and, for each quantity, its value at each of them;
+# unsolved is the number of samples without a real operating point (with any
+# quantity NaN), which the percentiles leave out
+Summary = namedtuple('Summary', ['percentiles', 'quantities', 'samples', 'unsolved'])
+
+BLOCK = 1 << 18 # samples solved at once
+
+# the results reported for each bjt analysis; the shunt feedback stage's input
+# and output resistances are Rbase and Rleq
+QUANTITIES = {
+  'analyse_serial_cc': ['Ic', 'Vload', 'Av', 'Rin', 'Rout'],
+  'analyse_parallel_cc': ['Ic', 'Vload', 'Av', 'Rin', 'Rout'],
+  'analyse_shunt_ce': ['Ic', 'Vload', 'Av', 'Rbase', 'Rleq'],
+}
+
+# "Beta=100:600" (a range) or "Rload=5" (a percentage either side of the
+# nominal value) -> {'Beta': (100.0, 600.0), 'Rload': 0.05}. R stands for
+# every resistor without a spread of its own.
+def spreads(specs, nominal):
+  s = {}
+  for spec in specs:
+    name, _, value = spec.partition("=")
+    names = [n for n in nominal if n.startswith('R') and nominal[n] is not None] if name == 'R' else [name]
+    if not value or not names or any(n not in nominal or nominal[n] is None for n in names):
+      raise ValueError(f"a spread is R or one of {', '.join(n for n in nominal if nominal[n] is not None)} and a percentage or a range, as in Beta=100:600 (not {spec})")
+    lo, colon, hi = value.partition(":")
+    if colon:
+      lo, hi = float(lo), float(hi)
+      if not 0 < lo <= hi:
+        raise ValueError(f"a range is two positive values, the lower first (not {spec})")
+      x = (lo, hi)
+    else:
+      x = float(value)/100
+      if not 0 <= x < 1:
+        raise ValueError(f"a percentage is from 0 up to 100, so the values stay positive (not {spec})")
+    for n in names:
+      # the resistors' own spreads take precedence over R's, whichever comes first
+      if name == 'R' and n in s:
+        continue
+      s[n] = x
+  return s
+
+# a range is drawn uniformly between its bounds, or with a normal distribution
+# they are three standard deviations either side of its middle and the 0.27%
+# of draws beyond them are drawn again, so that no sample is outside the range
+# (a Beta, R or N of zero or less has no operating point)
+def between(rng, n, lo, hi, distribution):
+  if distribution != 'normal':
+    return rng.uniform(lo, hi, n)
+  x = rng.normal((lo + hi)/2, (hi - lo)/6, n)
+  while (outside := (x < lo) | (x > hi)).any():
+    x[outside] = rng.normal((lo + hi)/2, (hi - lo)/6, outside.sum())
+  return x
+
+# a range is drawn on a log scale for Is, which spans decades from part to
+# part, and a percentage is the range of that much either side of the value
+
+def sample(rng, n, nominal, spread, distribution):
+  values = dict(nominal)
+  for name, x in spread.items():
+    if isinstance(x, tuple) and name == 'Is':
+      values[name] = np.exp(between(rng, n, *np.log(x), distribution))
+    elif isinstance(x, tuple):
+      values[name] = between(rng, n, *x, distribution)
+    else:
+      values[name] = nominal[name]*between(rng, n, 1 - x, 1 + x, distribution)
+  return values
+
+# function is one of bjt's analyses, nominal its arguments by name (without
+# m) and spread what spreads() gives
+def analyse(function, nominal, spread, samples=100000, distribution='uniform', seed=None, quantities=None, percentiles=PERCENTILES):
+  if distribution not in DISTRIBUTIONS:
+    raise ValueError(f"distribution must be one of {', '.join(DISTRIBUTIONS)} (not {distribution})")
+  if samples < 1:
+    raise ValueError(f"at least one sample must be taken (not {samples})")
+  quantities = quantities or QUANTITIES[function.__name__]
+
+  rng = np.random.default_rng(seed)
+  results = {q: [] for q in quantities}
+  for i in range(0, samples, BLOCK):
+    n = min(BLOCK, samples - i)
+    r = function(**sample(rng, n, nominal, spread, distribution), m='numpy')._asdict()
+    for q in quantities:
+      results[q].append(np.broadcast_to(np.real(r[q]), (n,)))
+
+  results = {q: np.concatenate(v) for q, v in results.items()}
+  unsolved = int(np.logical_or.reduce([np.isnan(v) for v in results.values()]).sum())
+  with warnings.catch_warnings():
+    # every sample of a quantity may be NaN, whose percentiles are then NaN too
+    warnings.simplefilter('ignore', RuntimeWarning)
+    return Summary(percentiles, {q: np.nanpercentile(v, percentiles) for q, v in results.items()}, samples, unsolved)
+
+# "Ic: 1% 0.0041, 5% 0.00415, ..." for each quantity, after how many samples
+# were left out when any were
+def summary_strings(s):
+  unsolved = [f"Unsolved: {s.unsolved} of {s.samples} samples have no operating point and are left out"] if s.unsolved else []
+  return unsolved + [f"{q}: " + ", ".join(f"{p}% {x:.6g}" for p, x in zip(s.percentiles, v)) for q, v in s.quantities.items()]
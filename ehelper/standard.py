@@ -0,0 +1,96 @@
+from bisect import bisect_left
+from collections import namedtuple
+from functools import lru_cache
+
+# The IEC 60063 E series of preferred values, for matching design outputs to
+# parts that can be bought. Each series is expanded once into a sorted table
+# over every decade in use (1f to 1T), so the nearest part is a bisection and
+# the best pair of parts takes one bisection for each candidate larger (or, in
+# parallel, smaller) part: only the parts within a factor of two of the target
+# can be that one, so a pair costs O(k log n) rather than O(n²).
+
+SERIES = {
+  'E12': [1.0, 1.2, 1.5, 1.8, 2.2, 2.7, 3.3, 3.9, 4.7, 5.6, 6.8, 8.2],
+  'E24': [1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7, 3.0, 3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1],
+  'E96': [1.00, 1.02, 1.05, 1.07, 1.10, 1.13, 1.15, 1.18, 1.21, 1.24, 1.27, 1.30, 1.33, 1.37, 1.40, 1.43,
+          1.47, 1.50, 1.54, 1.58, 1.62, 1.65, 1.69, 1.74, 1.78, 1.82, 1.87, 1.91, 1.96, 2.00, 2.05, 2.10,
+          2.15, 2.21, 2.26, 2.32, 2.37, 2.43, 2.49, 2.55, 2.61, 2.67, 2.74, 2.80, 2.87, 2.94, 3.01, 3.09,
+          3.16, 3.24, 3.32, 3.40, 3.48, 3.57, 3.65, 3.74, 3.83, 3.92, 4.02, 4.12, 4.22, 4.32, 4.42, 4.53,
+          4.64, 4.75, 4.87, 4.99, 5.11, 5.23, 5.36, 5.49, 5.62, 5.76, 5.90, 6.04, 6.19, 6.34, 6.49, 6.65,
+          6.81, 6.98, 7.15, 7.32, 7.50, 7.68, 7.87, 8.06, 8.25, 8.45, 8.66, 8.87, 9.09, 9.31, 9.53, 9.76],
+}
+DECADES = range(-15, 13)
+
+# value is what the parts make, connection is None for a single part (or
+# 'series' or 'parallel') and error is value/x - 1
+Match = namedtuple('Match', ['value', 'parts', 'connection', 'error'])
+Choices = namedtuple('Choices', ['single', 'series', 'parallel'])
+
+@lru_cache
+def table(series):
+  if series not in SERIES:
+    raise ValueError(f"series must be one of {', '.join(SERIES)} (not {series})")
+  return [float(f"{v*10.0**d:.3g}") for d in DECADES for v in SERIES[series]]
+
+# the parts in t either side of x
+def around(t, x):
+  i = bisect_left(t, x)
+  return t[max(i-1,0):i+1]
+
+def check(x, t):
+  x = float(x)
+  if not t[0] <= x <= t[-1]:
+    raise ValueError(f"{x} is outside the standard parts ({t[0]} to {t[-1]})")
+  return x
+
+def nearest(x, series='E24'):
+  t = table(series)
+  x = check(x, t)
+  v = min(around(t, x), key=lambda v: abs(v - x))
+  return Match(v, (v,), None, v/x - 1)
+
+# the best two parts in series or in parallel for x. Their values add (a + b)
+# for resistors and inductors in series and capacitors in parallel, and
+# otherwise combine as ab/(a + b). a is taken over the parts that can be the
+# larger of two that add (x/2 to x) or the smaller of two that don't (x to
+# 2x), and b is one of the two either side of what the rest would need.
+def pair(x, series='E24', parallel=False, capacitor=False):
+  t = table(series)
+  x = check(x, t)
+  add = parallel == capacitor
+  # a little either side of the bounds, for the pairs whose value misses x
+  # (where b is then the smallest or largest part)
+  lo, hi = (0.49*x, 1.01*x) if add else (0.99*x, 2.02*x)
+  best = None
+  for a in t[bisect_left(t, lo):bisect_left(t, hi)]:
+    if add:
+      rest = x - a if a < x else t[0]
+    else:
+      rest = 1/(1/x - 1/a) if a > x else t[-1]
+    for b in around(t, rest):
+      v = a + b if add else a*b/(a + b)
+      if best is None or abs(v/x - 1) < abs(best.error):
+        best = Match(v, (a, b), 'parallel' if parallel else 'series', v/x - 1)
+  return best
+
+def choose(x, series='E24', capacitor=False):
+  return Choices(nearest(x, series), pair(x, series, False, capacitor), pair(x, series, True, capacitor))
+
+def part_string(match):
+  if match.connection is None:
+    return f"{match.value:.6g}"
+  a, b = match.parts
+  return f"{a:.6g} {'+' if match.connection == 'series' else '||'} {b:.6g} = {match.value:.6g}"
+
+# "R: 430 (-2.8%), 360 + 82 = 442 (-0.069%), 470 || 7500 = 442.284 (-0.0053%)",
+# where + is a series pair and || a parallel one
+def choices_string(name, c):
+  return f"{name}: " + ", ".join(f"{part_string(x)} ({x.error*100:+.2g}%)" for x in c)
+
+# the same quantity, worked out again with each choice of parts, against its target
+def result_string(name, values, target):
+  target = float(target)
+  return f"{name}: " + ", ".join(f"{float(v):.6g} ({(float(v)/target - 1)*100:+.2g}%)" for v in values)
+
+def add_arguments(parser):
+  parser.add_argument('-e', '--eseries', choices=list(SERIES), help='Also give the nearest standard parts from this series (singly, and as a series or parallel pair) and the results with them')
@@ -0,0 +1,42 @@
+import json
+import sys
+from . import cache, instrument
+
+# NDJSON streaming of a tool, so one process can answer any number of
+# calculations. Each line read is the arguments of the tool's library
+# function, by name or in order, as the server takes them (with an optional id
+# copied to the reply), and is answered by one line of {"result": ...} or
+# {"error": ...} with numbers as floats (null when not finite). Lines are
+# answered in order as they arrive, one at a time, and each reply is flushed,
+# so the tool can also be driven as a coprocess.
+
+def stream(tool, infile, outfile, name='mpmath', dps=15, store=None):
+  from . import server
+
+  server.store = store
+  for line in infile:
+    if not line.strip():
+      continue
+    try:
+      args = json.loads(line)
+    except ValueError as e:
+      reply = {'error': f"invalid JSON: {e}"}
+    else:
+      request = {'tool': tool, 'args': args, 'backend': name, 'dps': dps}
+      if isinstance(args, dict) and 'id' in args:
+        request['id'] = args.pop('id')
+      reply = server.run(request)
+    outfile.write(json.dumps(reply, allow_nan=False) + "\n")
+    outfile.flush()
+
+# streams stdin to stdout with the backend (and cache) asked for on the command line
+def run(tool, args):
+  store = cache.open_cache(args) if hasattr(args, 'cache') else None
+  with instrument.stage('stream'):
+    stream(tool, sys.stdin, sys.stdout, args.backend, args.dps, store)
+
+def add_arguments(parser):
+  parser.add_argument('--stream', action='store_true',
+    help="Read one JSON object of arguments per line from stdin and write one "
+    "JSON result per line to stdout, until stdin is closed (the positional "
+    "arguments aren't needed)")
@@ -0,0 +1,61 @@
+from collections import namedtuple
+from . import backend
+
+# The junction temperature model SPICE uses for diodes and BJTs: Vt = kT/q,
+# and Is given at the nominal temperature TNOM scales as
+#   Is(T) = Is*(T/TNOM)^(XTI/N)*exp((T/TNOM - 1)*EG/(N*Vt(T)))
+# Temperatures are in °C. A sweep solves every temperature at once through
+# the numpy backend, the analyses taking Vt and Is as arrays.
+
+K = 1.380649e-23 # Boltzmann constant (J/K)
+Q = 1.602176634e-19 # elementary charge (C)
+ZERO = 273.15 # 0°C in kelvin
+TNOM = 27
+EG = 1.11 # bandgap (eV) of silicon
+XTI = 3
+
+Junction = namedtuple('Junction', ['T', 'Vt', 'Is'])
+
+def thermal_voltage(T, m=None):
+  m = backend.get(m)
+  return m.fdiv(m.fmul(K,m.fadd(T,ZERO)),Q)
+
+def junction(T, Is=1e-12, N=1, Eg=EG, Xti=XTI, Tnom=TNOM, m=None):
+  m = backend.get(m)
+  Vt = thermal_voltage(T, m)
+  ratio = m.fdiv(m.fadd(T,ZERO),m.fadd(Tnom,ZERO))
+  Ist = m.fmul(Is,m.fmul(m.power(ratio,m.fdiv(Xti,N)),m.exp(m.fdiv(m.fmul(m.fsub(ratio,1),Eg),m.fmul(N,Vt)))))
+  return Junction(T, Vt, Ist)
+
+# function is one of the diode or bjt analyses (or designs) and args its
+# arguments by name (without Vt or m), with Is and N as at TNOM. Returns the
+# Junction at each temperature and the result, each field an array over them.
+def sweep(function, args, start, stop, points, Eg=EG, Xti=XTI, Tnom=TNOM):
+  import numpy as np
+
+  T = np.linspace(start, stop, int(points))
+  j = junction(T, args.get('Is', 1e-12), args.get('N', 1), Eg, Xti, Tnom, 'numpy')
+  return j, function(**{**args, 'Is': j.Is, 'Vt': j.Vt}, m='numpy')
+
+# the sweep as columns for batch.write_table, leaving out the fields a circuit
+# doesn't have (afce's gain without Rs)
+def columns(j, r):
+  import numpy as np
+
+  t = j._asdict()
+  t.update({n: np.broadcast_to(np.real(v), j.T.shape) for n, v in r._asdict().items() if v is not None})
+  return t
+
+# writes the sweep of T = (start, stop, points) as CSV (or .npy)
+def write_sweep(filename, function, args, T, Eg=EG, Xti=XTI, Tnom=TNOM):
+  from .batch import write_table
+
+  t = columns(*sweep(function, args, *T, Eg, Xti, Tnom))
+  write_table(filename, list(t), t)
+
+def add_arguments(parser):
+  parser.add_argument('--temperature', type=float, metavar='T', help='Junction temperature in °C: Vt is kT/q and Is (taken as at TNOM) is scaled to it, instead of using --Vt')
+  parser.add_argument('--temperature-sweep', type=float, nargs=3, metavar=('START', 'STOP', 'POINTS'), help='Solve at POINTS temperatures from START to STOP °C at once, and write the results as CSV (requires NumPy)')
+  parser.add_argument('--eg', type=float, default=EG, help=f'Bandgap in eV for the temperature model (default = {EG})')
+  parser.add_argument('--xti', type=float, default=XTI, help=f'Saturation current temperature exponent (default = {XTI})')
+  parser.add_argument('--tnom', type=float, default=TNOM, help=f'Temperature in °C at which Is is given (default = {TNOM})')
@@ -0,0 +1,140 @@
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import os
+import numpy as np
+from .ac import gain
+from .filters import Component
+
+# Monte Carlo tolerance analysis of a ladder from dbf, dcf or dctf. Every
+# sample scales each component by its own draw from the spread given for its
+# letter (C, L or R); a block of samples is analysed at once by ac.gain,
+# with the values as a column against the row of frequencies, and the blocks
+# are spread over a pool of processes. Asked for, every sample's gain is kept
+# too (as float32, 4 bytes a frequency), so that the percentiles can also be
+# taken at each frequency to give the envelopes of the response.
+
+# the percentiles asked for, and the passband ripple (dB) and the cutoff
+# shift (relative to the nominal ladder's) at each of them, along with the
+# nominal ladder's ripple and cutoff (Hz) and the passband edge (Hz). With
+# envelopes, f is the frequencies and envelope[i] the gain (dB) at each of
+# them of the percentiles[i]th sample; otherwise both are None.
+Spread = namedtuple('Spread', ['percentiles', 'ripple', 'cutoff', 'samples', 'nominal_ripple', 'nominal_cutoff', 'passband', 'f', 'envelope'])
+
+PERCENTILES = (1, 5, 50, 95, 99)
+BLOCK = 1 << 18 # samples times frequencies analysed at once
+DISTRIBUTIONS = ('uniform', 'normal')
+PASSBAND = 1 # dB down, at the edge of a Butterworth ladder's passband
+
+# "C=5" -> {'C': 0.05}
+def tolerances(specs):
+  t = {}
+  for spec in specs:
+    letter, _, value = spec.partition("=")
+    if letter.upper() not in "RLC" or len(letter) != 1 or not value:
+      raise ValueError(f"a tolerance is R, L or C and a percentage, as in C=5 (not {spec})")
+    t[letter.upper()] = float(value)/100
+  return t
+
+# where an Nth order Butterworth with cutoff fc is db down, the default edge of
+# its passband (at fc it is already 3dB down, which isn't ripple)
+def butterworth_passband(fc, N, db=PASSBAND):
+  return float(fc)*(10**(db/10) - 1)**(1/(2*N))
+
+# the last frequency up to fc at which the gain db (at f) is within drop dB of
+# its peak there, interpolated on a log scale: a Butterworth ladder's 1dB point,
+# or the ripple edge of an equiripple one whose ripple is under 1dB
+def passband(db, f, fc, drop=PASSBAND):
+  below = f <= fc
+  edge = db[below].max() - drop
+  i = np.flatnonzero(below & (db >= edge))[-1]
+  if i + 1 == len(f):
+    return float(f[i])
+  with np.errstate(divide='ignore', invalid='ignore'):
+    t = np.clip((db[i] - edge)/(db[i] - db[i+1]), 0, 1)
+  return float(np.exp(np.log(f[i]) + t*(np.log(f[i+1]) - np.log(f[i]))))
+
+# the passband (linearly spaced, for the ripple) up to the cutoff fc, then a
+# decade above it (logarithmically)
+def frequencies(fc, points):
+  return np.concatenate([np.linspace(fc/points, fc, points//2), np.geomspace(fc, 10*fc, points - points//2 + 1)[1:]])
+
+# the peak to peak ripple up to the passband edge fp, and the first frequency
+# past the peak gain at which the gain is 3dB down (interpolated on a log scale)
+def measure(db, f, fp):
+  passband = f <= fp
+  ripple = db[:,passband].max(axis=1) - db[:,passband].min(axis=1)
+  peak = db[:,passband].max(axis=1)
+  after = np.arange(len(f))[None,:] > db[:,passband].argmax(axis=1)[:,None]
+  below = (db <= peak[:,None] - 3) & after
+  i = below.argmax(axis=1)
+  found = below[np.arange(len(db)), i]
+  i = np.maximum(i, 1)
+  lo, hi = db[np.arange(len(db)), i-1], db[np.arange(len(db)), i]
+  with np.errstate(divide='ignore', invalid='ignore'):
+    t = np.clip((lo - (peak - 3))/(lo - hi), 0, 1)
+  cutoff = np.exp(np.log(f[i-1]) + t*(np.log(f[i]) - np.log(f[i-1])))
+  return ripple, np.where(found, cutoff, np.nan)
+
+def draw(rng, n, tolerance, distribution):
+  if distribution == 'normal':
+    # the tolerance is three standard deviations
+    return 1 + rng.normal(0, tolerance/3, n)
+  return 1 + rng.uniform(-tolerance, tolerance, n)
+
+def block(c, current, tolerance, distribution, f, fp, n, seed, envelope=False):
+  rng = np.random.default_rng(seed)
+  sampled = [Component(v.letter, v.number, float(v.value.real)*draw(rng, n, tolerance[v.letter], distribution)[:,None]) if v.letter in tolerance else v for v in c]
+  # with no spread given for any letter the one response stands for every sample
+  db = np.broadcast_to(gain(sampled, current, f), (n, len(f)))
+  ripple, cutoff = measure(db, f, fp)
+  return ripple, cutoff, db.astype(np.float32) if envelope else None
+
+# c is a ladder as ac.response takes it, fc the cutoff in Hz, tolerance the
+# spread of each letter (0.05 for 5%: the bounds of a uniform draw, or three
+# standard deviations of a normal one), fp the edge of the passband the ripple
+# is taken over (by default the nominal ladder's, as passband finds it),
+# workers the number of processes (one per CPU by
+# default, none when there is a single block or worker) and envelope whether
+# the percentiles are also taken at each frequency
+def analyse(c, current, fc, tolerance, samples=10000, distribution='uniform', fp=None, points=400, workers=None, seed=None, percentiles=PERCENTILES, envelope=False):
+  if distribution not in DISTRIBUTIONS:
+    raise ValueError(f"distribution must be one of {', '.join(DISTRIBUTIONS)} (not {distribution})")
+  if samples < 1:
+    raise ValueError(f"at least one sample must be taken (not {samples})")
+  fc = float(fc)
+  f = frequencies(fc, points)
+  fp = passband(gain(c, current, f), f, fc) if fp is None else float(fp)
+  if not f[0] <= fp <= f[-1]:
+    raise ValueError(f"the passband edge must be from {f[0]:.6g} to {f[-1]:.6g}Hz (not {fp:.6g})")
+  # so the ripple is taken right up to the edge
+  f = np.union1d(f, [fp])
+  ripple, nominal = measure(np.atleast_2d(gain(c, current, f)), f, fp)
+
+  size = max(1, BLOCK//len(f))
+  counts = [min(size, samples - i) for i in range(0, samples, size)]
+  seeds = np.random.SeedSequence(seed).spawn(len(counts))
+  work = [(c, current, tolerance, distribution, f, fp, n, s, envelope) for n, s in zip(counts, seeds)]
+
+  workers = min(workers or os.cpu_count(), len(work))
+  if workers > 1:
+    with ProcessPoolExecutor(workers) as pool:
+      results = list(pool.map(block, *zip(*work)))
+  else:
+    results = [block(*w) for w in work]
+
+  ripples = np.concatenate([r for r, _, _ in results])
+  cutoff = np.concatenate([x for _, x, _ in results])/nominal[0] - 1
+  envelopes = np.nanpercentile(np.concatenate([db for _, _, db in results]), percentiles, axis=0) if envelope else None
+  return Spread(percentiles, np.nanpercentile(ripples, percentiles), np.nanpercentile(cutoff, percentiles), samples, ripple[0], nominal[0], fp, f if envelope else None, envelopes)
+
+# the envelopes as a table for batch.write_table: f then the gain (dB) of each
+# percentile
+def envelope_table(s):
+  names = ['f'] + [f"{p}%" for p in s.percentiles]
+  return names, dict(zip(names, [s.f] + list(s.envelope)))
+
+# "Ripple (dB): 1% 1.1, 5% 1.32, ..." and the same for the cutoff shift (%)
+def spread_strings(s):
+  return [f"Samples: {s.samples}",
+    f"Ripple (dB to {s.passband:.6g}Hz, nominal {s.nominal_ripple:.3g}): " + ", ".join(f"{p}% {x:.3g}" for p, x in zip(s.percentiles, s.ripple)),
+    f"Cutoff shift (%, nominal {s.nominal_cutoff:.6g}Hz): " + ", ".join(f"{p}% {x*100:+.3g}" for p, x in zip(s.percentiles, s.cutoff))]
@@ -0,0 +1,85 @@
+from collections import namedtuple
+from . import backend
+from .rl import r2d
+
+# phases (Ptot, Pin and Plin) are in degrees; Rs is the source resistor found by design()
+Transformer = namedtuple('Transformer', ['Rs', 'Iin', 'Iout', 'Ptot', 'Ztot', 'Rtot', 'Xtot', 'Pin', 'Zin', 'Rin', 'Xin', 'Plin', 'Zlin', 'Rlin', 'Xlin',
+                                         'Vtot', 'Vs', 'Vin', 'Vrin', 'Vlin', 'Vout', 'Vlout', 'Vload', 'Xout', 'Lout', 'Lin', 'TR', 'va', 'watts'])
+
+# all voltages are RMS
+def analyse(Vsrc, Vf, Vs, Vin, Vout, Rs, Rrin, Rrout, Rload, m=None):
+  m = backend.get(m)
+
+  Vload = Vout
+  Ilout = Irout = Iout = Iload = m.fdiv(Vload,Rload)
+
+  Irin = Ilin = Iin = Is = Isrc = Itot = m.fdiv(Vs,Rs)
+  Ztot = m.fdiv(Vsrc,Isrc)
+  Vtot = m.fmul(Itot,Ztot)
+  Zin = m.fdiv(Vin,Iin)
+
+  Pin = m.acos(m.fdiv(m.fsub(m.fsub(m.power(Ztot,2),m.power(Rs,2)),m.power(Zin,2)),m.fmul(2,m.fmul(Rs,Zin))))
+  Rin = m.fmul(Zin,m.cos(Pin))
+  Rtot = Rs + Rin
+  Ptot = m.acos(m.fdiv(Rtot,Ztot))
+  Xin = Xlin = Xtot = m.fmul(Zin,m.sin(Pin))
+
+  Rlin = m.fsub(Rin,Rrin)
+  Zlin = m.sqrt(m.fadd(m.power(Rlin,2),m.power(Xlin,2)))
+  Plin = m.acos(m.fdiv(Rlin,Zlin))
+
+  Vlin = m.fmul(Ilin,Zlin)
+  Vrin = m.fmul(Irin,Rrin)
+
+  va = m.fmul(m.fmul(Vlin,Ilin),m.cos(Plin))
+
+  Xout = m.fdiv(m.fadd(Rload,Rrout),m.tan(Plin))
+  Lout = m.fdiv(Xout,m.fmul(2,m.fmul(m.pi,Vf)))
+  Vrout = m.fmul(Irout,Rrout)
+  Vlout = m.fadd(Vrout,Vload)
+  TR = m.fdiv(Vlin,Vlout)
+  Lin = m.fmul(m.power(TR,2),Lout)
+
+  watts = m.fmul(Vlout,Ilout)
+
+  return Transformer(Rs, Iin, Iout, r2d(m, Ptot), Ztot, Rtot, Xtot, r2d(m, Pin), Zin, Rin, Xin, r2d(m, Plin), Zlin, Rlin, Xlin,
+                     Vtot, Vs, Vin, Vrin, Vlin, Vout, Vlout, Vload, Xout, Lout, Lin, TR, va, watts)
+
+# all voltages are RMS
+def design(Vsrc, Vf, Vout, Rrin, Rrout, Rload, Lout, TR, m=None):
+  m = backend.get(m)
+
+  Vload = Vout
+
+  Irout = Ilout = Iout = Iload = m.fdiv(Vload,Rload)
+  Vrout = m.fmul(Irout,Rrout)
+  Vlout = m.fadd(Vout,Vrout)
+  Vlin = m.fmul(Vlout,TR)
+  watts = m.fmul(Vlout,Ilout)
+  Xout = m.fmul(2,m.fmul(m.pi,m.fmul(Vf,Lout)))
+  Plin = m.fsub(m.fdiv(m.pi,2),m.atan(m.fdiv(Xout,m.fadd(Rload,Rrout))))
+
+  Ilin = Irin = Iin = Is = Itot = m.fdiv(watts,m.fmul(Vlin,m.cos(Plin)))
+  Zlin = m.fdiv(Vlin,Ilin)
+  Rlin = m.fmul(Zlin,m.cos(Plin))
+  Xlin = Xin = Xtot = m.fmul(Zlin,m.sin(Plin))
+  va = m.fmul(m.fmul(Ilin,Vlin),m.cos(Plin))
+
+  Vrin = m.fmul(Irin, Rrin)
+  Rin = m.fadd(Rlin,Rrin)
+  Zin = m.sqrt(m.fadd(m.power(Rin,2),m.power(Xin,2)))
+  Pin = m.acos(m.fdiv(Rin,Zin))
+  Vin = m.fmul(Iin,Zin)
+
+  Vtot = Vsrc
+  Ztot = m.fdiv(Vtot,Itot)
+  Rtot = m.sqrt(m.fsub(m.power(Ztot,2),m.power(Xtot,2)))
+  Ptot = m.acos(m.fdiv(Rtot,Ztot))
+
+  Rs = m.fsub(Rtot,Rin)
+  Vs = m.fmul(Rs,Is)
+
+  Lin = m.fmul(m.power(TR,2),Lout)
+
+  return Transformer(Rs, Iin, Iout, r2d(m, Ptot), Ztot, Rtot, Xtot, r2d(m, Pin), Zin, Rin, Xin, r2d(m, Plin), Zlin, Rlin, Xlin,
+                     Vtot, Vs, Vin, Vrin, Vlin, Vout, Vlout, Vload, Xout, Lout, Lin, TR, va, watts)
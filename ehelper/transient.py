@@ -0,0 +1,113 @@
+from collections import namedtuple
+import numpy as np
+
+# The time domain response of the serial RC circuit to a sampled input, with
+# the output across the capacitor (or the resistor). The input is taken as
+# held between samples, for which the response is exact at every sample:
+#   Vc[n] = a*Vc[n-1] + (1 - a)*Vin[n-1],  a = exp(-1/(rate*R*C))
+# so a step gives 1 - exp(-t/RC) to rounding. The recursion is run a block at a
+# time with its state carried over, each block as rows of ROW samples: every
+# row's response from rest is one matrix product with the impulse response,
+# and the rows' starting states are the same recursion again over the row
+# ends (a^ROW apart), so nothing is evaluated a sample at a time.
+
+ROW = 64
+CHUNK = 1 << 20 # samples read and written at once
+
+# the samples simulated, the final capacitor voltage and the largest and
+# smallest output
+Transient = namedtuple('Transient', ['samples', 'Vc', 'maximum', 'minimum'])
+
+# T[i,j] = a^(j - i) above the diagonal, so row @ T is its response from rest
+def impulse(powers, n):
+  d = np.subtract.outer(np.arange(n), np.arange(n)).T
+  return np.where(d >= 0, powers[d.clip(0)], 0)
+
+# y[n] = a*y[n-1] + b*u[n] with y[-1] = y0
+def recursion(u, a, y0=0.0, b=1.0):
+  n = len(u)
+  powers = a**np.arange(ROW + 1)
+  if n <= ROW:
+    return b*(u @ impulse(powers, n)) + y0*powers[1:n+1]
+
+  # the whole rows as a view, each with its starting state as an extra first
+  # column, so the states are added in by the same product
+  rows = n // ROW
+  m = rows*ROW
+  T = b*impulse(powers, ROW)
+  U = u[:m].reshape(rows, ROW)
+  ends = recursion(U @ T[:,-1], powers[ROW], y0)
+  A = np.empty((rows, ROW + 1))
+  A[0,0] = y0
+  A[1:,0] = ends[:-1]
+  A[:,1:] = U
+  y = np.empty(n)
+  np.matmul(A, np.vstack([powers[1:], T]), out=y[:m].reshape(rows, ROW))
+  if m < n:
+    y[m:] = recursion(u[m:], a, ends[-1], b)
+  return y
+
+def coefficient(R, C, rate):
+  return float(np.exp(-1/(rate*R*C)))
+
+# the capacitor's voltage for each sample of x, given the last output and
+# input before it; returns the voltages and the new state
+def respond(x, a, state=(0.0, 0.0)):
+  y0, x0 = state
+  y = np.empty(len(x))
+  y[0] = a*y0 + (1 - a)*x0
+  y[1:] = recursion(x[:-1], a, y[0], 1 - a)
+  return y, (y[-1], x[-1])
+
+# the input's samples (one column of a .npy file, or of raw binary with the
+# given number of channels interleaved), memory mapped
+def open_input(filename, column=0, channels=1, dtype='float32'):
+  if filename.endswith(".npy"):
+    data = np.load(filename, mmap_mode='r')
+  else:
+    data = np.memmap(filename, dtype=dtype, mode='r')
+    data = data[:len(data) - len(data) % channels].reshape(-1, channels)
+  if data.ndim == 1:
+    data = data[:,None]
+  if not 0 <= column < data.shape[1]:
+    raise ValueError(f"the input has {data.shape[1]} channels, so no column {column}")
+  return data[:,column]
+
+# streams infile through the circuit into outfile (.npy, otherwise raw
+# float64), CHUNK samples at a time
+def simulate(infile, outfile, R, C, rate, column=0, channels=1, dtype='float32', resistor=False, chunk=CHUNK):
+  if R <= 0 or C <= 0 or rate <= 0:
+    raise ValueError("R, C and the sample rate must be positive")
+  x = open_input(infile, column, channels, dtype)
+  if not len(x):
+    raise ValueError(f"{infile} has no samples")
+  a = coefficient(R, C, rate)
+  state = (0.0, 0.0)
+  maximum = -np.inf
+  minimum = np.inf
+  with open(outfile, 'wb') as f:
+    if outfile.endswith(".npy"):
+      np.lib.format.write_array_header_1_0(f, {'descr': '<f8', 'fortran_order': False, 'shape': (len(x),)})
+    for i in range(0, len(x), chunk):
+      block = np.asarray(x[i:i+chunk], dtype=float)
+      y, state = respond(block, a, state)
+      if resistor:
+        y = block - y
+      maximum = max(maximum, y.max())
+      minimum = min(minimum, y.min())
+      f.write(y.astype('<f8').tobytes())
+  return Transient(len(x), state[0], maximum, minimum)
+
+# the largest difference between the simulated response to a unit step, run
+# in blocks as simulate() does, and 1 - exp(-t/RC), over the given number of
+# time constants
+def step_error(R, C, rate, constants=10, chunk=CHUNK):
+  n = int(constants*rate*R*C) + 1
+  a = coefficient(R, C, rate)
+  state = (0.0, 0.0)
+  error = 0.0
+  for i in range(0, n, chunk):
+    t = np.arange(i, min(i + chunk, n))/rate
+    y, state = respond(np.ones(len(t)), a, state)
+    error = max(error, np.abs(y - (1 - np.exp(-t/(R*C)))).max())
+  return error
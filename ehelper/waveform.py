@@ -0,0 +1,148 @@
+from collections import namedtuple
+from itertools import chain, islice
+
+# RMS voltages and relative phases from sampled captures, for the tools that
+# take measured voltages (at and asrl). A capture is a .npy array or raw
+# interleaved binary (both memory mapped) or a CSV file (parsed a chunk of rows
+# at a time), one column per channel (a 1-D .npy is a single channel), so its
+# size is only bounded by the disk. Each chunk adds to every channel's sum and
+# sum of squares, for its mean and AC RMS, and to its phasor at the fundamental
+# (a single bin DFT over the whole capture), whose angles give the phases
+# relative to a reference channel. The sums are of the samples less the first
+# chunk's mean, so that a large DC offset doesn't cancel the AC out of the sum
+# of squares, and the rest of the mean is taken off the phasors at the end, so
+# it doesn't leak in either.
+
+# rms and phase (in degrees, leading the reference) by channel name; frequency
+# is in Hz when the sample rate is known, otherwise in cycles per sample
+Capture = namedtuple('Capture', ['rms', 'phase', 'mean', 'frequency', 'samples'])
+
+CHUNK = 1 << 20 # samples of each channel read at once
+TIME = ['t', 'time'] # CSV columns taken as the sample times
+
+# the capture's channel names (names, a CSV header or default), its sample rate
+# when a CSV time column gives it, and its chunks
+def read(filename, names=None, default=None, dtype='float32', chunk=CHUNK):
+  import numpy as np
+
+  if filename.endswith(".npy"):
+    data = np.load(filename, mmap_mode='r')
+    return names or default, None, (data[i:i+chunk] for i in range(0, len(data), chunk))
+
+  if not filename.endswith(".csv"):
+    names = names or default
+    if not names:
+      raise ValueError("the channels of a raw capture must be named")
+    data = np.memmap(filename, dtype=dtype, mode='r')
+    data = data[:len(data) - len(data) % len(names)].reshape(-1, len(names))
+    return names, None, (data[i:i+chunk] for i in range(0, len(data), chunk))
+
+  f = open(filename)
+  first = f.readline()
+  fields = [h.strip() for h in first.split(",")]
+  try:
+    [float(h) for h in fields]
+    header = None
+    f.seek(0)
+  except ValueError:
+    header = fields
+
+  def chunks():
+    with f:
+      while lines := list(islice(f, chunk)):
+        yield np.loadtxt(lines, delimiter=",", ndmin=2)
+
+  rate = None
+  if header and header[0].lower() in TIME:
+    blocks = chunks()
+    block = next(blocks)
+    rate = 1/(block[1,0] - block[0,0]) if len(block) > 1 else None
+    return names or header[1:], rate, (b[:,1:] for b in chain([block], blocks))
+  return names or header or default, rate, chunks()
+
+# the strongest frequency of the first chunk, in cycles per sample, from a
+# Hann windowed FFT with the peak's bin interpolated
+def fundamental(x):
+  import numpy as np
+
+  x = x - x.mean()
+  s = np.abs(np.fft.rfft(x*np.hanning(len(x))))
+  k = int(np.argmax(s[1:])) + 1
+  if 1 < k < len(s) - 1:
+    a, b, c = np.log(s[k-1:k+2] + 1e-300)
+    k = k + (a - c)/(2*(a - 2*b + c))
+  return k/len(x)
+
+# names are the channels in column order (from a CSV header, or default, when
+# not given); frequency (Hz, which needs the rate) is found from the capture
+# when None; the phases are relative to reference (the first channel by default)
+def analyse(filename, names=None, rate=None, frequency=None, reference=None, default=None, dtype='float32', chunk=CHUNK):
+  import numpy as np
+
+  names, csv_rate, chunks = read(filename, names, default, dtype, chunk)
+  rate = rate or csv_rate
+  shift = total = squares = phasor = basis = None
+  w = None if frequency is None or rate is None else 2*np.pi*frequency/rate
+  n = 0
+  for block in chunks:
+    block = np.asarray(block, dtype=float)
+    if block.ndim == 1:
+      block = block.reshape(-1, 1)
+    if block.ndim != 2 or not len(block):
+      continue
+    if total is None:
+      names = names or [f"V{i+1}" for i in range(block.shape[1])]
+      if block.shape[1] < len(names):
+        raise ValueError(f"the capture has {block.shape[1]} channels, not {len(names)}")
+      if w is None:
+        w = 2*np.pi*fundamental(block[:,names.index(reference) if reference in names else 0])
+      shift = block.mean(axis=0)
+      total = np.zeros(block.shape[1])
+      squares = np.zeros(block.shape[1])
+      phasor = np.zeros(block.shape[1], dtype=complex)
+      basis = 0j
+    e = np.exp(-1j*w*(n + np.arange(len(block))))
+    block = block - shift
+    total += block.sum(axis=0)
+    squares += np.einsum('ij,ij->j', block, block)
+    phasor += e @ block
+    basis += e.sum()
+    n += len(block)
+
+  if not n:
+    raise ValueError(f"{filename} has no samples")
+  rms = np.sqrt(np.maximum(squares/n - (total/n)**2, 0))
+  phasor = phasor - total/n*basis
+  mean = shift + total/n
+  if reference and reference not in names:
+    raise ValueError(f"the capture has no channel {reference} (only {', '.join(names)})")
+  r = names.index(reference) if reference else 0
+  phase = np.degrees(np.angle(phasor/phasor[r]))
+  frequency = w/(2*np.pi)*(rate or 1)
+
+  return Capture(dict(zip(names, rms.tolist())), dict(zip(names, phase.tolist())), dict(zip(names, mean.tolist())), float(frequency), n)
+
+# the capture asked for on the command line, with every measured channel in it
+def measure(args, measured, reference, frequency=None):
+  names = args.channels.split(",") if args.channels else None
+  c = analyse(args.waveform, names, args.rate, frequency, reference, measured, args.dtype, args.chunk)
+  missing = [n for n in measured if n not in c.rms]
+  if missing:
+    raise ValueError(f"the capture has no channel {', '.join(missing)} (only {', '.join(c.rms)}); name them with --channels")
+  return c
+
+# with a capture, the positional arguments given are the ones it doesn't
+# measure, in order: asrl.py -w capture.csv Rr Rlr
+def arguments(args, positionals, measured):
+  given = [getattr(args, n) for n in positionals if getattr(args, n) is not None]
+  rest = [n for n in positionals if n not in measured]
+  if len(given) != len(rest):
+    raise ValueError(f"{', '.join(rest[:-1])} and {rest[-1]} are required with a capture")
+  return dict(zip(rest, given))
+
+def add_arguments(parser, measured):
+  parser.add_argument('-w', '--waveform', metavar='filename', help=f"Measure {', '.join(measured)} (as RMS, and their phases) from a capture: CSV (with an optional t column first), .npy, or raw interleaved binary; the positional arguments are then only the rest (requires NumPy)")
+  parser.add_argument('--channels', help=f"Comma separated names of the capture's columns, in order, to be taken as {', '.join(measured)} (default = the CSV header, or {','.join(measured)})")
+  parser.add_argument('--rate', type=float, help='Sample rate of the capture in Hz (default = from the CSV t column, otherwise the frequency is only found in cycles per sample)')
+  parser.add_argument('--dtype', default='float32', help='Sample type of a raw binary capture, as a NumPy dtype (default = float32)')
+  parser.add_argument('--chunk', type=int, default=CHUNK, help=f'Samples of each channel processed at once (default = {CHUNK})')
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+from ehelper import cache
+from ehelper.server import Server
+from os import remove
+import argparse
+import asyncio
+import logging
+
+def main():
+  parser = argparse.ArgumentParser(description='Serve every tool as JSON requests over a Unix socket or localhost TCP port')
+  parser.add_argument('-s', '--socket', metavar='path', help='Listen on a Unix socket')
+  parser.add_argument('-p', '--port', type=int, default=8765, help='Listen on this localhost TCP port when no socket is given (default = 8765)')
+  parser.add_argument('-w', '--workers', type=int, help='Number of worker processes (default = number of CPUs)')
+  parser.add_argument('-c', '--chunk', type=int, default=64, help='Largest number of batched requests sent to a worker at once (default = 64)')
+  parser.add_argument('-f', '--force', action='store_true', help='Remove an existing Unix socket before listening')
+  parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  cache.add_arguments(parser)
+  args = parser.parse_args()
+
+  if args.verbose:
+    logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+
+  if args.socket and args.force:
+    try:
+      remove(args.socket)
+    except FileNotFoundError:
+      pass
+
+  server = Server(args.workers, args.chunk, args.cache, args.cache_size)
+  try:
+    asyncio.run(server.serve(args.socket, port=args.port))
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.close()
+
+if __name__ == "__main__":
+  main()
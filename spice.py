@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+
+from ehelper import instrument, mna, netlist
+import argparse
+import logging
+import os
+
+def write_ac(r, nodes, filename):
+  from ehelper.batch import write_table
+  import numpy as np
+
+  nodes = nodes or (['out'] if 'out' in r.voltages else sorted(r.voltages))
+  t = {'f': r.f}
+  for n in nodes:
+    if n.lower() not in r.voltages:
+      raise ValueError(f"the deck has no node {n}")
+    v = r.voltages[n.lower()]
+    with np.errstate(divide='ignore'):
+      t[f"db({n})"] = 20*np.log10(np.abs(v))
+    t[f"phase({n})"] = np.degrees(np.unwrap(np.angle(v)))
+  write_table(filename, list(t), t)
+
+# every analysis as a plot, named as ngspice names them (in binary unless
+# SPICE_ASCIIRAWFILE is set, as ngspice does)
+def write_raw(title, analyses, filename):
+  from ehelper import rawfile
+
+  binary = not os.environ.get('SPICE_ASCIIRAWFILE')
+  with open(filename, 'wb') as f:
+    for r in analyses:
+      voltages = [(f"v({n})", 'voltage', v) for n, v in r.voltages.items()]
+      currents = [(n[2:-1] + "#branch", 'current', i) for n, i in r.currents.items()]
+      if isinstance(r, mna.OP):
+        rows = [(n, kind, [v]) for n, kind, v in voltages + currents]
+        name = 'Operating Point'
+      else:
+        rows = [('frequency', 'frequency', r.f)] + voltages + currents
+        name = 'AC Analysis'
+      rawfile.write(f, title, name, [(n, kind) for n, kind, _ in rows], [v for _, _, v in rows], binary)
+
+def report(args):
+  if args.rawfile:
+    if len(args.deck) != 1:
+      raise ValueError("-r writes the results of a single deck")
+    deck = netlist.read(args.deck[0])
+    write_raw(deck.title, mna.simulate(deck), args.rawfile)
+    return
+
+  results = mna.simulate_many(args.deck, args.workers)
+  for deck, analyses in zip(args.deck, results):
+    if len(args.deck) > 1:
+      print(f"{deck}:")
+    for r in analyses:
+      if isinstance(r, mna.OP):
+        logging.info(f'Newton iterations: {r.iterations}')
+        for n, v in r.voltages.items():
+          print(f"V({n}): {v}")
+        for n, i in r.currents.items():
+          print(f"{n.upper()}: {i}")
+      elif len(args.deck) > 1:
+        name = os.path.splitext(os.path.basename(deck))[0] + ".csv"
+        filename = os.path.join(args.output, name) if args.output else os.path.join(os.path.dirname(deck), name)
+        write_ac(r, args.node, filename)
+        print(f"AC: {filename}")
+      else:
+        write_ac(r, args.node, args.output)
+
+def main():
+  parser = argparse.ArgumentParser(description='Simulate SPICE decks (R, L, C, D, V and I elements; .op and .ac)')
+  parser.add_argument('deck', nargs='+', help="SPICE deck(s) to simulate ('-' for stdin)")
+  parser.add_argument('-o', '--output', metavar='filename', help='Write the AC response to a CSV or .npy file instead of stdout (a directory when there are several decks)')
+  parser.add_argument('-n', '--node', action='append', help="Node to write the AC response of (may be repeated; default = out, or every node)")
+  parser.add_argument('-r', '--rawfile', metavar='filename', help="Write every analysis of the deck to an ngspice raw file instead, as ngspice -b -r does (binary, or ASCII with SPICE_ASCIIRAWFILE=1)")
+  parser.add_argument('-b', '--batch', action='store_true', help='Ignored, for the command lines of ngspice (so spice.py can stand in for it)')
+  parser.add_argument('-w', '--workers', type=int, help='Processes used when there are several decks (default = one per CPU)')
+  parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  instrument.add_arguments(parser)
+  args = parser.parse_args()
+  instrument.start(args)
+
+  if args.verbose:
+    logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+  logging.info(f'decks: {len(args.deck)}, output: {args.output}, rawfile: {args.rawfile}, nodes: {args.node}, workers: {args.workers}')
+
+  try:
+    instrument.timed('simulate', report, args)
+  except (FileNotFoundError, ValueError) as e:
+    parser.print_usage()
+    print(f"\nerror: {e}")
+    exit(1)
+
+if __name__ == "__main__":
+  main()
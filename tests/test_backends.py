@@ -0,0 +1,97 @@
+import math
+import os
+import re
+import subprocess
+import sys
+import pytest
+
+# The README examples run under each backend, with every number printed
+# compared against mpmath's. The README gives the tolerance: 1e-12, but for the
+# four coefficient dctf.py design whose repeated root limits the float and
+# numpy backends to about 1e-8, and asrl.py's Rll, which is Rl - 256 and so
+# loses six digits in every backend (mpmath's own is only good to about 1e-9).
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOLERANCE = 1e-12
+
+EXAMPLES = [
+  ("asd.py 5 470", TOLERANCE),
+  ("asd.py 5 470 1e-18 1.8", TOLERANCE),
+  ("apd.py 5 470 1000", TOLERANCE),
+  ("apd.py 5 470 1000 1e-18 1.8", TOLERANCE),
+  ("dsd.py 5 .01", TOLERANCE),
+  ("dpd.py 5 .01 .002", TOLERANCE),
+  ("ascc.py 5 1000 100", TOLERANCE),
+  ("apcc.py 5 10000 10000 1000", TOLERANCE),
+  ("afce.py 5 1000 10000", TOLERANCE),
+  ("afce.py 5 1000 10000 2200", TOLERANCE),
+  ("apt.py 1", TOLERANCE),
+  ("apt.py -c .5", TOLERANCE),
+  ("asrlc.py 22 .00035 120e-12", TOLERANCE),
+  ("aprlc.py 130000 .00035 120e-12", TOLERANCE),
+  ("dsrlc.py 774000 10000 L .00035", TOLERANCE),
+  ("dsrlc.py 774000 10000 R 22", TOLERANCE),
+  ("dsrlc.py 774000 10000 C 120e-12", TOLERANCE),
+  ("dprlc.py 774000 10000 L .00035", TOLERANCE),
+  ("dprlc.py 774000 10000 R 130000", TOLERANCE),
+  ("dt.py 0.707107 195.3125 0.256941 256 137 10000 .32 1.414213562", TOLERANCE),
+  ("at.py 0.707107 195.3125 0.469346 0.391846 0.256941 1000 256 137 10000", TOLERANCE),
+  ("asrl.py 0.707107 0.477341 0.394315 1000 256", 1e-8),
+  ("dsrl.py 0.707107 195.3125 256 .64 R 1", TOLERANCE),
+  ("dsrl.py 0.707107 195.3125 256 .64 V .3", TOLERANCE),
+  ("dsrl.py 0.707107 195.3125 256 .64 P 30", TOLERANCE),
+  ("asrc.py 1000 1e-6", TOLERANCE),
+  ("dbf.py 1000 5 50", TOLERANCE),
+  ("dbf.py -s 1000 4 50 -n -", TOLERANCE),
+  ("dbf.py -c 1000 3 50 -n -", TOLERANCE),
+  ("dcf.py 1000 5 50 -n -", TOLERANCE),
+  ("dcf.py 1000 4 50 .5 -n -", TOLERANCE),
+  ("dctf.py 1 2 -n -", TOLERANCE),
+  ("dctf.py 1 2 2 -n -", TOLERANCE),
+  ("dctf.py 1 2 2 1 -n -", 1e-8),
+  ("dctf.py 1 3.236 5.236 5.236 3.236", TOLERANCE),
+  ("dctf.py 1 3.236 5.236 5.236 3.236 1", TOLERANCE),
+  # reverse biased far enough that Id = -Is and Vd = -inf
+  ("asd.py -- -20 470", TOLERANCE),
+  ("apd.py -- -20 470 1000", TOLERANCE),
+]
+
+NUMBER = re.compile(r'(?<![\w.])[-+]?(?:inf|nan|(?:\d+\.?\d*|\.\d+)(?:e[-+]?\d+)?)(?![\w.])')
+
+def numbers(command, backend):
+  tool, *args = command.split()
+  p = subprocess.run([sys.executable, os.path.join(ROOT, tool), '--backend', backend] + args, capture_output=True, text=True, cwd=ROOT)
+  assert p.returncode == 0, p.stderr
+  return [float(x) for x in NUMBER.findall(p.stdout)]
+
+def agree(x, y, tolerance):
+  if math.isinf(x) or math.isinf(y) or math.isnan(x) or math.isnan(y):
+    return x == y or math.isnan(x) and math.isnan(y)
+  return abs(x - y) <= tolerance*max(abs(x), abs(y), 1e-300)
+
+@pytest.mark.parametrize('backend', ['float', 'numpy'])
+@pytest.mark.parametrize('command, tolerance', EXAMPLES)
+def test_backend_agrees_with_mpmath(command, tolerance, backend):
+  expected = numbers(command, 'mpmath')
+  got = numbers(command, backend)
+  assert expected
+  assert len(got) == len(expected)
+  for x, y in zip(got, expected):
+    assert agree(x, y, tolerance), f"{command} --backend {backend}: {x} vs mpmath {y}"
+
+# the principal branch of W, which is negative from -1/e to 0 and not real below
+@pytest.mark.parametrize('x', [-0.36, -0.3, -0.25, -0.1, -1e-3, -1e-10, 0, 1e-5, 1, 10, 1e10])
+def test_float_lambertw(x):
+  import mpmath
+  sys.path.insert(0, ROOT)
+  from ehelper import backend
+
+  assert agree(backend.lambertw(x), float(mpmath.lambertw(x).real), TOLERANCE)
+
+def test_float_lambertw_below_the_branch_point():
+  sys.path.insert(0, ROOT)
+  from ehelper import backend
+
+  assert backend.lambertw(-1/math.e) == -1
+  with pytest.raises(ValueError):
+    backend.lambertw(-0.4)
@@ -0,0 +1,84 @@
+import os
+import shlex
+import sys
+import time
+import pytest
+
+# The runner on a few designs with spice.py standing in for ngspice, and on
+# simulators that hang, fail or write nothing.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ehelper import runner
+
+SPICE = f"{shlex.quote(sys.executable)} {shlex.quote(os.path.join(ROOT, 'spice.py'))} -b -r {{raw}} {{deck}}"
+
+DESIGNS = [
+  {'tool': 'dbf', 'args': [1000, 5, 50], 'id': 'butterworth'},
+  {'tool': 'dbf', 'args': {'fc': 1000, 'N': 4, 'R': 50, 'source': True}},
+  {'tool': 'dbf', 'args': {'fc': 1000, 'N': 3, 'R': 50, 'current': True}},
+  {'tool': 'dcf', 'args': {'fc': 1000, 'N': 5, 'R': 50, 'e': .5}, 'id': 'chebyshev'},
+  {'tool': 'dctf', 'args': {'C': [1, 3.236, 5.236, 5.236, 3.236]}},
+]
+
+def jobs(designs):
+  return [runner.design(d, i) for i, d in enumerate(designs, 1)]
+
+def test_designs_pass(tmp_path):
+  results = runner.run_many(jobs(DESIGNS), SPICE, str(tmp_path), workers=2)
+  assert [r.name for r in results] == ['butterworth', 'dbf-2', 'dbf-3', 'chebyshev', 'dctf-5']
+  for r in results:
+    assert r.status == 'pass', r
+    assert r.points > 0
+    assert os.path.exists(r.raw)
+  assert results[2].transfer is None
+  assert results[0].transfer.points > 0
+
+def test_duplicate_names(tmp_path):
+  results = runner.run_many(jobs([DESIGNS[0], DESIGNS[3] | {'id': 'butterworth'}]), SPICE, str(tmp_path))
+  assert results[0].status == 'pass'
+  assert results[1].status == 'error'
+  assert 'already named butterworth' in results[1].message
+
+def test_design_error():
+  r = runner.design({'tool': 'dbf', 'args': [1000]}, 1)
+  assert isinstance(r, runner.Result)
+  assert r.status == 'error'
+
+# whether pid is alive, as a killed process no one has reaped is a zombie
+def running(pid, wait=5):
+  end = time.monotonic() + wait
+  while time.monotonic() < end:
+    try:
+      with open(f"/proc/{pid}/stat") as f:
+        if f.read().rpartition(')')[2].split()[0] == 'Z':
+          return False
+    except FileNotFoundError:
+      return False
+    time.sleep(.1)
+  return True
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason="needs /proc")
+def test_timeout_kills_the_simulator(tmp_path):
+  # the sleep is sh's child, so only killing the group stops it
+  pid = tmp_path / 'pid'
+  start = time.monotonic()
+  [r] = runner.run_many(jobs(DESIGNS[:1]), f"sh -c 'sleep 30 & echo $! > {pid}; wait'", str(tmp_path), timeout=1)
+  assert r.status == 'timeout'
+  assert time.monotonic() - start < 10
+  assert not running(int(pid.read_text()))
+
+def test_exit_status(tmp_path):
+  [r] = runner.run_many(jobs(DESIGNS[:1]), "sh -c 'echo no licence >&2; exit 3'", str(tmp_path))
+  assert r.status == 'error'
+  assert r.message == "the simulator exited with 3: no licence"
+
+def test_no_raw_file(tmp_path):
+  [r] = runner.run_many(jobs(DESIGNS[:1]), "true {deck} {raw}", str(tmp_path))
+  assert r.status == 'error'
+  assert r.message.startswith(os.path.join(str(tmp_path), 'butterworth.raw'))
+
+def test_no_simulator(tmp_path):
+  [r] = runner.run_many(jobs(DESIGNS[:1]), "no-such-simulator {deck}", str(tmp_path))
+  assert r.status == 'error'
@@ -0,0 +1,28 @@
+import math
+import os
+import sys
+import numpy as np
+
+# The tolerance analysis' magnitude only path and its default passband.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ehelper import ac, filters, tolerance
+
+def test_gain_is_the_response_db():
+  rng = np.random.default_rng(1)
+  f = tolerance.frequencies(1000, 400)
+  for N in (5, 40):
+    d = filters.butterworth(1000, N, 50, m='float')
+    c = [filters.Component(v.letter, v.number, float(v.value.real)*(1 + rng.uniform(-.1, .1, (50, 1)))) for v in filters.butterworth_ladder(d.components, 50, False)]
+    for current in (False, True):
+      assert np.allclose(ac.gain(c, current, f), ac.response(c, current, f).db, rtol=0, atol=1e-9)
+
+# the coefficients are rounded, so the cutoff is off by 0.2%
+def test_butterworth_coefficients_take_the_1db_point():
+  d = filters.cauer([1, 3.86, 7.46, 9.14, 7.46, 3.86, 1], m='float')
+  fc = 1/(2*math.pi)
+  s = tolerance.analyse(d.components, False, fc, {}, samples=10, workers=1)
+  assert math.isclose(s.passband, tolerance.butterworth_passband(fc, 6), rel_tol=1e-2)
+  assert math.isclose(s.nominal_ripple, 1, rel_tol=1e-3)
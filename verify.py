@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+
+from ehelper import backend, instrument
+import argparse
+import json
+import logging
+import tempfile
+
+def main():
+  parser = argparse.ArgumentParser(description='Simulate the ngspice decks of many dbf, dcf and dctf designs and check their AC responses')
+  parser.add_argument('designs', help="One JSON request per line, as the server takes them: {\"tool\": \"dcf\", \"args\": {\"fc\": 1000, \"N\": 5, \"R\": 50}, \"id\": \"cheby5\"} ('-' for stdin)")
+  parser.add_argument('-s', '--simulator', metavar='COMMAND', default='ngspice -b -r {raw} {deck}', help="Command run for each deck, with {deck} and {raw} replaced by its files (default = ngspice -b -r {raw} {deck}; './spice.py -b -r {raw} {deck}' needs no ngspice)")
+  parser.add_argument('-d', '--directory', help='Where the decks and raw files are kept (default = a new temporary directory)')
+  parser.add_argument('-w', '--workers', type=int, help='Simulators run at once (default = one per CPU)')
+  parser.add_argument('-t', '--timeout', type=float, default=60, help='Seconds a simulator is given before it is stopped and its design fails (default = 60)')
+  parser.add_argument('--db', type=float, default=0.1, help='Largest difference in dB from the expected response that passes (default = 0.1)')
+  parser.add_argument('--phase', type=float, default=1, help='Largest difference in degrees that passes (default = 1)')
+  parser.add_argument('--floor', type=float, default=-100, help='dB below which the response is not compared (default = -100)')
+  parser.add_argument('-v', '--verbose', action='store_true', help='Print debug')
+  instrument.add_arguments(parser)
+  backend.add_arguments(parser)
+  args = parser.parse_args()
+  instrument.start(args)
+  m = backend.load(args.backend, args.dps)
+
+  from ehelper import runner
+
+  if args.verbose:
+    logging.basicConfig(format='%(levelname)s|%(message)s', level=logging.INFO)
+
+  try:
+    with open("/dev/stdin") if args.designs == "-" else open(args.designs) as f:
+      lines = [l for l in f if l.strip()]
+  except OSError as e:
+    parser.print_usage()
+    print(f"\nerror: {e}")
+    exit(1)
+
+  directory = args.directory or tempfile.mkdtemp(prefix='ehelper-')
+  logging.info(f'designs: {len(lines)}, simulator: {args.simulator}, directory: {directory}, workers: {args.workers}, timeout: {args.timeout}')
+
+  jobs = []
+  with instrument.stage('design'):
+    for i, line in enumerate(lines, 1):
+      try:
+        jobs.append(runner.design(json.loads(line), i, m))
+      except ValueError as e:
+        jobs.append(runner.failed(f"line-{i}", 'error', f"invalid JSON: {e}"))
+
+  results = instrument.timed('simulate', runner.run_many, jobs, args.simulator, directory, args.workers, args.timeout, args.db, args.phase, args.floor)
+
+  for r in results:
+    if r.status in ('pass', 'fail'):
+      print(f"{r.name}: {r.status} (dB error: {r.db:.3g}, phase error: {r.phase:.3g}°, points: {r.points})")
+      if r.transfer:
+        logging.info(f'transfer function dB error: {r.transfer.db:.3g}, phase error: {r.transfer.phase:.3g}°, points: {r.transfer.points}')
+    else:
+      print(f"{r.name}: {r.status}: {r.message}")
+    logging.info(f'raw: {r.raw}')
+  passed = sum(r.status == 'pass' for r in results)
+  print(f"\nPassed: {passed} of {len(results)} (decks and raw files in {directory})")
+  if passed < len(results):
+    exit(1)
+
+if __name__ == "__main__":
+  main()